@@ -0,0 +1,330 @@
+"""API HTTP/JSON de precificação para integração com PDV e sistema de agendamentos
+
+Endpoints:
+    GET  /health                       estado do serviço e assinatura dos dados carregados
+    GET  /seasonal                     serviços e meses disponíveis
+    GET  /seasonal?service=S&month=M   demanda média e desvio padrão do serviço no mês
+    POST /quote                        um cenário ou {"scenarios": [...]} calculados em lote
+    POST /report                       relatório PDF de um cenário (do cache em disco ou do pool de processos)
+
+Um cenário tem `promotional_price` e `service` + `month` (número ou nome), ou `demand` explícita;
+os demais parâmetros têm os mesmos valores padrão do formulário do dashboard.
+
+Exemplo:
+    python api.py --port 8502 --pdf-workers 2
+    curl -s localhost:8502/quote -d '{"service": "Massagem Relaxante (50 min)", "month": 3, "promotional_price": 85}'
+"""
+import argparse
+import asyncio
+import contextlib
+import math
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Route
+
+from dataset import DATA_PATH, MONTHS, file_signature, read_seasonal_index
+from pricing import PromotionResult, calculate_promotion
+from report_cache import ReportCache, iter_file, report_key
+from simulation import DISTRIBUTIONS, simulate_promotion
+
+# Valores padrão dos parâmetros (os mesmos do formulário do dashboard)
+SCENARIO_DEFAULTS = {
+    'original_price': 100.0,
+    'service_cost': 20.0,
+    'commission_percentage': 30.0,
+    'desired_profit_increase': 5.0,
+}
+
+# Limites de uma requisição
+MAX_SCENARIOS = 10_000
+MAX_SIMULATED_SCENARIOS = 100
+MAX_DRAWS = 1_000_000
+MAX_SIMULATED_DEMAND = 1_000_000
+
+# Relatórios aguardando ou em renderização por worker antes de responder 503
+PDF_QUEUE_PER_WORKER = 4
+
+MONTH_NUMBERS = {name.lower(): number for number, name in MONTHS.items()}
+
+
+class SeasonalData:
+    """Índice sazonal do processo, relido só quando a assinatura do arquivo muda
+
+    Segue a mesma regra de invalidação do dashboard e lê pelo mesmo cache colunar em disco
+    (dados_sazonais.cache.parquet), então API e dashboard nunca divergem sobre os dados.
+    """
+
+    def __init__(self, path=DATA_PATH):
+        self.path = path
+        self.signature = None
+        self._index = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        signature = file_signature(self.path)
+        if signature != self.signature:
+            with self._lock:
+                if signature != self.signature:
+                    self._index = read_seasonal_index(self.path)
+                    self.signature = signature
+        return self._index
+
+
+def parse_integer(value, name):
+    """Lê um inteiro do JSON ou da query: aceita 7 e 7.0, recusa 7.9, valores infinitos e booleanos"""
+    try:
+        if isinstance(value, bool):
+            raise TypeError
+        number = float(value)
+    except (TypeError, ValueError, OverflowError):
+        raise ValueError(f"'{name}' deve ser um número inteiro")
+    if not number.is_integer():
+        raise ValueError(f"'{name}' deve ser um número inteiro")
+    return int(number)
+
+
+def parse_month(value):
+    if isinstance(value, str) and value.strip().lower() in MONTH_NUMBERS:
+        return MONTH_NUMBERS[value.strip().lower()]
+    try:
+        month = parse_integer(value, 'month')
+    except ValueError:
+        month = None
+    if month not in MONTHS:
+        raise ValueError(f"'month' deve ser um número de 1 a 12 ou o nome do mês, não {value!r}")
+    return month
+
+
+def parse_number(item, name, default=None, positive=False):
+    """Lê um campo numérico do cenário: finito e não negativo (ou maior que zero, com `positive`)"""
+    try:
+        value = float(item.get(name, default))
+    except (TypeError, ValueError):
+        raise ValueError(f"'{name}' deve ser um número")
+    if not math.isfinite(value) or value < 0 or (positive and value == 0):
+        raise ValueError(f"'{name}' deve ser um número finito {'maior que zero' if positive else 'não negativo'}")
+    return value
+
+
+def parse_scenario(item, index):
+    """Valida um cenário do corpo da requisição e resolve a demanda pelos dados sazonais"""
+    if not isinstance(item, dict):
+        raise ValueError("cada cenário deve ser um objeto JSON")
+    if 'promotional_price' not in item:
+        raise ValueError("cenário sem 'promotional_price'")
+    scenario = {name: parse_number(item, name, default, positive=name == 'original_price')
+                for name, default in SCENARIO_DEFAULTS.items()}
+    scenario['promotional_price'] = parse_number(item, 'promotional_price')
+
+    service = item.get('service')
+    month = parse_month(item['month']) if item.get('month') is not None else None
+    if item.get('demand') is not None:
+        demand, std_dev = parse_number(item, 'demand'), parse_number(item, 'std_dev', 0.0)
+    elif service is None or month is None:
+        raise ValueError("informe 'service' e 'month' ou uma 'demand' explícita")
+    else:
+        month_data = index.get(service, month)
+        if month_data is None:
+            raise LookupError(f"sem dados para {service!r} no mês {month}")
+        demand, std_dev = month_data
+    return dict(service=service, month=month, demand=demand, std_dev=std_dev, **scenario)
+
+
+def _json_number(value):
+    # JSON não tem NaN: os totais com promoção de cenários inviáveis viram null
+    return None if isinstance(value, float) and math.isnan(value) else value
+
+
+def quote_scenarios(scenarios):
+    """Calcula todos os cenários em uma única chamada vetorizada do motor de precificação"""
+    columns = {name: [scenario[name] for scenario in scenarios] for name in
+               ['demand', 'original_price', 'promotional_price', 'service_cost',
+                'commission_percentage', 'desired_profit_increase']}
+    result = calculate_promotion(columns['demand'], columns['original_price'], columns['promotional_price'],
+                                 columns['service_cost'], columns['commission_percentage'],
+                                 columns['desired_profit_increase'])
+    fields = {name: values.tolist() for name, values in zip(PromotionResult._fields, result)}
+    quotes = []
+    for position, scenario in enumerate(scenarios):
+        quote = dict(scenario)
+        quote.update({name: _json_number(values[position]) for name, values in fields.items()})
+        # Lucro esperado com a demanda média do mês ao preço promocional
+        quote['expected_profit'] = (scenario['demand'] * quote['profit_per_promo_service']
+                                    if quote['feasible'] else None)
+        quotes.append(quote)
+    return quotes
+
+
+def simulate_quotes(quotes, draws, distribution):
+    for quote in quotes:
+        if not quote['feasible']:
+            continue
+        simulation = simulate_promotion(quote['demand'], quote['std_dev'], quote['required_quantity'],
+                                        quote['profit_per_promo_service'], draws=draws, distribution=distribution)
+        quote['simulation'] = {
+            'probability': simulation.probability,
+            'expected_sales': simulation.expected_sales,
+            'expected_profit': simulation.expected_profit,
+            'profit_percentiles': {f"p{p}": value for p, value in simulation.profit_percentiles.items()},
+            'draws': simulation.draws,
+        }
+
+
+def error(status_code, message):
+    return JSONResponse({'error': message}, status_code=status_code)
+
+
+async def read_json(request):
+    try:
+        return await request.json()
+    except ValueError:
+        raise ValueError("corpo da requisição não é JSON válido")
+
+
+async def health(request):
+    data = request.app.state.data
+    data.get()
+    return JSONResponse({'status': 'ok', 'data': data.path, 'signature': list(data.signature),
+                         'pdf_workers': request.app.state.pdf_workers})
+
+
+async def seasonal(request):
+    index = request.app.state.data.get()
+    service = request.query_params.get('service')
+    if service is None:
+        return JSONResponse({'services': index.services, 'months': MONTHS})
+    if request.query_params.get('month') is None:
+        return error(400, "informe o parâmetro 'month' junto com 'service'")
+    try:
+        month = parse_month(request.query_params.get('month'))
+    except ValueError as exc:
+        return error(400, str(exc))
+    month_data = index.get(service, month)
+    if month_data is None:
+        return error(404, f"sem dados para {service!r} no mês {month}")
+    demand, std_dev = month_data
+    return JSONResponse({'service': service, 'month': month, 'demand': demand, 'std_dev': std_dev})
+
+
+async def quote(request):
+    try:
+        body = await read_json(request)
+        items = body.get('scenarios', [body]) if isinstance(body, dict) else body
+        if not isinstance(items, list) or not items:
+            raise ValueError("envie um cenário ou uma lista não vazia em 'scenarios'")
+        if len(items) > MAX_SCENARIOS:
+            raise ValueError(f"no máximo {MAX_SCENARIOS} cenários por requisição")
+        index = request.app.state.data.get()
+        scenarios = [parse_scenario(item, index) for item in items]
+
+        options = body if isinstance(body, dict) else {}
+        simulate = options.get('simulate', False)
+        if not isinstance(simulate, bool):
+            raise ValueError("'simulate' deve ser true ou false")
+        draws = parse_integer(options.get('draws', 100_000), 'draws')
+        distribution = options.get('distribution', 'normal')
+        if simulate and (len(scenarios) > MAX_SIMULATED_SCENARIOS or not 0 < draws <= MAX_DRAWS
+                         or distribution not in DISTRIBUTIONS):
+            raise ValueError(f"simulação aceita até {MAX_SIMULATED_SCENARIOS} cenários, até {MAX_DRAWS} "
+                             f"sorteios e distribuição em {sorted(DISTRIBUTIONS)}")
+        if simulate and any(scenario[name] > MAX_SIMULATED_DEMAND
+                            for scenario in scenarios for name in ('demand', 'std_dev')):
+            raise ValueError(f"simulação aceita 'demand' e 'std_dev' de até {MAX_SIMULATED_DEMAND}")
+    except LookupError as exc:
+        return error(404, str(exc))
+    except (ValueError, TypeError) as exc:
+        return error(400, str(exc))
+
+    quotes = quote_scenarios(scenarios)
+    if simulate:
+        # Monte Carlo fora do event loop: não atrasa as cotações concorrentes
+        await run_in_threadpool(simulate_quotes, quotes, draws, distribution)
+    return JSONResponse({'results': quotes})
+
+
+async def report(request):
+    try:
+        body = await read_json(request)
+        scenario = parse_scenario(body, request.app.state.data.get())
+        if scenario['service'] is None or scenario['month'] is None:
+            raise ValueError("o relatório precisa de 'service' e 'month'")
+    except LookupError as exc:
+        return error(404, str(exc))
+    except (ValueError, TypeError) as exc:
+        return error(400, str(exc))
+
+    state = request.app.state
+    from bulk_reports import render_report, report_file_name
+    file_name = report_file_name(scenario['service'], scenario['month'])
+    headers = {'Content-Disposition': f'attachment; filename="{file_name}"'}
+
+    # Mesma chave de conteúdo do dashboard: os argumentos de report_jobs.render_pdf_report
+    key = report_key((scenario['service'], MONTHS[scenario['month']], scenario['demand'], scenario['std_dev'],
+                      *(scenario[name] for name in SCENARIO_DEFAULTS), scenario['promotional_price'], False))
+    cached = state.report_cache.open(key)
+    if cached is not None:
+        return StreamingResponse(iter_file(cached), media_type='application/pdf', headers=headers)
+
+    if state.pdf_slots.locked():
+        return error(503, "fila de relatórios cheia, tente novamente em instantes")
+    pricing = {name: scenario[name] for name in [*SCENARIO_DEFAULTS, 'promotional_price']}
+    job = (scenario['service'], scenario['month'], scenario['demand'], scenario['std_dev'], pricing)
+    async with state.pdf_slots:
+        _, pdf_bytes = await asyncio.get_running_loop().run_in_executor(state.pdf_pool, render_report, job)
+    if pdf_bytes is None:
+        return error(422, "o preço promocional não cobre a comissão e o custo do serviço")
+    with contextlib.suppress(OSError):
+        # Falha ao gravar no cache (ex.: disco cheio) não impede a resposta
+        await run_in_threadpool(state.report_cache.put, key, pdf_bytes)
+    return Response(pdf_bytes, media_type='application/pdf', headers=headers)
+
+
+def build_app(data_path=DATA_PATH, pdf_workers=2, report_cache=None):
+    """Cria a aplicação Starlette com o índice sazonal, o pool e o cache de relatórios do processo"""
+
+    @contextlib.asynccontextmanager
+    async def lifespan(app):
+        from bulk_reports import init_worker
+        app.state.pdf_pool = ProcessPoolExecutor(max_workers=pdf_workers, initializer=init_worker)
+        app.state.pdf_slots = asyncio.Semaphore(pdf_workers * PDF_QUEUE_PER_WORKER)
+        try:
+            yield
+        finally:
+            app.state.pdf_pool.shutdown(cancel_futures=True)
+
+    app = Starlette(routes=[
+        Route('/health', health),
+        Route('/seasonal', seasonal),
+        Route('/quote', quote, methods=['POST']),
+        Route('/report', report, methods=['POST']),
+    ], lifespan=lifespan)
+    app.state.data = SeasonalData(data_path)
+    app.state.pdf_workers = pdf_workers
+    app.state.report_cache = report_cache or ReportCache()
+    app.state.data.get()
+    return app
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Serve a API HTTP/JSON de precificação.")
+    parser.add_argument('--host', default='127.0.0.1', help="endereço de escuta")
+    parser.add_argument('--port', type=int, default=8502, help="porta (o dashboard usa a 8501)")
+    parser.add_argument('--data', default=DATA_PATH, help="arquivo sazonal (o mesmo do dashboard)")
+    parser.add_argument('--pdf-workers', type=int, default=max((os.cpu_count() or 1) - 1, 1),
+                        help="processos dedicados aos relatórios PDF")
+    return parser
+
+
+def main(argv=None):
+    import uvicorn
+    args = build_parser().parse_args(argv)
+    uvicorn.run(build_app(args.data, args.pdf_workers), host=args.host, port=args.port, log_level='warning')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,29 +1,22 @@
 import streamlit as st
 import pandas as pd
-import plotly.graph_objects as go
+import numpy as np
 from datetime import datetime
-from reportlab.lib.pagesizes import letter, A4
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, PageBreak, Image
-from reportlab.lib import colors
-from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT
-import io
-from PIL import Image as PILImage
-import plotly.io as pio
-
-# Cores da Paleta Living Spa
-VERDE_SALVIA = "#98A869"
-VERDE_MUSGO = "#6D7649"
-BEGE_NEUTRO = "#E6D6CC"
-CREME_SUAVE = "#FAFFE7"
-MARROM_TERRA = "#A39384"
-BRANCO_PURO = "#FFFFFF"
-VERDE_OLIVA_ESCURO = "#3B3418"
-
-# Cores para o gráfico (vibrantes e destacadas)
-COR_SEM_PROMO = "#E74C3C"  # Vermelho vibrante
-COR_COM_PROMO = "#27AE60"  # Verde vibrante
+import uuid
+from assets import LOGO_DISPLAY_WIDTH, theme_logo
+from branches import CONSOLIDATED, BranchData
+from charts import (create_comparison_chart, create_plan_trend_chart, create_profit_curve_chart,
+                    create_seasonal_figures, create_sensitivity_heatmap)
+from dataset import MONTHS, service_nouns
+from diagnostics import PROCESS_TIMINGS, StageTimings, activate_session, record, span
+from forecast import INTERVAL_LEVEL, forecast_demand, load_history
+from palette import VERDE_SALVIA, VERDE_MUSGO, BEGE_NEUTRO, CREME_SUAVE, MARROM_TERRA, BRANCO_PURO, VERDE_OLIVA_ESCURO
+from portfolio import optimize_portfolio
+from pricing import (DEMAND_MODELS, annual_plan, calculate_promotion, plan_result, promotion_grid,
+                     optimal_promotional_price)
+from report_cache import ReportCache
+from report_jobs import QUEUED, QueueFull, ReportQueue
+from simulation import DISTRIBUTIONS, simulate_promotion
 
 # Configuração da página
 st.set_page_config(
@@ -43,293 +36,112 @@ def get_theme_mode():
         pass
     return "light"
 
-# Carrega os dados sazonais
-def load_seasonal_data():
-    """Carrega os dados sazonais do arquivo CSV"""
-    df = pd.read_csv('dados_sazonais.csv')
-    return df
+# Registro das filiais com os dados sazonais de cada uma, lidos no primeiro acesso e mantidos em um
+# LRU limitado por memória (compartilhado entre sessões)
+@st.cache_resource(show_spinner=False)
+def branch_data():
+    """Filiais do registro (filiais.json ou LIVING_SPA_BRANCHES) e o cache dos seus dados"""
+    return BranchData()
 
-# Função para gerar gráfico de comparação
-def create_comparison_chart(demand, original_price, promotional_price, commission_percentage, service_cost, required_quantity):
-    """Cria um gráfico comparativo de receita e lucro"""
-    
-    # Cálculos
-    commission_decimal = commission_percentage / 100
-    
-    # Sem promoção
-    revenue_without = original_price * demand
-    commission_without = revenue_without * commission_decimal
-    cost_without = service_cost * demand
-    profit_without = revenue_without - commission_without - cost_without
-    
-    # Com promoção (usando quantidade necessária)
-    revenue_with = promotional_price * required_quantity
-    commission_with = revenue_with * commission_decimal
-    cost_with = service_cost * required_quantity
-    profit_with = revenue_with - commission_with - cost_with
-    
-    categories = ['Receita', 'Comissão', 'Custo', 'Lucro']
-    sem_promo = [revenue_without, commission_without, cost_without, profit_without]
-    com_promo = [revenue_with, commission_with, cost_with, profit_with]
-    
-    fig = go.Figure(data=[
-        go.Bar(name='Sem Promoção', x=categories, y=sem_promo, marker_color=COR_SEM_PROMO),
-        go.Bar(name='Com Promoção', x=categories, y=com_promo, marker_color=COR_COM_PROMO)
-    ])
-    
-    fig.update_layout(
-        title="Comparação: Sem Promoção vs Com Promoção",
-        barmode='group',
-        template='plotly_dark',
-        height=400,
-        showlegend=True,
-        yaxis_title="Valor (R$)",
-        hovermode='x unified',
-        plot_bgcolor='rgba(0,0,0,0)',
-        paper_bgcolor='rgba(0,0,0,0)',
-        font=dict(color=BRANCO_PURO)
-    )
-    
-    return fig
+def load_seasonal_data(branch):
+    """Dados sazonais da filial (ou do consolidado), relidos apenas quando o arquivo muda"""
+    return branch_data().get(branch)
 
-# Função para gerar gráfico para PDF com cores e texto preto
-def create_comparison_chart_for_pdf(demand, original_price, promotional_price, commission_percentage, service_cost, required_quantity):
-    """Cria um gráfico comparativo para PDF com texto preto"""
-    
-    # Cálculos
-    commission_decimal = commission_percentage / 100
-    
-    # Sem promoção
-    revenue_without = original_price * demand
-    commission_without = revenue_without * commission_decimal
-    cost_without = service_cost * demand
-    profit_without = revenue_without - commission_without - cost_without
-    
-    # Com promoção (usando quantidade necessária)
-    revenue_with = promotional_price * required_quantity
-    commission_with = revenue_with * commission_decimal
-    cost_with = service_cost * required_quantity
-    profit_with = revenue_with - commission_with - cost_with
-    
-    categories = ['Receita', 'Comissão', 'Custo', 'Lucro']
-    sem_promo = [revenue_without, commission_without, cost_without, profit_without]
-    com_promo = [revenue_with, commission_with, cost_with, profit_with]
-    
-    fig = go.Figure(data=[
-        go.Bar(name='Sem Promoção', x=categories, y=sem_promo, marker_color=COR_SEM_PROMO),
-        go.Bar(name='Com Promoção', x=categories, y=com_promo, marker_color=COR_COM_PROMO)
-    ])
-    
-    fig.update_layout(
-        title="Comparação: Sem Promoção vs Com Promoção",
-        barmode='group',
-        template='plotly_white',  # Fundo branco para PDF
-        height=400,
-        showlegend=True,
-        yaxis_title="Valor (R$)",
-        hovermode='x unified',
-        plot_bgcolor='rgba(255,255,255,1)',
-        paper_bgcolor='rgba(255,255,255,1)',
-        font=dict(color='#000000')  # Texto preto
-    )
-    
-    return fig
-
-# Função para gerar PDF
-def generate_pdf_report(service, month, demand, std_dev, original_price, service_cost, 
-                        commission_percentage, desired_profit_increase, promotional_price,
-                        revenue_without_promo, commission_without_promo, total_service_cost_without_promo,
-                        spa_revenue_without_promo, desired_spa_revenue, required_quantity,
-                        total_promo_revenue, final_commission, total_service_cost_with_promo,
-                        spa_revenue_with_promo, comparison_chart, is_custom=False):
-    """Gera um relatório em PDF com todas as informações da estratégia de promoção"""
-    
-    # Define o nome do serviço em singular
-    if is_custom:
-        service_singular = "do serviço"
-        service_name_display = "Outros"
-    else:
-        service_singular = "drenagem" if "Drenagem" in service else "massagem"
-        service_name_display = service
-    
-    # Cria buffer para o PDF
-    pdf_buffer = io.BytesIO()
-    
-    # Cria o documento PDF
-    doc = SimpleDocTemplate(pdf_buffer, pagesize=A4,
-                           rightMargin=0.5*inch, leftMargin=0.5*inch,
-                           topMargin=0.5*inch, bottomMargin=0.5*inch)
-    
-    # Lista de elementos do PDF
-    elements = []
-    
-    # Estilos
-    styles = getSampleStyleSheet()
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontSize=24,
-        textColor=colors.HexColor(VERDE_SALVIA),
-        spaceAfter=6,
-        alignment=TA_CENTER,
-        fontName='Helvetica-Bold'
-    )
-    
-    heading_style = ParagraphStyle(
-        'CustomHeading',
-        parent=styles['Heading2'],
-        fontSize=14,
-        textColor=colors.HexColor(VERDE_MUSGO),
-        spaceAfter=12,
-        spaceBefore=12,
-        fontName='Helvetica-Bold'
-    )
-    
-    normal_style = ParagraphStyle(
-        'CustomNormal',
-        parent=styles['Normal'],
-        fontSize=10,
-        textColor=colors.HexColor(VERDE_OLIVA_ESCURO),
-        spaceAfter=6,
-        leading=14
-    )
-    
-    # Título
-    elements.append(Paragraph("🌿 RELATÓRIO DE ESTRATÉGIA DE PROMOÇÃO", title_style))
-    elements.append(Paragraph(f"Living Spa - {datetime.now().strftime('%d/%m/%Y às %H:%M')}", 
-                             ParagraphStyle('subtitle', parent=styles['Normal'], fontSize=10, 
-                                          textColor=colors.HexColor(MARROM_TERRA), alignment=TA_CENTER)))
-    elements.append(Spacer(1, 0.3*inch))
-    
-    # Seção 1: Informações Gerais
-    elements.append(Paragraph("1. INFORMAÇÕES GERAIS", heading_style))
-    
-    if is_custom:
-        info_text = f"""
-        <b>Serviço:</b> {service_name_display}<br/>
-        <b>Demanda Esperada:</b> {int(demand)} atendimentos<br/>
-        <b>Data do Relatório:</b> {datetime.now().strftime('%d/%m/%Y')}
-        """
-    else:
-        info_text = f"""
-        <b>Serviço:</b> {service_name_display}<br/>
-        <b>Mês da Promoção:</b> {month}<br/>
-        <b>Data do Relatório:</b> {datetime.now().strftime('%d/%m/%Y')}
-        """
-    elements.append(Paragraph(info_text, normal_style))
-    elements.append(Spacer(1, 0.2*inch))
-    
-    # Seção 2: Análise de Demanda (apenas se não for custom)
-    if not is_custom:
-        elements.append(Paragraph("2. ANÁLISE DE DEMANDA", heading_style))
-        
-        demand_text = f"""
-        <b>Demanda Esperada:</b> {int(demand)} atendimentos<br/>
-        <b>Desvio Padrão:</b> ±{std_dev:.2f}
-        """
-        elements.append(Paragraph(demand_text, normal_style))
-        elements.append(Spacer(1, 0.2*inch))
-        
-        section_number = 3
-    else:
-        section_number = 2
-    
-    # Seção de Parâmetros de Precificação
-    elements.append(Paragraph(f"{section_number}. PARÂMETROS DE PRECIFICAÇÃO", heading_style))
-    
-    pricing_text = f"""
-    <b>Preço Original:</b> R$ {original_price:.2f}<br/>
-    <b>Preço Promocional:</b> R$ {promotional_price:.2f}<br/>
-    <b>Desconto:</b> {((1 - promotional_price/original_price) * 100):.1f}%<br/>
-    <b>Custo por Serviço:</b> R$ {service_cost:.2f}<br/>
-    <b>Comissão Massagista:</b> {commission_percentage:.1f}%<br/>
-    <b>Lucro Adicional Desejado:</b> {desired_profit_increase:.1f}%
-    """
-    elements.append(Paragraph(pricing_text, normal_style))
-    elements.append(Spacer(1, 0.2*inch))
-    
-    # Seção de Cenário Sem Promoção
-    section_number += 1
-    elements.append(Paragraph(f"{section_number}. CENÁRIO SEM PROMOÇÃO (BASELINE)", heading_style))
-    
-    without_text = f"""
-    <b>Receita Total:</b> R$ {revenue_without_promo:,.2f}<br/>
-    <b>Comissão Massagista:</b> R$ {commission_without_promo:,.2f}<br/>
-    <b>Custo Total:</b> R$ {total_service_cost_without_promo:,.2f}<br/>
-    <b>Lucro Real sem Estratégia:</b> R$ {spa_revenue_without_promo:,.2f}
-    """
-    elements.append(Paragraph(without_text, normal_style))
-    elements.append(Spacer(1, 0.2*inch))
-    
-    # Seção de Cenário Com Promoção
-    section_number += 1
-    elements.append(Paragraph(f"{section_number}. CENÁRIO COM PROMOÇÃO (META)", heading_style))
-    
-    if is_custom:
-        service_text = "do serviço"
-    else:
-        service_text = "drenagens" if "Drenagem" in service else "massagens"
-    
-    with_text = f"""
-    <b>Quantidade Necessária:</b> {required_quantity} {service_text}<br/>
-    <b>Receita Total:</b> R$ {total_promo_revenue:,.2f}<br/>
-    <b>Comissão Massagista:</b> R$ {final_commission:,.2f}<br/>
-    <b>Custo Total:</b> R$ {total_service_cost_with_promo:,.2f}<br/>
-    <b>Lucro Real da Estratégia:</b> R$ {spa_revenue_with_promo:,.2f}
-    """
-    elements.append(Paragraph(with_text, normal_style))
-    elements.append(Spacer(1, 0.2*inch))
-    
-    # Seção de Resumo Executivo
-    section_number += 1
-    elements.append(Paragraph(f"{section_number}. RESUMO EXECUTIVO", heading_style))
-    
-    lucro_diff = spa_revenue_with_promo - spa_revenue_without_promo
-    lucro_diff_pct = ((spa_revenue_with_promo / spa_revenue_without_promo - 1) * 100) if spa_revenue_without_promo > 0 else 0
-    
-    summary_text = f"""
-    <b>Estratégia:</b> Reduzir o preço de R$ {original_price:.2f} para R$ {promotional_price:.2f} (desconto de {((1 - promotional_price/original_price) * 100):.1f}%)<br/><br/>
-    
-    <b>Objetivo:</b> Aumentar o lucro em {desired_profit_increase:.1f}% em relação ao cenário atual<br/><br/>
-    
-    <b>Meta de Vendas:</b> {required_quantity} {service_text} ao preço promocional<br/><br/>
-    
-    <b>Impacto no Lucro:</b> Aumento de R$ {lucro_diff:,.2f} ({lucro_diff_pct:+.1f}%)<br/><br/>
-    
-    <b>Lucro Esperado:</b> R$ {spa_revenue_with_promo:,.2f} (vs R$ {spa_revenue_without_promo:,.2f} sem promoção)
-    """
-    
-    elements.append(Paragraph(summary_text, normal_style))
-    elements.append(Spacer(1, 0.3*inch))
-    
-    # Seção de Gráfico Comparativo
-    section_number += 1
-    elements.append(Paragraph(f"{section_number}. GRÁFICO COMPARATIVO", heading_style))
-    
-    # Salva o gráfico como imagem com fundo branco e texto preto
-    try:
-        img_buffer = io.BytesIO()
-        pio.write_image(comparison_chart, img_buffer, format='png', width=600, height=400)
-        img_buffer.seek(0)
-        img = Image(img_buffer, width=6*inch, height=4*inch)
-        elements.append(img)
-    except:
-        elements.append(Paragraph("Gráfico não disponível nesta versão", normal_style))
-    
-    elements.append(Spacer(1, 0.2*inch))
-    
-    # Rodapé
-    elements.append(Spacer(1, 0.1*inch))
-    footer_text = f"<i>Relatório gerado automaticamente pelo Living Spa Dashboard em {datetime.now().strftime('%d/%m/%Y às %H:%M:%S')}</i>"
-    elements.append(Paragraph(footer_text, ParagraphStyle('footer', parent=styles['Normal'], 
-                                                         fontSize=8, textColor=colors.HexColor(MARROM_TERRA), 
-                                                         alignment=TA_CENTER)))
-    
-    # Constrói o PDF
-    doc.build(elements)
-    pdf_buffer.seek(0)
-    
-    return pdf_buffer
+# Previsão de demanda (Holt-Winters) da filial, reajustada só quando o histórico da ingestão muda
+@st.cache_resource(max_entries=8, show_spinner=False)
+def _fit_demand_forecast(branch, history_version):
+    if not history_version:
+        return None
+    with span('forecast'):
+        return forecast_demand(load_history([path for path, _ in history_version]))
+
+def load_demand_forecast(branch):
+    """Previsão dos próximos 12 meses da filial, ou None se ela não tem histórico suficiente"""
+    return _fit_demand_forecast(branch, branch_data().history_version(branch))
+
+# Plano anual serviço × mês (recalculado só quando os dados da filial ou os parâmetros de preço mudam)
+@st.cache_data(max_entries=16, show_spinner=False)
+def _compute_annual_plan(branch, use_forecast, version, original_price, promotional_price, service_cost,
+                         commission_percentage, desired_profit_increase):
+    index = load_demand_forecast(branch).index if use_forecast else load_seasonal_data(branch)
+    with span('pricing'):
+        return annual_plan(index.frame, original_price, promotional_price,
+                           service_cost, commission_percentage, desired_profit_increase)
+
+def load_annual_plan(branch, use_forecast, original_price, promotional_price, service_cost,
+                     commission_percentage, desired_profit_increase):
+    """Plano anual de todos os serviços da filial (médias ou previsão) para os parâmetros do formulário"""
+    version = branch_data().history_version(branch) if use_forecast else branch_data().version(branch)
+    return _compute_annual_plan(branch, use_forecast, version, original_price, promotional_price,
+                                service_cost, commission_percentage, desired_profit_increase)
+
+# Portfólio de promoções da filial sob a capacidade de terapeutas (recalculado só quando os dados ou
+# os parâmetros mudam)
+@st.cache_data(max_entries=16, show_spinner=False)
+def _compute_promotion_portfolio(branch, use_forecast, version, original_price, service_cost,
+                                 commission_percentage, desired_profit_increase, elasticity, demand_model,
+                                 capacity_hours):
+    index = load_demand_forecast(branch).index if use_forecast else load_seasonal_data(branch)
+    with span('portfolio'):
+        return optimize_portfolio(index.frame, original_price, service_cost, commission_percentage,
+                                  desired_profit_increase, elasticity, capacity_hours, demand_model)
+
+def load_promotion_portfolio(branch, use_forecast, original_price, service_cost, commission_percentage,
+                             desired_profit_increase, elasticity, demand_model, capacity_hours):
+    """Promoções de maior lucro total da filial (médias ou previsão) dentro das horas de terapeuta"""
+    version = branch_data().history_version(branch) if use_forecast else branch_data().version(branch)
+    return _compute_promotion_portfolio(branch, use_forecast, version, original_price, service_cost,
+                                        commission_percentage, desired_profit_increase, elasticity,
+                                        demand_model, capacity_hours)
+
+# Gráficos sazonais por filial, serviço e versão dos dados. Guarda as próprias figuras (não JSON): o
+# st.plotly_chart revalida dicts inteiros em go.Figure, o que custa mais que montar de novo.
+# As figuras em cache são compartilhadas entre sessões e nunca devem ser alteradas.
+@st.cache_resource(max_entries=64, show_spinner=False)
+def _build_seasonal_figures(branch, version, service, line_color, marker_color):
+    with span('figures'):
+        _, service_plural = service_nouns(service)
+        return create_seasonal_figures(load_seasonal_data(branch).by_service[service],
+                                       service_plural, line_color, marker_color)
+
+def load_seasonal_figures(branch, service, line_color, marker_color):
+    """Gráficos de demanda e desvio padrão do serviço, reconstruídos só quando os dados mudam"""
+    return _build_seasonal_figures(branch, branch_data().version(branch), service, line_color, marker_color)
+
+# Calcula a grade de sensibilidade (vetorizada e cacheada por tupla de parâmetros)
+@st.cache_data(max_entries=32, show_spinner=False)
+def compute_sensitivity_grid(demand, original_price, service_cost, desired_profit_increase,
+                             price_range, commission_range, size):
+    """Retorna preços, comissões, quantidade necessária e lucro esperado, com NaN onde não há margem"""
+    with span('pricing'):
+        prices, commissions, result = promotion_grid(demand, original_price, service_cost, desired_profit_increase,
+                                                     price_range, commission_range, size)
+    # float32 reduz pela metade o payload enviado ao navegador
+    required_grid = np.where(result.feasible, result.required_quantity, np.nan).astype(np.float32)
+    profit_grid = np.where(result.feasible, demand * result.profit_per_promo_service, np.nan).astype(np.float32)
+    return prices, commissions, required_grid, profit_grid
+
+# Simula a demanda do mês (cacheado por cenário; sementes fixas tornam o resultado reprodutível)
+@st.cache_data(max_entries=64, show_spinner=False)
+def run_demand_simulation(demand, std_dev, required_quantity, profit_per_promo_service, distribution):
+    """Executa a simulação de Monte Carlo de um cenário"""
+    with span('simulation'):
+        return simulate_promotion(demand, std_dev, required_quantity, profit_per_promo_service,
+                                  distribution=distribution)
+
+# Fila de relatórios PDF do processo: um pool de processos limitado, compartilhado por todas as sessões,
+# que consulta e alimenta o cache de relatórios em disco
+@st.cache_resource(show_spinner=False)
+def report_queue():
+    """Fila que renderiza os PDFs fora da thread do script (limites em LIVING_SPA_PDF_WORKERS/_QUEUE)"""
+    return ReportQueue(cache=ReportCache())
+
+# Agregado de tempos por etapa da sessão, ou None com o diagnóstico desligado
+def session_timings():
+    """Retorna o StageTimings da sessão quando o painel de diagnóstico está ligado"""
+    if st.session_state.get('diagnostics_enabled'):
+        return st.session_state.get('stage_timings')
+    return None
 
 # CSS personalizado com paleta Living Spa
 st.markdown(f"""
@@ -428,18 +240,14 @@ st.markdown(f"""
     </style>
 """, unsafe_allow_html=True)
 
-# Detecta o tema e carrega a logo apropriada
+# Detecta o tema (a logo 2× já redimensionada fica em memória, compartilhada entre sessões)
 theme_mode = get_theme_mode()
-if theme_mode == "dark":
-    logo_path = "Logo-Living-SPA-BRANCO.png"
-else:
-    logo_path = "Logo-Living-SPA-PRETO.png"
 
 # Título principal com logo
 col_logo, col_title = st.columns([1, 4])
 with col_logo:
     try:
-        st.image(logo_path, width=100)
+        st.image(theme_logo(theme_mode), width=LOGO_DISPLAY_WIDTH)
     except:
         st.write("🌿")
 
@@ -449,8 +257,10 @@ with col_title:
 
 st.markdown("---")
 
-# Carrega dados
-seasonal_data = load_seasonal_data()
+# Diagnóstico opt-in: com o painel lateral ligado, os spans desta sessão são agregados e registrados
+if st.session_state.get('diagnostics_enabled'):
+    st.session_state.setdefault('stage_timings', StageTimings(label=uuid.uuid4().hex[:12]))
+activate_session(session_timings())
 
 # Sidebar com navegação
 st.sidebar.title("🌿 Menu")
@@ -459,169 +269,346 @@ page = st.sidebar.radio(
     ["📊 Análise Sazonal", "💰 Precificação Inteligente"]
 )
 
+# Filial cujos dados alimentam as duas páginas (o seletor só aparece com mais de uma no registro)
+branches = branch_data().branches
+if st.session_state.get('branch') not in branches:
+    st.session_state['branch'] = branches[0]
+if len(branches) > 1:
+    st.sidebar.selectbox(
+        "🏢 Filial",
+        branches,
+        key='branch',
+        help=f"'{CONSOLIDATED}' soma a demanda de todas as filiais por serviço e mês"
+    )
+branch = st.session_state['branch']
+
+# Carrega dados
+seasonal_data = load_seasonal_data(branch)
+
 # Meses para referência
-months = {
-    1: "Janeiro", 2: "Fevereiro", 3: "Março", 4: "Abril",
-    5: "Maio", 6: "Junho", 7: "Julho", 8: "Agosto",
-    9: "Setembro", 10: "Outubro", 11: "Novembro", 12: "Dezembro"
+months = MONTHS
+
+# Ícones e pares de cores (linha, marcador) alternados entre os serviços
+SERVICE_ICONS = ["🌿", "🧘", "💆", "✨"]
+SERIES_COLORS = [(VERDE_SALVIA, VERDE_MUSGO), (VERDE_MUSGO, VERDE_SALVIA)]
+
+# Valores iniciais dos campos da precificação (as chaves persistem entre páginas na sessão)
+PRICING_DEFAULTS = {
+    'pricing_custom_demand': 20.0,
+    'pricing_original_price': 100.0,
+    'pricing_service_cost': 20.0,
+    'pricing_commission': 30.0,
+    'pricing_profit_increase': 5.0,
+    'pricing_promotional_price': 100.0,
+    'pricing_distribution': 'normal',
+    'pricing_use_forecast': True,
 }
+PRICING_KEYS = ['pricing_service', 'pricing_month', *PRICING_DEFAULTS]
+
+# Reatribuir as chaves impede que o Streamlit descarte os valores quando a página não é exibida
+for key in PRICING_KEYS:
+    if key in st.session_state:
+        st.session_state[key] = st.session_state[key]
 
 # ============================================================================
-# PÁGINA 1: ANÁLISE SAZONAL
+# FRAGMENTOS DA PRECIFICAÇÃO (reexecutam sozinhos quando seus widgets mudam)
 # ============================================================================
-if page == "📊 Análise Sazonal":
-    st.header("📊 Análise Sazonal de Demanda")
-    st.markdown("Visualize a demanda média mensal e o desvio padrão dos serviços")
+@st.fragment
+def render_sensitivity_map(demand, original_price, service_cost, desired_profit_increase,
+                           promotional_price, commission_percentage, service_name_plural):
+    """Mapa de sensibilidade: os controles do mapa reexecutam apenas este trecho"""
     st.markdown("---")
-    
-    # Separa dados por serviço
-    drainage_data = seasonal_data[seasonal_data['Servico'] == 'Drenagem Linfática corporal (50 min)'].sort_values('Mes')
-    massage_data = seasonal_data[seasonal_data['Servico'] == 'Massagem Relaxante (50 min)'].sort_values('Mes')
-    
-    # Cria abas
-    tab1, tab2 = st.tabs(["🌿 Drenagem Linfática", "🧘 Massagem Relaxante"])
-    
-    # ========== TAB 1: DRENAGEM LINFÁTICA ==========
-    with tab1:
-        col1, col2 = st.columns(2)
-        
-        with col1:
-            st.subheader("📈 Demanda Mensal")
-            
-            # Gráfico de linha para demanda
-            fig_demand = go.Figure()
-            fig_demand.add_trace(go.Scatter(
-                x=[months[m] for m in drainage_data['Mes']],
-                y=drainage_data['Media'],
-                mode='lines+markers',
-                name='Demanda Média',
-                line=dict(color=VERDE_SALVIA, width=3),
-                marker=dict(size=8, color=VERDE_MUSGO)
-            ))
-            
-            fig_demand.update_layout(
-                title="Demanda Média de Drenagens por Mês",
-                xaxis_title="Mês",
-                yaxis_title="Quantidade de Atendimentos",
-                hovermode='x unified',
-                template='plotly_dark',
-                height=400,
-                plot_bgcolor='rgba(0,0,0,0)',
-                paper_bgcolor='rgba(0,0,0,0)',
-                font=dict(color=BRANCO_PURO)
+    st.subheader("🔥 Mapa de Sensibilidade: Preço Promocional × Comissão")
+    show_sensitivity = st.toggle("Mostrar mapa de sensibilidade", value=False)
+    
+    if show_sensitivity:
+        col_price, col_commission, col_size = st.columns([2, 2, 1])
+        with col_price:
+            price_range = st.slider(
+                "Faixa de Preço Promocional (R$)",
+                min_value=0.0,
+                max_value=max(original_price * 1.5, 1.0),
+                value=(min(service_cost, original_price), max(original_price, 1.0)),
+                step=0.5
             )
-            
-            st.plotly_chart(fig_demand, use_container_width=True)
-        
-        with col2:
-            st.subheader("📊 Desvio Padrão")
-            
-            # Gráfico de barras para desvio padrão
-            fig_std = go.Figure()
-            fig_std.add_trace(go.Bar(
-                x=[months[m] for m in drainage_data['Mes']],
-                y=drainage_data['Desvio_padrao'],
-                name='Desvio Padrão',
-                marker=dict(color=VERDE_SALVIA)
-            ))
-            
-            fig_std.update_layout(
-                title="Variação da Demanda (Desvio Padrão)",
-                xaxis_title="Mês",
-                yaxis_title="Desvio Padrão",
-                hovermode='x unified',
-                template='plotly_dark',
-                height=400,
-                plot_bgcolor='rgba(0,0,0,0)',
-                paper_bgcolor='rgba(0,0,0,0)',
-                font=dict(color=BRANCO_PURO)
+        with col_commission:
+            commission_range = st.slider(
+                "Faixa de Comissão (%)",
+                min_value=0.0,
+                max_value=130.0,
+                value=(0.0, 60.0),
+                step=0.5
             )
-            
-            st.plotly_chart(fig_std, use_container_width=True)
+        with col_size:
+            grid_size = st.selectbox("Resolução", [100, 250, 500], index=2)
         
-        # Tabela com dados
-        st.subheader("Dados Detalhados")
-        display_data = drainage_data.copy()
-        display_data['Mes'] = display_data['Mes'].map(months)
-        display_data = display_data[['Mes', 'Media', 'Desvio_padrao']].rename(
-            columns={'Mes': 'Mês', 'Media': 'Demanda Média', 'Desvio_padrao': 'Desvio Padrão'}
+        prices, commissions, required_grid, profit_grid = compute_sensitivity_grid(
+            demand, original_price, service_cost, desired_profit_increase,
+            price_range, commission_range, grid_size
         )
-        st.dataframe(display_data, use_container_width=True, hide_index=True)
-    
-    # ========== TAB 2: MASSAGEM RELAXANTE ==========
-    with tab2:
-        col1, col2 = st.columns(2)
         
-        with col1:
-            st.subheader("📈 Demanda Mensal")
-            
-            # Gráfico de linha para demanda
-            fig_demand = go.Figure()
-            fig_demand.add_trace(go.Scatter(
-                x=[months[m] for m in massage_data['Mes']],
-                y=massage_data['Media'],
-                mode='lines+markers',
-                name='Demanda Média',
-                line=dict(color=VERDE_MUSGO, width=3),
-                marker=dict(size=8, color=VERDE_SALVIA)
-            ))
-            
-            fig_demand.update_layout(
-                title="Demanda Média de Massagens por Mês",
-                xaxis_title="Mês",
-                yaxis_title="Quantidade de Atendimentos",
-                hovermode='x unified',
-                template='plotly_dark',
-                height=400,
-                plot_bgcolor='rgba(0,0,0,0)',
-                paper_bgcolor='rgba(0,0,0,0)',
-                font=dict(color=BRANCO_PURO)
+        with span('figures'):
+            required_heatmap = create_sensitivity_heatmap(
+                prices, commissions, required_grid, promotional_price, commission_percentage,
+                f"Quantidade Necessária ({service_name_plural})", "Qtd.", 'Viridis'
+            )
+            profit_heatmap = create_sensitivity_heatmap(
+                prices, commissions, profit_grid, promotional_price, commission_percentage,
+                "Lucro Esperado com a Demanda Média (R$)", "R$", 'RdYlGn'
             )
-            
-            st.plotly_chart(fig_demand, use_container_width=True)
         
-        with col2:
-            st.subheader("📊 Desvio Padrão")
-            
-            # Gráfico de barras para desvio padrão - CORRIGIDO PARA VERDE
-            fig_std = go.Figure()
-            fig_std.add_trace(go.Bar(
-                x=[months[m] for m in massage_data['Mes']],
-                y=massage_data['Desvio_padrao'],
-                name='Desvio Padrão',
-                marker=dict(color=VERDE_SALVIA)  # Mudado para VERDE_SALVIA
-            ))
-            
-            fig_std.update_layout(
-                title="Variação da Demanda (Desvio Padrão)",
-                xaxis_title="Mês",
-                yaxis_title="Desvio Padrão",
-                hovermode='x unified',
-                template='plotly_dark',
-                height=400,
-                plot_bgcolor='rgba(0,0,0,0)',
-                paper_bgcolor='rgba(0,0,0,0)',
-                font=dict(color=BRANCO_PURO)
+        col_heat_a, col_heat_b = st.columns(2)
+        with col_heat_a:
+            st.plotly_chart(required_heatmap, use_container_width=True)
+        with col_heat_b:
+            st.plotly_chart(profit_heatmap, use_container_width=True)
+        
+        st.caption("Regiões em branco não têm margem positiva por atendimento (preço promocional não cobre "
+                   "comissão + custo). O ✕ marca o cenário configurado no formulário.")
+
+def render_annual_plan(service_plan, service_name_plural, current_month_num):
+    """Tabela dos 12 meses do serviço e mini tendência, lidas do plano anual já calculado"""
+    st.markdown("---")
+    st.subheader("📅 Plano Anual da Promoção")
+    if not st.toggle("Mostrar plano anual", value=False, key='pricing_show_plan'):
+        return
+    
+    col_table, col_trend = st.columns([3, 2])
+    with col_table:
+        st.dataframe(pd.DataFrame({
+            'Mês': [months[m] for m in service_plan.index],
+            'Demanda Média': service_plan['Media'].to_numpy(),
+            'Desvio Padrão': service_plan['Desvio_padrao'].to_numpy(),
+            'Lucro sem Promoção (R$)': service_plan['spa_revenue_without_promo'].round(2).to_numpy(),
+            'Meta de Lucro (R$)': service_plan['desired_spa_revenue'].round(2).to_numpy(),
+            'Qtd. Necessária': service_plan['required_quantity'].where(service_plan['feasible']).to_numpy(),
+        }), use_container_width=True, hide_index=True)
+    with col_trend:
+        with span('figures'):
+            trend = create_plan_trend_chart(service_plan, service_name_plural, current_month_num)
+        st.plotly_chart(trend, use_container_width=True)
+
+@st.fragment
+def render_price_optimizer(service, demand, original_price, service_cost, commission_percentage,
+                           promotional_price, is_custom_service):
+    """Preço ótimo sob um modelo de elasticidade (forma fechada, recalculado a cada mudança)"""
+    st.markdown("---")
+    st.subheader("🎯 Preço Ótimo com Elasticidade da Demanda")
+    show_optimizer = st.toggle("Mostrar preço ótimo", value=False)
+    
+    if show_optimizer:
+        col_model, col_elasticity = st.columns(2)
+        with col_model:
+            demand_model = st.selectbox("Modelo de Demanda", list(DEMAND_MODELS), format_func=DEMAND_MODELS.get)
+        with col_elasticity:
+            elasticity = st.number_input(
+                "Elasticidade-Preço (módulo)",
+                min_value=0.0,
+                max_value=10.0,
+                value=1.5,
+                step=0.1,
+                format="%.1f",
+                help="Queda percentual da demanda para cada 1% de aumento no preço, medida no preço original"
             )
-            
-            st.plotly_chart(fig_std, use_container_width=True)
         
-        # Tabela com dados
-        st.subheader("Dados Detalhados")
-        display_data = massage_data.copy()
-        display_data['Mes'] = display_data['Mes'].map(months)
-        display_data = display_data[['Mes', 'Media', 'Desvio_padrao']].rename(
-            columns={'Mes': 'Mês', 'Media': 'Demanda Média', 'Desvio_padrao': 'Desvio Padrão'}
-        )
-        st.dataframe(display_data, use_container_width=True, hide_index=True)
+        with span('pricing'):
+            optimum = optimal_promotional_price(demand, original_price, service_cost, commission_percentage,
+                                                elasticity, demand_model).scalar()
+        
+        if not optimum.feasible:
+            st.error("❌ Nenhum preço até o preço original cobre a comissão e o custo do serviço.")
+            return
+        
+        col_price, col_demand, col_profit = st.columns(3)
+        with col_price:
+            st.metric("Preço Ótimo", f"R$ {optimum.price:,.2f}",
+                      delta=f"{(optimum.price / original_price - 1) * 100:.1f}%" if original_price > 0 else None)
+        with col_demand:
+            st.metric("Demanda Esperada", f"{optimum.demand:,.1f}")
+        with col_profit:
+            st.metric("Lucro Esperado", f"R$ {optimum.profit:,.2f}",
+                      delta=f"R$ {optimum.profit - optimum.baseline_profit:,.2f} vs preço original")
+        
+        with span('figures'):
+            profit_curve = create_profit_curve_chart(optimum, promotional_price)
+        st.plotly_chart(profit_curve, use_container_width=True)
+        
+        # Todos os meses do serviço em uma única chamada vetorizada
+        if not is_custom_service:
+            service_data = seasonal_data.by_service[service]
+            with span('pricing'):
+                year = optimal_promotional_price(service_data['Media'].to_numpy('float64'), original_price,
+                                                 service_cost, commission_percentage, elasticity, demand_model, size=2)
+            st.dataframe(pd.DataFrame({
+                'Mês': service_data['Mes'].map(months).to_numpy(),
+                'Demanda Média': service_data['Media'].to_numpy('float64').round(2),
+                'Preço Ótimo (R$)': year.price.round(2),
+                'Demanda Esperada': year.demand.round(1),
+                'Lucro Esperado (R$)': year.profit.round(2),
+            }), use_container_width=True, hide_index=True)
 
-# ============================================================================
-# PÁGINA 2: PRECIFICAÇÃO INTELIGENTE
-# ============================================================================
-elif page == "💰 Precificação Inteligente":
-    st.header("💰 Precificação Inteligente")
-    st.markdown("Calcule preços promocionais para atingir suas metas de lucro")
+@st.fragment
+def render_promotion_portfolio(use_forecast, original_price, service_cost, commission_percentage,
+                               desired_profit_increase):
+    """Quais serviços × meses promover (e a que preço) para o maior lucro dentro das horas de terapeuta"""
     st.markdown("---")
+    st.subheader("🗓️ Portfólio de Promoções com Capacidade")
+    if not st.toggle("Mostrar portfólio de promoções", value=False, key='portfolio_show'):
+        return
+
+    col_therapists, col_hours, col_model, col_elasticity = st.columns(4)
+    with col_therapists:
+        therapists = st.number_input("Terapeutas", min_value=1, value=4, step=1, key='portfolio_therapists')
+    with col_hours:
+        hours_per_therapist = st.number_input(
+            "Horas por Terapeuta no Mês",
+            min_value=1.0,
+            value=160.0,
+            step=1.0,
+            format="%.0f",
+            key='portfolio_hours'
+        )
+    with col_model:
+        demand_model = st.selectbox("Modelo de Demanda", list(DEMAND_MODELS), format_func=DEMAND_MODELS.get,
+                                    key='portfolio_model')
+    with col_elasticity:
+        elasticity = st.number_input(
+            "Elasticidade-Preço (módulo)",
+            min_value=0.0,
+            max_value=10.0,
+            value=1.5,
+            step=0.1,
+            format="%.1f",
+            help="Queda percentual da demanda para cada 1% de aumento no preço, medida no preço original",
+            key='portfolio_elasticity'
+        )
+
+    capacity_hours = therapists * hours_per_therapist
+    portfolio = load_promotion_portfolio(branch, use_forecast, original_price, service_cost,
+                                         commission_percentage, desired_profit_increase, elasticity,
+                                         demand_model, capacity_hours)
+    promotions = portfolio.promotions.reset_index()
+    month_usage = portfolio.months
+    occupancy = month_usage['used_hours'] / month_usage['capacity_hours']
+
+    col_gain, col_count, col_peak = st.columns(3)
+    with col_gain:
+        st.metric("Lucro Adicional Esperado", f"R$ {portfolio.total_gain:,.2f}")
+    with col_count:
+        st.metric("Promoções no Ano", len(promotions))
+    with col_peak:
+        st.metric("Maior Ocupação", f"{occupancy.max():.0%}", delta=months[int(occupancy.idxmax())],
+                  delta_color='off')
+
+    overloaded = month_usage.index[month_usage['baseline_hours'] > month_usage['capacity_hours']]
+    if len(overloaded):
+        st.warning("⚠️ A demanda de base já passa da capacidade em: " +
+                   ", ".join(months[m] for m in overloaded) + ". Esses meses ficam sem promoções.")
+
+    if promotions.empty:
+        st.info("Nenhuma promoção aumenta o lucro esperado dentro da capacidade com estes parâmetros.")
+    else:
+        st.dataframe(pd.DataFrame({
+            'Serviço': promotions['Servico'].astype(str).to_numpy(),
+            'Mês': promotions['Mes'].map(months).to_numpy(),
+            'Preço (R$)': promotions['price'].round(2).to_numpy(),
+            'Demanda Média': promotions['Media'].round(1).to_numpy(),
+            'Demanda Esperada': promotions['expected_demand'].round(1).to_numpy(),
+            'Horas': promotions['hours'].round(1).to_numpy(),
+            'Lucro Adicional (R$)': promotions['gain'].round(2).to_numpy(),
+            'Qtd. p/ Meta': promotions['required_quantity'].to_numpy(),
+            'Atinge a Meta': np.where(promotions['meets_goal'], "✅", "—"),
+        }), use_container_width=True, hide_index=True)
+
+    st.dataframe(pd.DataFrame({
+        'Mês': month_usage.index.map(months),
+        'Capacidade (h)': month_usage['capacity_hours'].round(1).to_numpy(),
+        'Demanda de Base (h)': month_usage['baseline_hours'].round(1).to_numpy(),
+        'Promoções (h)': month_usage['promo_hours'].round(1).to_numpy(),
+        'Ocupação': occupancy.map('{:.0%}'.format).to_numpy(),
+        'Promoções': month_usage['promotions'].to_numpy(),
+        'Lucro Adicional (R$)': month_usage['gain'].round(2).to_numpy(),
+    }), use_container_width=True, hide_index=True)
+
+    st.caption(f"Capacidade de {capacity_hours:,.0f} horas de terapeuta por mês. Cada serviço × mês fica no preço "
+               "original ou entra em promoção a um preço candidato; a demanda esperada segue o modelo de "
+               "elasticidade, e as horas somam a duração de cada atendimento. A escolha é exata por mês "
+               "(programação dinâmica sobre as horas livres).")
+
+# Intervalo, em segundos, entre as atualizações do progresso de um relatório na fila
+REPORT_POLL_SECONDS = 0.5
+
+@st.fragment(run_every=REPORT_POLL_SECONDS)
+def render_report_progress(job):
+    """Progresso do relatório na fila; ao terminar, reexecuta a página para exibir o download"""
+    if job.done():
+        st.rerun()
+    if job.status == QUEUED:
+        st.progress(0.0, text=f"⏳ Relatório na fila (posição {job.position})")
+    else:
+        st.progress(job.progress(), text="📄 Gerando o relatório em PDF...")
+
+def render_report_download(report_args, file_name):
+    """Gera o relatório sob demanda na fila de segundo plano e oferece o download quando fica pronto"""
+    job = st.session_state.get('report_job')
+    if job is None or job.args != report_args:
+        button_slot = st.empty()
+        if not button_slot.button("📄 Gerar Relatório em PDF", use_container_width=True):
+            return
+        button_slot.empty()
+        try:
+            # A mesma combinação de parâmetros reaproveita o trabalho em andamento, pronto ou em disco
+            job = st.session_state['report_job'] = report_queue().submit(report_args)
+        except QueueFull:
+            st.warning("⏳ Muitos relatórios sendo gerados agora: tente novamente em instantes")
+            return
+    
+    if not job.done():
+        render_report_progress(job)
+        return
+    
+    # Espera na fila e renderização contam uma vez por trabalho no diagnóstico da sessão
+    if st.session_state.get('report_job_recorded') != job.id:
+        st.session_state['report_job_recorded'] = job.id
+        if job.started_at is not None:
+            record('pdf_queue', job.started_at - job.submitted_at)
+            record('pdf_render', job.finished_at - job.started_at,
+                   type(job.error).__name__ if job.error is not None else None)
+    
+    if job.error is not None:
+        del st.session_state['report_job']
+        st.error(f"❌ Não foi possível gerar o relatório: {job.error}")
+    else:
+        st.download_button(
+            label="📥 Baixar Relatório em PDF",
+            data=job.result(),
+            file_name=file_name,
+            mime="application/pdf",
+            on_click="ignore",
+            use_container_width=True
+        )
+
+@st.fragment
+def render_pricing_page():
+    """Formulário e resultados da precificação
+    
+    Mudanças nos campos reexecutam só este fragmento (sem recarregar logo, CSS e dados). O último
+    cenário calculado fica em st.session_state, chaveado pelos parâmetros: enquanto eles não mudam,
+    os resultados e o gráfico são reexibidos sem recálculo, inclusive ao voltar de outra página.
+    Trocar de serviço ou mês é uma consulta ao plano anual, pré-calculado para os mesmos parâmetros.
+    """
+    for key, default in PRICING_DEFAULTS.items():
+        st.session_state.setdefault(key, default)
+    
+    # Com histórico de atendimentos, a demanda vem da previsão (mesmo esquema das médias mensais)
+    forecast = load_demand_forecast(branch)
+    use_forecast = forecast is not None and st.session_state['pricing_use_forecast']
+    pricing_data = forecast.index if use_forecast else seasonal_data
+    
+    service_options = pricing_data.services + ["Outros"]
+    if st.session_state.get('pricing_service') not in service_options:
+        st.session_state['pricing_service'] = service_options[0]
+    st.session_state.setdefault('pricing_month', months[datetime.now().month])
     
     col1, col2 = st.columns([1, 2])
     
@@ -629,10 +616,19 @@ elif page == "💰 Precificação Inteligente":
     with col1:
         st.subheader("⚙️ Configuração")
         
+        if forecast is not None:
+            st.toggle(
+                "📈 Usar previsão de demanda",
+                key='pricing_use_forecast',
+                help="Prevê o mês pelo histórico de atendimentos (Holt-Winters: tendência e sazonalidade) "
+                     "em vez da média mensal fixa"
+            )
+        
         # Seleção de serviço
         service = st.selectbox(
             "Selecione o Serviço",
-            ["Drenagem Linfática corporal (50 min)", "Massagem Relaxante (50 min)", "Outros"]
+            service_options,
+            key='pricing_service'
         )
         
         # Define o nome do serviço em singular para exibição
@@ -646,10 +642,10 @@ elif page == "💰 Precificação Inteligente":
             demand = st.number_input(
                 "Demanda Esperada",
                 min_value=1.0,
-                value=20.0,
                 step=1.0,
                 format="%.1f",
-                help="Quantidade de atendimentos esperados para este serviço"
+                help="Quantidade de atendimentos esperados para este serviço",
+                key='pricing_custom_demand'
             )
             std_dev = 0.0  # Sem desvio padrão para serviços customizados
             current_month = None
@@ -661,26 +657,34 @@ elif page == "💰 Precificação Inteligente":
             </div>
             """, unsafe_allow_html=True)
         else:
-            service_name = "drenagem" if "Drenagem" in service else "massagem"
-            service_name_plural = "drenagens" if "Drenagem" in service else "massagens"
+            service_name, service_name_plural = service_nouns(service)
             
             # Seleção de mês
             current_month = st.selectbox(
                 "Mês Atual",
                 list(months.values()),
-                index=datetime.now().month - 1
+                key='pricing_month'
             )
             current_month_num = list(months.values()).index(current_month) + 1
             
             # Busca dados do mês selecionado
-            month_data = seasonal_data[
-                (seasonal_data['Servico'] == service) & 
-                (seasonal_data['Mes'] == current_month_num)
-            ]
+            month_data = pricing_data.get(service, current_month_num)
             
-            if not month_data.empty:
-                demand = month_data['Media'].values[0]
-                std_dev = month_data['Desvio_padrao'].values[0]
+            if month_data is not None and use_forecast:
+                demand, std_dev = month_data
+                forecast_year = forecast.period(current_month_num)[0]
+                lower, upper = forecast.interval(service, current_month_num)
+                
+                st.markdown(f"""
+                <div class="metric-card">
+                    <h4>📈 Previsão para {current_month}/{forecast_year}</h4>
+                    <p><strong>Demanda Prevista:</strong> {demand:.1f} {service_name_plural}</p>
+                    <p><strong>Intervalo de {INTERVAL_LEVEL:.0%}:</strong> {lower:.1f} a {upper:.1f}</p>
+                    <p><strong>Desvio Padrão da Previsão:</strong> ±{std_dev:.2f}</p>
+                </div>
+                """, unsafe_allow_html=True)
+            elif month_data is not None:
+                demand, std_dev = month_data
                 
                 st.markdown(f"""
                 <div class="metric-card">
@@ -699,43 +703,51 @@ elif page == "💰 Precificação Inteligente":
         original_price = st.number_input(
             "Preço Original (R$)",
             min_value=0.0,
-            value=100.0,
             step=0.01,
-            format="%.2f"
+            format="%.2f",
+            key='pricing_original_price'
         )
         
         service_cost = st.number_input(
             "Custo por Serviço (R$)",
             min_value=0.0,
-            value=20.0,
             step=0.01,
             format="%.2f",
-            help="Custo do spa para realizar o serviço (materiais, energia, etc)"
+            help="Custo do spa para realizar o serviço (materiais, energia, etc)",
+            key='pricing_service_cost'
         )
         
         commission_percentage = st.number_input(
             "Comissão Massagista (%)",
             min_value=0.0,
             max_value=130.0,
-            value=30.0,
             step=0.5,
-            format="%.1f"
+            format="%.1f",
+            key='pricing_commission'
         )
         
         desired_profit_increase = st.number_input(
             "Lucro Adicional Desejado (%)",
             min_value=0.0,
-            value=5.0,
             step=0.5,
-            format="%.1f"
+            format="%.1f",
+            key='pricing_profit_increase'
         )
         
         promotional_price = st.number_input(
             "Preço Promocional (R$)",
             min_value=0.0,
-            value=100.0,
             step=0.01,
-            format="%.2f"
+            format="%.2f",
+            key='pricing_promotional_price'
+        )
+        
+        demand_distribution = st.selectbox(
+            "Distribuição da Demanda (simulação)",
+            list(DISTRIBUTIONS),
+            format_func=DISTRIBUTIONS.get,
+            help="Distribuição usada para sortear a demanda do mês a partir da média e do desvio padrão",
+            key='pricing_distribution'
         )
         
         st.markdown("---")
@@ -743,111 +755,193 @@ elif page == "💰 Precificação Inteligente":
         # Botão de cálculo
         calculate_button = st.button("🧮 Calcular", use_container_width=True, type="primary")
     
+    # Parâmetros do cálculo: serviço e mês ficam de fora porque viram consulta ao plano anual
+    pricing_params = (original_price, service_cost, commission_percentage, desired_profit_increase,
+                      promotional_price, demand_distribution, demand if is_custom_service else None)
+    plan = None if is_custom_service else load_annual_plan(branch, use_forecast, original_price,
+                                                           promotional_price, service_cost,
+                                                           commission_percentage, desired_profit_increase)
+    
+    if calculate_button and demand > 0:
+        st.session_state['pricing_scenario'] = {'params': pricing_params, 'views': {}}
+    
+    scenario = st.session_state.get('pricing_scenario')
+    view = None
+    if scenario is not None and scenario['params'] == pricing_params and demand > 0:
+        # Resultado, simulação e gráfico de cada serviço × mês ficam memoizados no cenário
+        view_key = (service, current_month, demand, std_dev)
+        view = scenario['views'].get(view_key)
+        if view is None:
+            if plan is not None:
+                result = plan_result(plan, service, current_month_num)
+            else:
+                with span('pricing'):
+                    result = calculate_promotion(demand, original_price, promotional_price, service_cost,
+                                                 commission_percentage, desired_profit_increase).scalar()
+            view = {'result': result}
+            if result.feasible:
+                view['simulation'] = run_demand_simulation(demand, std_dev, result.required_quantity,
+                                                           result.profit_per_promo_service, demand_distribution)
+                with span('figures'):
+                    view['chart'] = create_comparison_chart(result)
+            scenario['views'][view_key] = view
+    
     # ========== COLUNA 2: RESULTADOS ==========
     with col2:
-        if calculate_button and demand > 0:
-            # Cálculos
-            commission_decimal = commission_percentage / 100
-            profit_increase_decimal = desired_profit_increase / 100
-            
-            # ===== CENÁRIO SEM PROMOÇÃO =====
-            revenue_without_promo = original_price * demand
-            total_costs_without_promo = (commission_percentage / 100 * revenue_without_promo) + (service_cost * demand)
-            spa_revenue_without_promo = revenue_without_promo - total_costs_without_promo
-            
-            commission_without_promo = (commission_percentage / 100) * revenue_without_promo
-            total_service_cost_without_promo = service_cost * demand
-            
-            # ===== META DE LUCRO =====
-            desired_spa_revenue = spa_revenue_without_promo * (1 + profit_increase_decimal)
-            
-            # ===== CENÁRIO COM PROMOÇÃO =====
-            profit_per_promo_service = promotional_price - (promotional_price * commission_decimal) - service_cost
-            required_quantity = int(desired_spa_revenue / profit_per_promo_service) + 1
-            
-            # Comissão final
-            total_promo_revenue = promotional_price * required_quantity
-            final_commission = total_promo_revenue * commission_decimal
-            total_service_cost_with_promo = service_cost * required_quantity
-            spa_revenue_with_promo = total_promo_revenue - final_commission - total_service_cost_with_promo
-            
-            # Exibe resultados
-            st.subheader("📈 Análise Sem Promoção")
-            st.markdown(f"""
-            <div class="success-card">
-                <h4>Cenário Atual (Preço Normal)</h4>
-                <p><strong>Demanda Esperada:</strong> {demand:.1f if is_custom_service else int(demand)} {service_name_plural}</p>
-                <p><strong>Receita Total:</strong> R$ {revenue_without_promo:,.2f}</p>
-                <p><strong>Comissão Massagista:</strong> R$ {commission_without_promo:,.2f}</p>
-                <p><strong>Custo por Serviço:</strong> R$ {total_service_cost_without_promo:,.2f}</p>
-                <p style="font-weight: bold; font-size: 16px; color: {CREME_SUAVE};"><strong>Lucro Real sem Estratégia:</strong> R$ {spa_revenue_without_promo:,.2f}</p>
-            </div>
-            """, unsafe_allow_html=True)
-            
-            st.subheader("🎯 Meta de Lucro com Promoção")
-            
-            # Texto dinâmico baseado no serviço
-            if is_custom_service:
-                meta_text = f"Você precisa vender {required_quantity} do serviço"
+        if view is not None:
+            result = view['result']
+            (revenue_without_promo, commission_without_promo, total_service_cost_without_promo,
+             spa_revenue_without_promo, desired_spa_revenue, profit_per_promo_service, required_quantity,
+             total_promo_revenue, final_commission, total_service_cost_with_promo,
+             spa_revenue_with_promo, feasible) = result
+            
+            if not feasible:
+                st.error(f"❌ O preço promocional de R$ {promotional_price:.2f} não cobre a comissão e o custo do serviço "
+                         f"(lucro por atendimento de R$ {profit_per_promo_service:,.2f}). Aumente o preço ou reduza os custos.")
             else:
-                meta_text = f"Você precisa vender {required_quantity} {service_name_plural}"
-            
-            st.markdown(f"""
-            <div class="warning-card">
-                <h4>Cenário Promocional</h4>
-                <p><strong>Lucro Necessário:</strong> R$ {desired_spa_revenue:,.2f}</p>
-                <p style="font-size: 24px; font-weight: bold; color: {VERDE_MUSGO}; margin: 15px 0;">
-                    {meta_text}
-                </p>
-                <p style="font-size: 14px; color: {VERDE_OLIVA_ESCURO};">ao preço promocional de R$ {promotional_price:.2f}</p>
-            </div>
-            """, unsafe_allow_html=True)
-            
-            col_a, col_b, col_c = st.columns(3)
-            with col_a:
-                st.metric("Receita Total", f"R$ {total_promo_revenue:,.2f}")
-            with col_b:
-                st.metric("Comissão", f"R$ {final_commission:,.2f}")
-            with col_c:
-                st.metric("Custo Serviço", f"R$ {total_service_cost_with_promo:,.2f}")
-            
-            st.metric("💰 Lucro Real da Estratégia", f"R$ {spa_revenue_with_promo:,.2f}", delta=f"{((spa_revenue_with_promo / spa_revenue_without_promo - 1) * 100):.1f}%" if spa_revenue_without_promo > 0 else "0%")
-            
-            # Gera gráfico comparativo
-            comparison_chart = create_comparison_chart(demand, original_price, promotional_price, 
-                                                      commission_percentage, service_cost, required_quantity)
-            st.plotly_chart(comparison_chart, use_container_width=True)
+                # Exibe resultados
+                demand_display = f"{demand:.1f}" if is_custom_service else int(demand)
+                st.subheader("📈 Análise Sem Promoção")
+                st.markdown(f"""
+                <div class="success-card">
+                    <h4>Cenário Atual (Preço Normal)</h4>
+                    <p><strong>Demanda Esperada:</strong> {demand_display} {service_name_plural}</p>
+                    <p><strong>Receita Total:</strong> R$ {revenue_without_promo:,.2f}</p>
+                    <p><strong>Comissão Massagista:</strong> R$ {commission_without_promo:,.2f}</p>
+                    <p><strong>Custo por Serviço:</strong> R$ {total_service_cost_without_promo:,.2f}</p>
+                    <p style="font-weight: bold; font-size: 16px; color: {CREME_SUAVE};"><strong>Lucro Real sem Estratégia:</strong> R$ {spa_revenue_without_promo:,.2f}</p>
+                </div>
+                """, unsafe_allow_html=True)
             
-            # Botão para baixar PDF
-            st.markdown("---")
+                st.subheader("🎯 Meta de Lucro com Promoção")
             
-            # Cria gráfico para PDF com cores e texto preto
-            comparison_chart_pdf = create_comparison_chart_for_pdf(demand, original_price, promotional_price, 
-                                                                   commission_percentage, service_cost, required_quantity)
+                # Texto dinâmico baseado no serviço
+                if is_custom_service:
+                    meta_text = f"Você precisa vender {required_quantity} do serviço"
+                else:
+                    meta_text = f"Você precisa vender {required_quantity} {service_name_plural}"
             
-            pdf_buffer = generate_pdf_report(
-                service, current_month if not is_custom_service else None, demand, std_dev, original_price, service_cost,
-                commission_percentage, desired_profit_increase, promotional_price,
-                revenue_without_promo, commission_without_promo, total_service_cost_without_promo,
-                spa_revenue_without_promo, desired_spa_revenue, required_quantity,
-                total_promo_revenue, final_commission, total_service_cost_with_promo,
-                spa_revenue_with_promo, comparison_chart_pdf, is_custom=is_custom_service
-            )
+                st.markdown(f"""
+                <div class="warning-card">
+                    <h4>Cenário Promocional</h4>
+                    <p><strong>Lucro Necessário:</strong> R$ {desired_spa_revenue:,.2f}</p>
+                    <p style="font-size: 24px; font-weight: bold; color: {VERDE_MUSGO}; margin: 15px 0;">
+                        {meta_text}
+                    </p>
+                    <p style="font-size: 14px; color: {VERDE_OLIVA_ESCURO};">ao preço promocional de R$ {promotional_price:.2f}</p>
+                </div>
+                """, unsafe_allow_html=True)
             
-            st.download_button(
-                label="📥 Baixar Relatório em PDF",
-                data=pdf_buffer,
-                file_name=f"Relatorio_Promocao_{current_month if current_month else 'Outros'}_{datetime.now().strftime('%d_%m_%Y')}.pdf",
-                mime="application/pdf",
-                use_container_width=True
-            )
+                col_a, col_b, col_c = st.columns(3)
+                with col_a:
+                    st.metric("Receita Total", f"R$ {total_promo_revenue:,.2f}")
+                with col_b:
+                    st.metric("Comissão", f"R$ {final_commission:,.2f}")
+                with col_c:
+                    st.metric("Custo Serviço", f"R$ {total_service_cost_with_promo:,.2f}")
+            
+                st.metric("💰 Lucro Real da Estratégia", f"R$ {spa_revenue_with_promo:,.2f}", delta=f"{((spa_revenue_with_promo / spa_revenue_without_promo - 1) * 100):.1f}%" if spa_revenue_without_promo > 0 else "0%")
+            
+                # Simulação de Monte Carlo da demanda do mês
+                simulation = view['simulation']
+                st.subheader("🎲 Simulação de Demanda")
+                col_prob, col_profit = st.columns(2)
+                with col_prob:
+                    st.metric("Chance de Atingir a Meta", f"{simulation.probability:.1%}")
+                with col_profit:
+                    st.metric("Lucro Esperado na Promoção", f"R$ {simulation.expected_profit:,.2f}")
+                st.caption(
+                    "Percentis do lucro: " +
+                    " | ".join(f"P{p}: R$ {value:,.2f}" for p, value in simulation.profit_percentiles.items()) +
+                    f" ({simulation.draws:,} sorteios)"
+                )
+                
+                # Gráfico comparativo memoizado junto com o cenário
+                st.plotly_chart(view['chart'], use_container_width=True)
+            
+                # Botão para baixar PDF
+                st.markdown("---")
+            
+                # O PDF é renderizado em segundo plano, sem bloquear a sessão enquanto fica pronto
+                render_report_download(
+                    (service, current_month if not is_custom_service else None, demand, std_dev, original_price,
+                     service_cost, commission_percentage, desired_profit_increase, promotional_price,
+                     is_custom_service),
+                    f"Relatorio_Promocao_{current_month if current_month else 'Outros'}_{datetime.now().strftime('%d_%m_%Y')}.pdf"
+                )
         
         elif not is_custom_service and demand == 0:
             st.error("❌ Dados não encontrados para este mês e serviço")
-        elif is_custom_service and demand > 0:
-            st.info("👈 Preencha os dados e clique em 'Calcular' para ver os resultados")
-        elif not is_custom_service:
+        elif scenario is not None:
+            st.info("👈 Os parâmetros mudaram desde o último cálculo: clique em 'Calcular' para atualizar os resultados")
+        else:
             st.info("👈 Preencha os dados e clique em 'Calcular' para ver os resultados")
+    
+    # ========== PLANO ANUAL ==========
+    if plan is not None:
+        render_annual_plan(plan.loc[service], service_name_plural, current_month_num)
+    
+    # ========== PREÇO ÓTIMO E MAPA DE SENSIBILIDADE ==========
+    if demand > 0:
+        render_price_optimizer(service, demand, original_price, service_cost, commission_percentage,
+                               promotional_price, is_custom_service)
+        render_sensitivity_map(demand, original_price, service_cost, desired_profit_increase,
+                               promotional_price, commission_percentage, service_name_plural)
+
+    # ========== PORTFÓLIO DE PROMOÇÕES (TODOS OS SERVIÇOS × MESES) ==========
+    render_promotion_portfolio(use_forecast, original_price, service_cost, commission_percentage,
+                               desired_profit_increase)
+
+# ============================================================================
+# PÁGINA 1: ANÁLISE SAZONAL
+# ============================================================================
+if page == "📊 Análise Sazonal":
+    st.header("📊 Análise Sazonal de Demanda")
+    st.markdown("Visualize a demanda média mensal e o desvio padrão dos serviços")
+    st.markdown("---")
+    
+    # Serviços vêm dos próprios dados (particionados em um único groupby no cache)
+    services = seasonal_data.services
+    positions = {name: position for position, name in enumerate(services)}
+    selected_service = st.selectbox(
+        "Selecione o Serviço",
+        services,
+        format_func=lambda name: f"{SERVICE_ICONS[positions[name] % len(SERVICE_ICONS)]} {name}"
+    )
+    
+    # Apenas os gráficos do serviço visível são construídos
+    service_data = seasonal_data.by_service[selected_service]
+    line_color, marker_color = SERIES_COLORS[positions[selected_service] % len(SERIES_COLORS)]
+    fig_demand, fig_std = load_seasonal_figures(branch, selected_service, line_color, marker_color)
+    
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        st.subheader("📈 Demanda Mensal")
+        st.plotly_chart(fig_demand, use_container_width=True)
+    
+    with col2:
+        st.subheader("📊 Desvio Padrão")
+        st.plotly_chart(fig_std, use_container_width=True)
+    
+    # Tabela com dados
+    st.subheader("Dados Detalhados")
+    display_data = service_data.copy()
+    display_data['Mes'] = display_data['Mes'].map(months)
+    display_data = display_data[['Mes', 'Media', 'Desvio_padrao']].rename(
+        columns={'Mes': 'Mês', 'Media': 'Demanda Média', 'Desvio_padrao': 'Desvio Padrão'}
+    )
+    st.dataframe(display_data, use_container_width=True, hide_index=True)
+
+# ============================================================================
+# PÁGINA 2: PRECIFICAÇÃO INTELIGENTE
+# ============================================================================
+elif page == "💰 Precificação Inteligente":
+    st.header("💰 Precificação Inteligente")
+    st.markdown("Calcule preços promocionais para atingir suas metas de lucro")
+    st.markdown("---")
+    
+    render_pricing_page()
 
 # Footer
 st.markdown("---")
@@ -857,3 +951,27 @@ st.markdown(
     "</p>",
     unsafe_allow_html=True
 )
+
+# Painel de diagnóstico (fica no fim para incluir os spans desta execução)
+with st.sidebar.expander("🩺 Diagnóstico"):
+    st.toggle("Medir tempos por etapa", key='diagnostics_enabled',
+              help="Agrega a duração de carga dos dados, cálculos, gráficos e PDF e registra cada etapa em JSON no log")
+    if st.session_state.get('diagnostics_enabled'):
+        for title, timings in [("Sessão", session_timings()), ("Processo", PROCESS_TIMINGS)]:
+            summary = timings.summary() if timings is not None else {}
+            st.caption(title)
+            if summary:
+                st.dataframe(
+                    pd.DataFrame.from_dict(summary, orient='index').round(1).rename(columns={
+                        'count': 'n', 'p50_ms': 'p50 (ms)', 'p95_ms': 'p95 (ms)', 'max_ms': 'máx (ms)'
+                    }),
+                    use_container_width=True
+                )
+            else:
+                st.write("Nenhuma etapa medida ainda.")
+        queue_stats = report_queue().stats()
+        st.caption(f"Fila de PDF: {queue_stats['running']}/{queue_stats['workers']} renderizando, "
+                   f"{queue_stats['waiting']} aguardando (máx. {queue_stats['max_pending']})")
+        cached_branches = branch_data().cached()
+        st.caption(f"Filiais em memória: {', '.join(cached_branches) or 'nenhuma'} "
+                   f"({sum(cached_branches.values()) / 2**20:.1f} de {branch_data().max_bytes / 2**20:.0f} MB)")
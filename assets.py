@@ -0,0 +1,57 @@
+import functools
+import io
+import os
+
+ASSETS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Logos por tema (a branca é usada sobre fundo escuro)
+LOGO_PATHS = {
+    'dark': os.path.join(ASSETS_DIR, 'Logo-Living-SPA-BRANCO.png'),
+    'light': os.path.join(ASSETS_DIR, 'Logo-Living-SPA-PRETO.png'),
+}
+
+# Largura de exibição da logo no cabeçalho do dashboard, em pixels CSS
+LOGO_DISPLAY_WIDTH = 100
+
+# Largura em pixels da variante de impressão (~300 dpi para 1 polegada no PDF)
+LOGO_PRINT_WIDTH = 300
+
+
+@functools.lru_cache(maxsize=None)
+def _decoded_logo(path):
+    from PIL import Image
+    with Image.open(path) as image:
+        image.load()
+        return image.convert('RGBA')
+
+
+@functools.lru_cache(maxsize=None)
+def logo_variant(path, width, image_format='PNG'):
+    """Retorna os bytes da logo redimensionada para `width` pixels
+
+    A imagem original é decodificada uma única vez por processo e cada variante fica
+    em memória, compartilhada entre sessões e relatórios. Em JPEG a transparência é
+    achatada sobre fundo branco (o ReportLab embute JPEG sem decodificar de novo).
+    """
+    from PIL import Image
+    image = _decoded_logo(path)
+    height = round(image.height * width / image.width)
+    resized = image.resize((width, height), Image.LANCZOS)
+    buffer = io.BytesIO()
+    if image_format == 'JPEG':
+        flattened = Image.new('RGB', resized.size, (255, 255, 255))
+        flattened.paste(resized, mask=resized.getchannel('A'))
+        flattened.save(buffer, format='JPEG', quality=92, optimize=True)
+    else:
+        resized.save(buffer, format='PNG', optimize=True)
+    return buffer.getvalue()
+
+
+def theme_logo(theme_mode, scale=2):
+    """Logo do tema no tamanho de exibição (escala 2 para telas HiDPI)"""
+    return logo_variant(LOGO_PATHS[theme_mode], LOGO_DISPLAY_WIDTH * scale)
+
+
+def print_logo():
+    """Logo escura em resolução de impressão (JPEG sobre branco), para o cabeçalho do PDF"""
+    return logo_variant(LOGO_PATHS['light'], LOGO_PRINT_WIDTH, 'JPEG')
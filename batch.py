@@ -0,0 +1,165 @@
+"""Planejamento de promoções em lote, sem interface Streamlit
+
+Exemplo:
+    python batch.py --promotional-price 60:100:5 --commission 25,30,35 --output plano.csv
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from dataset import DATA_PATH, read_seasonal_frame, stat_values
+from pricing import calculate_promotion
+
+# Ordem dos eixos da grade de parâmetros (após o eixo de linhas do arquivo sazonal)
+PARAMETERS = ['original_price', 'promotional_price', 'service_cost', 'commission_percentage', 'desired_profit_increase']
+
+# Colunas de saída calculadas pelo motor de precificação
+RESULT_COLUMNS = ['revenue_without_promo', 'commission_without_promo', 'total_service_cost_without_promo',
+                  'spa_revenue_without_promo', 'desired_spa_revenue', 'profit_per_promo_service',
+                  'required_quantity', 'total_promo_revenue', 'final_commission',
+                  'total_service_cost_with_promo', 'spa_revenue_with_promo', 'feasible']
+
+# Estado de cada processo do pool (preenchido uma única vez pelo initializer)
+_worker_state = {}
+
+
+def parse_values(text):
+    """Converte '60:100:5' (faixa inclusiva) ou '60,70,80' em um array de valores"""
+    if ':' in text:
+        start, stop, step = (float(part) for part in text.split(':'))
+        if step <= 0:
+            raise argparse.ArgumentTypeError(f"passo deve ser positivo: {text}")
+        return np.arange(start, stop + step / 2, step)
+    return np.array([float(part) for part in text.split(',')])
+
+
+def _init_worker(data, grid):
+    _worker_state['data'] = data
+    _worker_state['grid'] = grid
+
+
+def evaluate_chunk(start, stop, data=None, grid=None):
+    """Calcula as linhas [start, stop) do produto cartesiano dados × grade de parâmetros"""
+    data = _worker_state['data'] if data is None else data
+    grid = _worker_state['grid'] if grid is None else grid
+    shape = (len(data['Mes']),) + tuple(len(grid[name]) for name in PARAMETERS)
+    indices = np.unravel_index(np.arange(start, stop), shape)
+
+    rows = indices[0]
+    params = {name: grid[name][idx] for name, idx in zip(PARAMETERS, indices[1:])}
+    demand = data['Media'][rows]
+    result = calculate_promotion(demand, params['original_price'], params['promotional_price'],
+                                 params['service_cost'], params['commission_percentage'],
+                                 params['desired_profit_increase'])
+
+    return pd.DataFrame({
+        'Servico': pd.Categorical.from_codes(data['service_code'][rows], data['services']),
+        'Mes': data['Mes'][rows],
+        'Media': demand,
+        'Desvio_padrao': data['Desvio_padrao'][rows],
+        **params,
+        **dict(zip(RESULT_COLUMNS, result)),
+    })
+
+
+def iter_chunks(data, grid, chunk_size, workers):
+    """Gera os blocos de resultado em ordem, com no máximo 2 blocos por worker em memória"""
+    total = len(data['Mes']) * int(np.prod([len(grid[name]) for name in PARAMETERS]))
+    bounds = [(start, min(start + chunk_size, total)) for start in range(0, total, chunk_size)]
+
+    if workers <= 1 or len(bounds) <= 1:
+        for start, stop in bounds:
+            yield evaluate_chunk(start, stop, data, grid)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(data, grid)) as pool:
+        pending = []
+        for start, stop in bounds:
+            pending.append(pool.submit(evaluate_chunk, start, stop))
+            if len(pending) >= 2 * workers:
+                yield pending.pop(0).result()
+        for future in pending:
+            yield future.result()
+
+
+class ChunkWriter:
+    """Escreve blocos sucessivos em CSV ou Parquet sem manter o resultado inteiro em memória"""
+
+    def __init__(self, path):
+        self.path = path
+        self.parquet = path.endswith('.parquet')
+        self._writer = None
+        self._first = True
+
+    def write(self, chunk):
+        if self.parquet:
+            try:
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+            except ImportError:
+                raise SystemExit("Saída Parquet requer o pacote pyarrow (pip install pyarrow)")
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            if self._writer is None:
+                self._writer = pq.ParquetWriter(self.path, table.schema)
+            self._writer.write_table(table)
+        else:
+            chunk.to_csv(self.path, mode='w' if self._first else 'a', header=self._first, index=False)
+        self._first = False
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description="Calcula a estratégia de promoção para todo serviço × mês × combinação de parâmetros."
+    )
+    parser.add_argument('--data', default=DATA_PATH, help="arquivo sazonal de entrada (CSV ou .parquet)")
+    parser.add_argument('--output', '-o', default='plano_promocoes.csv', help="arquivo de saída (.csv ou .parquet)")
+    parser.add_argument('--original-price', type=parse_values, default=parse_values('100'),
+                        help="preço original em R$ (lista '90,100' ou faixa 'início:fim:passo')")
+    parser.add_argument('--promotional-price', type=parse_values, default=parse_values('100'),
+                        help="preço promocional em R$")
+    parser.add_argument('--service-cost', type=parse_values, default=parse_values('20'),
+                        help="custo por serviço em R$")
+    parser.add_argument('--commission', dest='commission_percentage', type=parse_values, default=parse_values('30'),
+                        help="comissão da massagista em %%")
+    parser.add_argument('--profit-increase', dest='desired_profit_increase', type=parse_values,
+                        default=parse_values('5'), help="lucro adicional desejado em %%")
+    parser.add_argument('--chunk-size', type=int, default=250_000, help="linhas por bloco (limita a memória)")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help="processos do pool")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    frame = read_seasonal_frame(args.data)
+    # Serviço como código inteiro + categorias: blocos menores entre processos e na saída
+    service_code, services = pd.factorize(frame['Servico'])
+    data = {column: stat_values(frame[column]) for column in ['Media', 'Desvio_padrao']}
+    data['Mes'] = frame['Mes'].to_numpy()
+    data.update(service_code=service_code, services=services)
+    grid = {name: getattr(args, name) for name in PARAMETERS}
+    total = len(frame) * int(np.prod([len(values) for values in grid.values()]))
+
+    started = time.perf_counter()
+    writer = ChunkWriter(args.output)
+    try:
+        for chunk in iter_chunks(data, grid, args.chunk_size, args.workers):
+            writer.write(chunk)
+    finally:
+        writer.close()
+    elapsed = time.perf_counter() - started
+
+    print(f"{total:,} cenários gravados em {args.output} em {elapsed:.2f}s "
+          f"({total / max(elapsed, 1e-9):,.0f} cenários/s)", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+"""Orçamento de tempo de importação dos módulos sem interface
+
+Cada módulo é importado em um processo Python novo (melhor de N execuções) e comparado com o
+seu orçamento. Também verifica que o núcleo (dados, precificação, simulação) não carrega
+dependências pesadas de interface ou de relatório.
+
+Uso (a partir da raiz do repositório):
+    python benchmarks/import_budget.py
+Sai com código 1 se algum orçamento for estourado. tests/test_import_budget.py aplica as mesmas
+verificações na suíte de testes.
+"""
+import json
+import os
+import subprocess
+import sys
+import textwrap
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Orçamento em segundos por módulo (o numpy sozinho leva ~0,1 s)
+BUDGETS = {
+    'palette': 0.05,
+    'dataset': 0.05,
+    'diagnostics': 0.05,
+    'branches': 0.05,
+    'report_cache': 0.05,
+    'report_jobs': 0.05,
+    'pricing': 0.30,
+    'forecast': 0.30,
+    'portfolio': 0.30,
+    'simulation': 0.30,
+    'report': 0.60,
+}
+
+# Módulos do núcleo e dependências que eles não podem carregar na importação
+CORE_MODULES = ['palette', 'dataset', 'diagnostics', 'branches', 'report_cache', 'report_jobs', 'pricing',
+                'forecast', 'portfolio', 'simulation']
+FORBIDDEN = ['pandas', 'reportlab', 'PIL', 'kaleido', 'plotly', 'streamlit']
+
+RUNS = 5
+
+# Script executado em cada processo novo: importa os módulos e devolve tempo e sys.modules em JSON
+_PROBE_SCRIPT = textwrap.dedent("""
+    import json, sys, time
+    started = time.perf_counter()
+    for name in sys.argv[1:]:
+        __import__(name)
+    elapsed = time.perf_counter() - started
+    print(json.dumps({'elapsed': elapsed, 'modules': sorted(sys.modules)}))
+""")
+
+
+def probe(*modules):
+    """Importa os módulos em um processo novo e retorna (segundos, módulos carregados)"""
+    output = subprocess.run([sys.executable, '-c', _PROBE_SCRIPT, *modules], cwd=REPO_ROOT,
+                            check=True, capture_output=True, text=True).stdout
+    data = json.loads(output)
+    return data['elapsed'], set(data['modules'])
+
+
+def import_times(names=None, runs=RUNS):
+    """{módulo: (melhor tempo em segundos, orçamento)} dos módulos pedidos (padrão: todos de BUDGETS)"""
+    return {name: (min(probe(name)[0] for _ in range(runs)), BUDGETS[name]) for name in names or BUDGETS}
+
+
+def leaked_modules():
+    """Dependências pesadas (FORBIDDEN) carregadas ao importar o núcleo"""
+    _, loaded = probe(*CORE_MODULES)
+    return sorted(name for name in FORBIDDEN if name in loaded)
+
+
+def main():
+    failures = []
+
+    for name, (elapsed, budget) in import_times().items():
+        status = 'ok' if elapsed <= budget else 'ESTOUROU'
+        print(f"{name:<12} {elapsed * 1000:8.1f} ms  (orçamento {budget * 1000:.0f} ms)  {status}")
+        if elapsed > budget:
+            failures.append(name)
+
+    leaked = leaked_modules()
+    if leaked:
+        print(f"núcleo carregou dependências pesadas: {', '.join(leaked)}")
+        failures.append('core')
+
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
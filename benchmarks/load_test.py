@@ -0,0 +1,141 @@
+"""Teste de carga da API de precificação (api.py) em uma instância local
+
+Dispara requisições de N clientes concorrentes durante alguns segundos e mostra requisições/s
+e latências (p50, p95, máx) por cenário de carga. Com --spawn, sobe a API em um subprocesso.
+
+Uso (a partir da raiz do repositório):
+    python benchmarks/load_test.py --spawn
+    python benchmarks/load_test.py --url http://127.0.0.1:8502 --concurrency 16 --duration 10 --mix quote,batch
+"""
+import argparse
+import http.client
+import json
+import os
+import subprocess
+import sys
+import time
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def build_requests(base_url, batch_size):
+    """Monta (método, caminho, corpo) de cada cenário de carga a partir dos serviços da API"""
+    services = request_json(base_url, 'GET', '/seasonal')['services']
+    scenarios = [{'service': services[number % len(services)], 'month': number % 12 + 1,
+                  'promotional_price': 60 + number % 40} for number in range(batch_size)]
+    return {
+        'quote': ('POST', '/quote', scenarios[0]),
+        'batch': ('POST', '/quote', {'scenarios': scenarios}),
+        'simulate': ('POST', '/quote', {**scenarios[0], 'simulate': True, 'draws': 100_000}),
+        'report': ('POST', '/report', scenarios[0]),
+    }
+
+
+def request_json(base_url, method, path, body=None):
+    url = urllib.parse.urlsplit(base_url)
+    connection = http.client.HTTPConnection(url.hostname, url.port, timeout=30)
+    try:
+        connection.request(method, path, body=json.dumps(body) if body is not None else None)
+        return json.loads(connection.getresponse().read())
+    finally:
+        connection.close()
+
+
+def run_client(base_url, method, path, body, deadline):
+    """Um cliente com conexão persistente; retorna (latências em s, erros)"""
+    url = urllib.parse.urlsplit(base_url)
+    payload = json.dumps(body).encode()
+    headers = {'Content-Type': 'application/json'}
+    connection = http.client.HTTPConnection(url.hostname, url.port, timeout=60)
+    latencies, errors = [], 0
+    try:
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            try:
+                connection.request(method, path, body=payload, headers=headers)
+                response = connection.getresponse()
+                response.read()
+                ok = response.status == 200
+            except (OSError, http.client.HTTPException):
+                connection.close()
+                ok = False
+            if ok:
+                latencies.append(time.perf_counter() - started)
+            else:
+                errors += 1
+    finally:
+        connection.close()
+    return latencies, errors
+
+
+def run_load(base_url, request, concurrency, duration):
+    method, path, body = request
+    deadline = time.perf_counter() + duration
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(lambda _: run_client(base_url, method, path, body, deadline), range(concurrency)))
+    latencies = sorted(latency for client_latencies, _ in results for latency in client_latencies)
+    errors = sum(client_errors for _, client_errors in results)
+    return latencies, errors
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return float('nan')
+    return sorted_values[min(int(p / 100 * len(sorted_values)), len(sorted_values) - 1)]
+
+
+def wait_until_ready(base_url, process, timeout=30):
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        if process.poll() is not None:
+            raise SystemExit("a API encerrou antes de ficar pronta")
+        try:
+            request_json(base_url, 'GET', '/health')
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise SystemExit("a API não respondeu a tempo")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Mede requisições/s da API de precificação.")
+    parser.add_argument('--url', default='http://127.0.0.1:8502', help="endereço da API")
+    parser.add_argument('--spawn', action='store_true', help="sobe a API local em um subprocesso")
+    parser.add_argument('--pdf-workers', type=int, default=1, help="workers de PDF da API (com --spawn)")
+    parser.add_argument('--concurrency', type=int, default=8, help="clientes simultâneos")
+    parser.add_argument('--duration', type=float, default=5.0, help="segundos por cenário de carga")
+    parser.add_argument('--batch-size', type=int, default=100, help="cenários por requisição no modo batch")
+    parser.add_argument('--mix', default='quote,batch,simulate,report',
+                        help="cenários de carga, na ordem: quote, batch, simulate, report")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    process = None
+    if args.spawn:
+        port = urllib.parse.urlsplit(args.url).port
+        process = subprocess.Popen([sys.executable, 'api.py', '--port', str(port),
+                                    '--pdf-workers', str(args.pdf_workers)], cwd=REPO_ROOT)
+    try:
+        if process is not None:
+            wait_until_ready(args.url, process)
+        requests = build_requests(args.url, args.batch_size)
+        print(f"{'cenário':<10} {'req/s':>9} {'cenários/s':>11} {'p50':>9} {'p95':>9} {'máx':>9} {'erros':>6}")
+        for name in args.mix.split(','):
+            latencies, errors = run_load(args.url, requests[name], args.concurrency, args.duration)
+            rate = len(latencies) / args.duration
+            per_request = args.batch_size if name == 'batch' else 1
+            print(f"{name:<10} {rate:9.1f} {rate * per_request:11.1f} "
+                  f"{percentile(latencies, 50) * 1e3:7.1f}ms {percentile(latencies, 95) * 1e3:7.1f}ms "
+                  f"{(latencies[-1] if latencies else float('nan')) * 1e3:7.1f}ms {errors:6d}")
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+
+if __name__ == '__main__':
+    main()
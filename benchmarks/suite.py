@@ -0,0 +1,247 @@
+"""Benchmarks dos caminhos quentes do dashboard com linha de base versionada
+
+Casos: leitura dos dados sazonais (arquivo real e sintéticos de até milhões de linhas), cálculo
+da promoção (escalar e vetorizado), construção dos gráficos, rasterização via kaleido e o PDF
+completo. Cada caso mede o melhor tempo por chamada entre algumas repetições (timeit) e é
+comparado com benchmarks/baseline.json; roda sem interface (Streamlit não é importado).
+
+Uso (a partir da raiz do repositório):
+    python benchmarks/suite.py                     # compara com a linha de base
+    python benchmarks/suite.py --update-baseline   # regrava a linha de base nesta máquina
+    python benchmarks/suite.py --only pricing --threshold 0.25
+Sai com código 1 se algum caso ficar mais lento que linha de base × (1 + limiar) e por mais que
+--min-delta segundos, confirmado por uma segunda medição com mais repetições.
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import timeit
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+import numpy as np
+
+from dataset import DATA_PATH, read_seasonal_index
+
+BASELINE_PATH = os.path.join(REPO_ROOT, 'benchmarks', 'baseline.json')
+
+# Tamanhos dos arquivos sintéticos (12 linhas por serviço, como no arquivo real)
+DEFAULT_SCALES = [12_000, 1_200_000]
+
+# Lentidão tolerada em relação à linha de base antes de falhar (0.5 = 50%; menos que isso é ruído comum
+# em máquinas compartilhadas)
+DEFAULT_THRESHOLD = 0.5
+
+# Diferença absoluta mínima para acusar lentidão: em casos de micro a poucas dezenas de ms (ex.:
+# pricing_array_1m, limitado pela memória) a proporção varia 1,5-1,8× só com a carga da máquina
+DEFAULT_MIN_DELTA = 0.025
+
+REPEAT = 5
+
+# Repetições da nova medição de um caso acusado antes de falhar
+CONFIRM_REPEAT = 15
+
+# Cenário de referência (os valores padrão do formulário)
+SCENARIO = dict(original_price=100.0, promotional_price=85.0, service_cost=20.0,
+                commission_percentage=30.0, desired_profit_increase=5.0)
+
+
+def write_synthetic_data(path, rows, seed=0):
+    """Grava um arquivo sazonal sintético com `rows` linhas (serviços × 12 meses)"""
+    import pandas as pd
+    rng = np.random.default_rng(seed)
+    services = max(rows // 12, 1)
+    pd.DataFrame({
+        'Mes': np.tile(np.arange(1, 13), services)[:rows],
+        'Servico': np.repeat([f"Serviço {number:07d}" for number in range(services)], 12)[:rows],
+        'Media': rng.uniform(5, 60, rows).round(2),
+        'Desvio_padrao': rng.uniform(0.5, 15, rows).round(2),
+    }).to_csv(path, index=False)
+
+
+def build_cases(scales, workdir):
+    """Retorna [(nome, preparo)]; o preparo devolve a função medida, ou None se a dependência falta
+
+    O preparo (arquivos sintéticos, figuras, cache colunar) só roda para os casos selecionados.
+    """
+    from charts import create_comparison_chart, create_comparison_chart_for_pdf, create_seasonal_figures
+    from pricing import calculate_promotion
+    from report import generate_pdf_report
+
+    data_path = os.path.join(REPO_ROOT, DATA_PATH)
+    index = read_seasonal_index(data_path, columnar=False)
+    service = index.services[0]
+    demand, std_dev = index.get(service, 1)
+    result = calculate_promotion(demand, **SCENARIO).scalar()
+
+    def synthetic_load(rows, columnar):
+        path = os.path.join(workdir, f"sintetico_{rows}.csv")
+        if not os.path.exists(path):
+            write_synthetic_data(path, rows)
+        if columnar:
+            # Primeira leitura grava o cache colunar; as medidas seguintes leem só o Parquet
+            read_seasonal_index(path)
+        return lambda: read_seasonal_index(path, columnar=columnar)
+
+    def pricing_array():
+        rng = np.random.default_rng(0)
+        demands = rng.uniform(5, 60, 1_000_000)
+        promotional_prices = rng.uniform(40, 100, 1_000_000)
+        return lambda: calculate_promotion(demands, SCENARIO['original_price'], promotional_prices,
+                                           SCENARIO['service_cost'], SCENARIO['commission_percentage'],
+                                           SCENARIO['desired_profit_increase'])
+
+    def kaleido_write_image():
+        # kaleido depende de um Chrome instalado; sem ele o caso é marcado como indisponível
+        import plotly.io as pio
+        figure = create_comparison_chart_for_pdf(result)
+        write = lambda: pio.write_image(figure, io.BytesIO(), format='png', width=600, height=400)
+        try:
+            write()
+        except Exception:
+            return None
+        return write
+
+    def forecast_fit():
+        from forecast import MonthlyHistory, forecast_demand
+        # 600 serviços × 5 anos de contagens mensais com sazonalidade e ruído de Poisson
+        rng = np.random.default_rng(0)
+        seasonal = 20 + 8 * np.sin(np.arange(60) * np.pi / 6)
+        counts = rng.poisson(seasonal * rng.uniform(0.5, 2, (600, 1))).astype(np.float64)
+        history = MonthlyHistory([f"Serviço {i}" for i in range(600)], (2020, 1), counts)
+        return lambda: forecast_demand(history)
+
+    def portfolio_optimize():
+        from portfolio import optimize_portfolio
+        # 200 serviços × 12 meses com pouca folga de capacidade (a DP roda em todos os meses)
+        path = os.path.join(workdir, "sintetico_portfolio.csv")
+        if not os.path.exists(path):
+            write_synthetic_data(path, 2400)
+        frame = read_seasonal_index(path, columnar=False).frame
+        return lambda: optimize_portfolio(frame, SCENARIO['original_price'], SCENARIO['service_cost'],
+                                          SCENARIO['commission_percentage'], SCENARIO['desired_profit_increase'],
+                                          1.5, 7000)
+
+    report_args = (service, "Janeiro", demand, std_dev, SCENARIO['original_price'], SCENARIO['service_cost'],
+                   SCENARIO['commission_percentage'], SCENARIO['desired_profit_increase'],
+                   SCENARIO['promotional_price'], result)
+
+    cases = [('load_csv_24', lambda: lambda: read_seasonal_index(data_path, columnar=False))]
+    for rows in scales:
+        cases.append((f'load_csv_{rows}', lambda rows=rows: synthetic_load(rows, columnar=False)))
+        cases.append((f'load_columnar_{rows}', lambda rows=rows: synthetic_load(rows, columnar=True)))
+    cases += [
+        ('pricing_scalar', lambda: lambda: calculate_promotion(demand, **SCENARIO).scalar()),
+        ('pricing_array_1m', pricing_array),
+        ('forecast_fit_600x60', forecast_fit),
+        ('portfolio_200x12', portfolio_optimize),
+        ('comparison_chart', lambda: lambda: create_comparison_chart(result)),
+        ('seasonal_figures', lambda: lambda: create_seasonal_figures(index.by_service[service], "atendimentos",
+                                                                     "#000000", "#000000")),
+        ('kaleido_write_image', kaleido_write_image),
+        ('pdf_report', lambda: lambda: generate_pdf_report(*report_args)),
+    ]
+    return cases
+
+
+def measure(function, repeat=REPEAT):
+    """Melhor tempo por chamada, em segundos (cada repetição dura pelo menos ~0,2 s)
+
+    Casos que levam mais de um segundo por chamada são repetidos uma única vez a mais.
+    """
+    timer = timeit.Timer(function)
+    loops, elapsed = timer.autorange()
+    best = elapsed / loops
+    for _ in range(1 if elapsed > 1 else repeat - 1):
+        best = min(best, timer.timeit(loops) / loops)
+    return best
+
+
+def is_regression(elapsed, reference, threshold, min_delta=DEFAULT_MIN_DELTA):
+    """Mais lento que a base × (1 + limiar) e por mais que `min_delta` segundos"""
+    return elapsed > reference * (1 + threshold) and elapsed - reference > min_delta
+
+
+def load_baseline(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding='utf-8') as file:
+        return json.load(file)['results']
+
+
+def save_baseline(path, results):
+    data = {
+        'machine': f"{platform.system()} {platform.machine()} · Python {platform.python_version()} · "
+                   f"NumPy {np.__version__}",
+        'results': results,
+    }
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump(data, file, ensure_ascii=False, indent=2, sort_keys=True)
+        file.write('\n')
+
+
+def format_seconds(seconds):
+    if seconds >= 1:
+        return f"{seconds:8.2f} s "
+    if seconds >= 1e-3:
+        return f"{seconds * 1e3:8.2f} ms"
+    return f"{seconds * 1e6:8.2f} µs"
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Mede os caminhos quentes e compara com a linha de base.")
+    parser.add_argument('--baseline', default=BASELINE_PATH, help="arquivo JSON da linha de base")
+    parser.add_argument('--update-baseline', action='store_true', help="regrava a linha de base com esta execução")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help="lentidão tolerada (0.5 = 50%% acima da linha de base)")
+    parser.add_argument('--min-delta', type=float, default=DEFAULT_MIN_DELTA,
+                        help="diferença mínima, em segundos, para acusar lentidão")
+    parser.add_argument('--scales', type=lambda text: [int(part) for part in text.split(',')],
+                        default=DEFAULT_SCALES, help="linhas dos arquivos sintéticos, ex.: 12000,1200000")
+    parser.add_argument('--only', action='append', help="roda só os casos que contêm o texto (repetível)")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    baseline = load_baseline(args.baseline)
+    results, failures = {}, []
+
+    with tempfile.TemporaryDirectory() as workdir:
+        for name, prepare in build_cases(args.scales, workdir):
+            if args.only and not any(part in name for part in args.only):
+                continue
+            function = prepare()
+            if function is None:
+                print(f"{name:<24} {'—':>11}  indisponível")
+                continue
+            elapsed = measure(function)
+            reference = baseline.get(name)
+            if reference is not None and is_regression(elapsed, reference, args.threshold, args.min_delta):
+                # Confirma com mais repetições antes de acusar: um pico de ruído raramente se repete
+                elapsed = min(elapsed, measure(function, CONFIRM_REPEAT))
+            results[name] = elapsed
+            if reference is None:
+                status = 'novo'
+            else:
+                status = f"{elapsed / reference:5.2f}× da base"
+                if is_regression(elapsed, reference, args.threshold, args.min_delta):
+                    status += '  LENTO'
+                    failures.append(name)
+            print(f"{name:<24} {format_seconds(elapsed)}  {status}")
+
+    if args.update_baseline:
+        save_baseline(args.baseline, {**baseline, **results})
+        print(f"linha de base gravada em {args.baseline}")
+    elif failures:
+        print(f"regressão acima de {args.threshold:.0%}: {', '.join(failures)}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,164 @@
+"""Registro das filiais e cache em memória dos dados sazonais de cada uma
+
+O registro é um JSON {"nome da filial": "caminho do CSV", ...} (caminhos relativos ao próprio
+arquivo), lido de LIVING_SPA_BRANCHES ou de filiais.json; sem registro, a única filial é o
+arquivo padrão (dados_sazonais.csv), com o estado padrão da ingestão como histórico. Para dar
+histórico (previsões de demanda) a uma filial do registro, use um objeto no lugar do caminho:
+{"dados": "centro.csv", "historico": "centro_estado.json"}.
+
+Cada filial é lida só no primeiro acesso e fica em um cache LRU compartilhado, limitado pela
+memória estimada dos índices (LIVING_SPA_BRANCH_CACHE_BYTES). A visão consolidada soma as
+filiais a partir desses índices em memória, sem reler os arquivos, e também fica no cache.
+"""
+import json
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+
+from dataset import DATA_PATH, STATE_PATH, build_seasonal_index, file_signature, read_seasonal_index
+from diagnostics import span
+
+# Variáveis de ambiente com o arquivo de registro e o limite de memória do cache
+REGISTRY_ENV_VAR = 'LIVING_SPA_BRANCHES'
+CACHE_BYTES_ENV_VAR = 'LIVING_SPA_BRANCH_CACHE_BYTES'
+
+REGISTRY_PATH = 'filiais.json'
+DEFAULT_BRANCH = 'Matriz'
+DEFAULT_CACHE_BYTES = 256 * 1024 * 1024
+
+# Nome da visão consolidada (soma de todas as filiais)
+CONSOLIDATED = 'Todas as filiais'
+
+
+@dataclass(frozen=True)
+class BranchSource:
+    """Arquivos de uma filial: dados sazonais e, opcionalmente, o estado da ingestão (histórico)"""
+    data: str
+    history: Optional[str] = None
+
+
+def load_registry(path=None):
+    """Lê o registro {filial: BranchSource}; sem arquivo, retorna só a filial padrão"""
+    path = path or os.environ.get(REGISTRY_ENV_VAR) or REGISTRY_PATH
+    if not os.path.exists(path):
+        return {DEFAULT_BRANCH: BranchSource(DATA_PATH, STATE_PATH)}
+    with open(path, encoding='utf-8') as file:
+        entries = json.load(file)
+    if not isinstance(entries, dict) or not entries:
+        raise ValueError(f"{path}: o registro deve ser um objeto {{filial: caminho}} não vazio")
+    base = os.path.dirname(path)
+    registry = {}
+    for name, source in entries.items():
+        if isinstance(source, str):
+            source = {'dados': source}
+        if not isinstance(source, dict) or 'dados' not in source:
+            raise ValueError(f"{path}: filial {name!r} sem o caminho dos dados")
+        history = source.get('historico')
+        registry[str(name)] = BranchSource(os.path.join(base, source['dados']),
+                                           os.path.join(base, history) if history else None)
+    return registry
+
+
+def index_nbytes(index):
+    """Memória estimada de um SeasonalIndex: DataFrame, tabela de consulta e limites das partições
+
+    As partições por serviço são fatias recortadas sob demanda e não ficam guardadas no índice.
+    """
+    return (int(index.frame.memory_usage(deep=True).sum()) + index.monthly.nbytes
+            + index.by_service.bounds.nbytes)
+
+
+def consolidate(indexes):
+    """Soma a demanda das filiais por (serviço, mês); desvios combinados como filiais independentes"""
+    import numpy as np
+    import pandas as pd
+
+    frame = pd.concat([index.frame for index in indexes], ignore_index=True)
+    frame['Servico'] = frame['Servico'].astype(str)
+    frame['Variancia'] = frame['Desvio_padrao'].astype('float64') ** 2
+    totals = frame.groupby(['Servico', 'Mes'], sort=False).agg(Media=('Media', 'sum'),
+                                                               Variancia=('Variancia', 'sum')).reset_index()
+    return build_seasonal_index(pd.DataFrame({
+        'Mes': totals['Mes'].astype('int8'),
+        'Servico': totals['Servico'].astype('category'),
+        'Media': totals['Media'].astype('float32'),
+        'Desvio_padrao': np.sqrt(totals['Variancia']).astype('float32'),
+    }))
+
+
+class BranchData:
+    """Índices sazonais das filiais carregados sob demanda, em LRU limitado por memória"""
+
+    def __init__(self, registry=None, max_bytes=None):
+        self.registry = registry or load_registry()
+        self.max_bytes = int(max_bytes or os.environ.get(CACHE_BYTES_ENV_VAR) or DEFAULT_CACHE_BYTES)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def branches(self):
+        """Filiais do registro e, com mais de uma, a visão consolidada"""
+        names = list(self.registry)
+        return names + [CONSOLIDATED] if len(names) > 1 else names
+
+    def version(self, branch):
+        """Assinatura dos arquivos por trás da filial (muda quando algum deles muda)"""
+        if branch == CONSOLIDATED:
+            return tuple(file_signature(source.data) for source in self.registry.values())
+        return file_signature(self.registry[branch].data)
+
+    def history_paths(self, branch):
+        """Estados da ingestão existentes da filial; do consolidado, só se todas as filiais têm histórico
+
+        Somar apenas as filiais com histórico daria a previsão de parte da rede como se fosse a do
+        consolidado: sem o histórico de alguma filial, a lista fica vazia e valem as médias somadas.
+        """
+        sources = self.registry.values() if branch == CONSOLIDATED else [self.registry[branch]]
+        paths = [source.history for source in sources if source.history and os.path.exists(source.history)]
+        if branch == CONSOLIDATED and len(paths) < len(self.registry):
+            return []
+        return paths
+
+    def history_version(self, branch):
+        """Assinatura dos históricos da filial (tupla vazia se ela não tem histórico)"""
+        return tuple((path, file_signature(path)) for path in self.history_paths(branch))
+
+    def get(self, branch):
+        """SeasonalIndex da filial (ou do consolidado), lido só se não está no cache ou mudou"""
+        if branch != CONSOLIDATED and branch not in self.registry:
+            raise KeyError(f"filial desconhecida: {branch!r}")
+        version = self.version(branch)
+        with self._lock:
+            entry = self._entries.get(branch)
+            if entry is not None and entry[0] == version:
+                self._entries.move_to_end(branch)
+                return entry[1]
+
+        # Leitura fora da trava: outras filiais continuam acessíveis enquanto esta carrega
+        if branch == CONSOLIDATED:
+            indexes = [self.get(name) for name in self.registry]
+            with span('consolidate'):
+                index = consolidate(indexes)
+        else:
+            with span('csv_load'):
+                index = read_seasonal_index(self.registry[branch].data)
+
+        with self._lock:
+            self._entries[branch] = (version, index, index_nbytes(index))
+            self._entries.move_to_end(branch)
+            self._evict()
+        return index
+
+    def cached(self):
+        """{filial: bytes estimados} do que está em memória, do uso mais antigo ao mais recente"""
+        with self._lock:
+            return {branch: nbytes for branch, (_, _, nbytes) in self._entries.items()}
+
+    def _evict(self):
+        # Chamado com a trava: remove do uso mais antigo até caber no limite (o mais recente sempre fica)
+        total = sum(nbytes for _, _, nbytes in self._entries.values())
+        while total > self.max_bytes and len(self._entries) > 1:
+            _, (_, _, nbytes) = self._entries.popitem(last=False)
+            total -= nbytes
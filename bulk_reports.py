@@ -0,0 +1,182 @@
+"""Geração em massa dos relatórios de estratégia de promoção (todo serviço × mês)
+
+Exemplo:
+    python bulk_reports.py --promotional-price 85 --months 1,2,3 --output relatorios_t1.zip
+    python bulk_reports.py --promotional-price 85 --output relatorios.pdf   # PDF único com sumário
+"""
+import argparse
+import io
+import os
+import re
+import sys
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import ParagraphStyle
+from reportlab.platypus import SimpleDocTemplate, Paragraph, PageBreak
+from reportlab.platypus.tableofcontents import TableOfContents
+
+from assets import print_logo
+from dataset import DATA_PATH, MONTHS, read_seasonal_index
+from pricing import calculate_promotion
+from report import PAGE_MARGINS, build_report_elements, generate_pdf_report, report_styles
+
+
+class MergedReportTemplate(SimpleDocTemplate):
+    """Documento que registra no sumário e nos marcadores o início de cada relatório"""
+
+    def afterFlowable(self, flowable):
+        entry = getattr(flowable, 'toc_entry', None)
+        if entry:
+            key = f"relatorio-{self.seq.nextf('relatorio')}"
+            self.canv.bookmarkPage(key)
+            self.canv.addOutlineEntry(entry, key, level=0)
+            self.notify('TOCEntry', (0, entry, self.page, key))
+
+
+def build_jobs(path, pricing, services=None, months=None):
+    """Lista os cenários (serviço × mês) a renderizar, na ordem do arquivo"""
+    index = read_seasonal_index(path)
+    jobs = []
+    for service, frame in index.by_service.items():
+        if services and service not in services:
+            continue
+        for month, demand, std_dev in zip(frame['Mes'], frame['Media'], frame['Desvio_padrao']):
+            if months and month not in months:
+                continue
+            jobs.append((service, int(month), float(demand), float(std_dev), pricing))
+    return jobs
+
+
+def report_file_name(service, month):
+    """Nome do arquivo individual de um relatório"""
+    slug = re.sub(r'[^0-9A-Za-zÀ-ÿ]+', '_', service).strip('_')
+    return f"Relatorio_Promocao_{slug}_{month:02d}_{MONTHS[month]}.pdf"
+
+
+def _scenario(job):
+    service, month, demand, std_dev, pricing = job
+    result = calculate_promotion(demand, pricing['original_price'], pricing['promotional_price'],
+                                 pricing['service_cost'], pricing['commission_percentage'],
+                                 pricing['desired_profit_increase']).scalar()
+    args = (service, MONTHS[month], demand, std_dev, pricing['original_price'], pricing['service_cost'],
+            pricing['commission_percentage'], pricing['desired_profit_increase'], pricing['promotional_price'])
+    return args, result
+
+
+def render_report(job):
+    """Renderiza um relatório e retorna (nome_do_arquivo, bytes), ou bytes None se o cenário é inviável"""
+    service, month = job[0], job[1]
+    args, result = _scenario(job)
+    if not result.feasible:
+        return report_file_name(service, month), None
+    return report_file_name(service, month), generate_pdf_report(*args, result).getvalue()
+
+
+def init_worker():
+    """Cria estilos, carrega as fontes e prepara a logo de impressão uma única vez por processo
+
+    Inicializador dos pools de renderização (aqui, em report_jobs e na API).
+    """
+    report_styles()
+    print_logo()
+
+
+def write_zip(jobs, output, workers):
+    """Renderiza os relatórios em paralelo e grava um .zip com os arquivos individuais"""
+    written, skipped = 0, []
+    with zipfile.ZipFile(output, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        if workers <= 1:
+            init_worker()
+            rendered = map(render_report, jobs)
+        else:
+            pool = ProcessPoolExecutor(max_workers=workers, initializer=init_worker)
+            rendered = pool.map(render_report, jobs, chunksize=max(1, len(jobs) // (workers * 4)))
+        try:
+            for name, pdf_bytes in rendered:
+                if pdf_bytes is None:
+                    skipped.append(name)
+                    continue
+                archive.writestr(name, pdf_bytes)
+                written += 1
+        finally:
+            if workers > 1:
+                pool.shutdown()
+    return written, skipped
+
+
+def write_merged(jobs, output):
+    """Gera um único PDF com sumário e um relatório por seção
+
+    O layout de um documento único é feito em um só processo (o sumário precisa de múltiplas
+    passagens sobre todas as páginas); use o modo .zip para renderização paralela.
+    """
+    styles = report_styles()
+    toc = TableOfContents()
+    toc.levelStyles = [ParagraphStyle('TOCLevel0', parent=styles['normal'], leftIndent=10, firstLineIndent=-10)]
+    elements = [Paragraph("Sumário", styles['title']), toc, PageBreak()]
+
+    written, skipped = 0, []
+    for job in jobs:
+        args, result = _scenario(job)
+        if not result.feasible:
+            skipped.append(report_file_name(job[0], job[1]))
+            continue
+        report_elements = build_report_elements(*args, result)
+        report_elements[0].toc_entry = f"{job[0]} — {MONTHS[job[1]]}"
+        elements.extend(report_elements)
+        elements.append(PageBreak())
+        written += 1
+
+    buffer = io.BytesIO()
+    MergedReportTemplate(buffer, pagesize=A4, **PAGE_MARGINS).multiBuild(elements)
+    with open(output, 'wb') as file:
+        file.write(buffer.getvalue())
+    return written, skipped
+
+
+def parse_ints(text):
+    return {int(part) for part in text.split(',')}
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Gera os relatórios de promoção para todo serviço × mês.")
+    parser.add_argument('--data', default=DATA_PATH, help="arquivo sazonal de entrada")
+    parser.add_argument('--output', '-o', default='relatorios_promocao.zip',
+                        help="arquivo de saída: .zip (relatórios individuais) ou .pdf (único, com sumário)")
+    parser.add_argument('--original-price', type=float, default=100.0, help="preço original em R$")
+    parser.add_argument('--promotional-price', type=float, default=100.0, help="preço promocional em R$")
+    parser.add_argument('--service-cost', type=float, default=20.0, help="custo por serviço em R$")
+    parser.add_argument('--commission', dest='commission_percentage', type=float, default=30.0,
+                        help="comissão da massagista em %%")
+    parser.add_argument('--profit-increase', dest='desired_profit_increase', type=float, default=5.0,
+                        help="lucro adicional desejado em %%")
+    parser.add_argument('--months', type=parse_ints, help="meses a incluir, ex.: 1,2,3 (padrão: todos)")
+    parser.add_argument('--service', dest='services', action='append', help="serviço a incluir (repetível)")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help="processos do pool (modo .zip)")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    pricing = {name: getattr(args, name) for name in
+               ['original_price', 'promotional_price', 'service_cost', 'commission_percentage', 'desired_profit_increase']}
+    jobs = build_jobs(args.data, pricing, args.services, args.months)
+
+    started = time.perf_counter()
+    if args.output.endswith('.pdf'):
+        written, skipped = write_merged(jobs, args.output)
+    else:
+        written, skipped = write_zip(jobs, args.output, args.workers)
+    elapsed = time.perf_counter() - started
+
+    for name in skipped:
+        print(f"ignorado (preço promocional sem margem): {name}", file=sys.stderr)
+    print(f"{written} relatórios gravados em {args.output} em {elapsed:.2f}s "
+          f"({written / max(elapsed, 1e-9):.1f} relatórios/s)", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
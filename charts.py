@@ -0,0 +1,164 @@
+import numpy as np
+import plotly.graph_objects as go
+import plotly.io as pio
+
+from dataset import MONTHS
+from palette import VERDE_SALVIA, BEGE_NEUTRO, BRANCO_PURO, VERDE_OLIVA_ESCURO, COR_SEM_PROMO, COR_COM_PROMO
+from pricing import comparison_values
+
+# Altura padrão dos gráficos, em pixels
+FIGURE_HEIGHT = 400
+
+
+def _build_template(base, **layout):
+    template = go.layout.Template(pio.templates[base])
+    template.layout.update(layout)
+    return template
+
+
+# Templates de layout compartilhados, montados uma vez por processo: tela (tema escuro, fundo
+# transparente) e impressão (fundo branco, texto preto). O objeto é passado direto às figuras;
+# registrá-lo por nome em pio.templates deixa cada figura ~40% mais lenta de montar.
+TEMPLATES = {
+    'screen': _build_template('plotly_dark', plot_bgcolor='rgba(0,0,0,0)', paper_bgcolor='rgba(0,0,0,0)',
+                              font=dict(color=BRANCO_PURO)),
+    'print': _build_template('plotly_white', plot_bgcolor='rgba(255,255,255,1)',
+                             paper_bgcolor='rgba(255,255,255,1)', font=dict(color='#000000')),
+}
+
+# Fábrica de figuras: traces + layout específico sobre o template da variante
+def styled_figure(data, variant='screen', height=FIGURE_HEIGHT, **layout):
+    """Cria uma figura com o template compartilhado da variante ('screen' ou 'print')"""
+    return go.Figure(data=data, layout=dict(template=TEMPLATES[variant], height=height, **layout))
+
+# Função para gerar gráfico de comparação
+def create_comparison_chart(result, variant='screen'):
+    """Cria um gráfico comparativo de receita e lucro (tela ou impressão)"""
+
+    categories, sem_promo, com_promo = comparison_values(result)
+
+    return styled_figure(
+        [
+            go.Bar(name='Sem Promoção', x=categories, y=sem_promo, marker_color=COR_SEM_PROMO),
+            go.Bar(name='Com Promoção', x=categories, y=com_promo, marker_color=COR_COM_PROMO)
+        ],
+        variant,
+        title="Comparação: Sem Promoção vs Com Promoção",
+        barmode='group',
+        showlegend=True,
+        yaxis_title="Valor (R$)",
+        hovermode='x unified'
+    )
+
+# Função para gerar gráfico para PDF com cores e texto preto
+def create_comparison_chart_for_pdf(result):
+    """Cria um gráfico comparativo para PDF com texto preto"""
+    return create_comparison_chart(result, variant='print')
+
+# Função para gerar o mapa de calor de sensibilidade
+def create_sensitivity_heatmap(prices, commissions, z, promotional_price, commission_percentage,
+                               title, colorbar_title, colorscale):
+    """Cria um mapa de calor preço promocional × comissão, marcando o cenário atual"""
+
+    # Limita a escala de cor ao percentil 95 para a fronteira sem margem não dominar o gráfico
+    finite = z[np.isfinite(z)]
+    zmax = float(np.percentile(finite, 95)) if finite.size else None
+
+    return styled_figure(
+        [
+            go.Heatmap(x=prices, y=commissions, z=z, zmax=zmax, colorscale=colorscale,
+                       colorbar=dict(title=colorbar_title),
+                       hovertemplate="Preço: R$ %{x:.2f}<br>Comissão: %{y:.1f}%<br>Valor: %{z:,.0f}<extra></extra>"),
+            go.Scatter(x=[promotional_price], y=[commission_percentage], mode='markers', showlegend=False,
+                       marker=dict(symbol='x', size=12, color=BRANCO_PURO, line=dict(width=1, color=VERDE_OLIVA_ESCURO)),
+                       hoverinfo='skip')
+        ],
+        title=title,
+        xaxis_title="Preço Promocional (R$)",
+        yaxis_title="Comissão (%)"
+    )
+
+# Função para gerar a curva lucro × preço do otimizador
+def create_profit_curve_chart(optimum, promotional_price):
+    """Cria a curva de lucro esperado por preço promocional, marcando o ótimo e o preço do formulário"""
+
+    fig = styled_figure(
+        [
+            go.Scatter(x=optimum.prices, y=optimum.profits, mode='lines', name='Lucro Esperado',
+                       line=dict(color=VERDE_SALVIA, width=3),
+                       hovertemplate="Preço: R$ %{x:.2f}<br>Lucro: R$ %{y:,.2f}<extra></extra>"),
+            go.Scatter(x=[optimum.price], y=[optimum.profit], mode='markers', name='Preço Ótimo',
+                       marker=dict(size=12, color=COR_COM_PROMO, line=dict(width=1, color=BRANCO_PURO)))
+        ],
+        title="Lucro Esperado × Preço Promocional",
+        xaxis_title="Preço Promocional (R$)",
+        yaxis_title="Lucro Esperado (R$)",
+        hovermode='x unified'
+    )
+    fig.add_vline(x=promotional_price, line_dash='dash', line_color=BEGE_NEUTRO,
+                  annotation_text="Preço do formulário", annotation_font_color=BEGE_NEUTRO)
+
+    return fig
+
+# Funções para gerar os gráficos da análise sazonal de um serviço
+def create_seasonal_figures(service_data, service_plural, line_color, marker_color):
+    """Cria os gráficos de demanda média (linha) e desvio padrão (barras) por mês"""
+
+    month_names = [MONTHS[m] for m in service_data['Mes']]
+
+    # Gráfico de linha para demanda
+    fig_demand = styled_figure(
+        [go.Scatter(
+            x=month_names,
+            y=service_data['Media'],
+            mode='lines+markers',
+            name='Demanda Média',
+            line=dict(color=line_color, width=3),
+            marker=dict(size=8, color=marker_color)
+        )],
+        title=f"Demanda Média de {service_plural.capitalize()} por Mês",
+        xaxis_title="Mês",
+        yaxis_title="Quantidade de Atendimentos",
+        hovermode='x unified'
+    )
+
+    # Gráfico de barras para desvio padrão
+    fig_std = styled_figure(
+        [go.Bar(
+            x=month_names,
+            y=service_data['Desvio_padrao'],
+            name='Desvio Padrão',
+            marker=dict(color=VERDE_SALVIA)
+        )],
+        title="Variação da Demanda (Desvio Padrão)",
+        xaxis_title="Mês",
+        yaxis_title="Desvio Padrão",
+        hovermode='x unified'
+    )
+
+    return fig_demand, fig_std
+
+# Função para gerar a mini tendência do plano anual de um serviço
+def create_plan_trend_chart(service_plan, service_plural, current_month=None):
+    """Cria a tendência mensal de demanda média × quantidade necessária na promoção"""
+
+    month_names = [MONTHS[m] for m in service_plan.index]
+    required = service_plan['required_quantity'].where(service_plan['feasible'])
+
+    fig = styled_figure(
+        [
+            go.Scatter(x=month_names, y=service_plan['Media'], mode='lines+markers', name='Demanda Média',
+                       line=dict(color=VERDE_SALVIA, width=2), marker=dict(size=6)),
+            go.Scatter(x=month_names, y=required, mode='lines+markers', name='Qtd. Necessária',
+                       line=dict(color=COR_COM_PROMO, width=2, dash='dot'), marker=dict(size=6))
+        ],
+        height=280,
+        title=f"Tendência Anual ({service_plural})",
+        hovermode='x unified',
+        margin=dict(l=10, r=10, t=40, b=10),
+        legend=dict(orientation='h', y=-0.2)
+    )
+    if current_month is not None:
+        fig.add_vline(x=MONTHS[current_month], line_dash='dash', line_color=BEGE_NEUTRO)
+
+    return fig
@@ -0,0 +1,206 @@
+import json
+import os
+import re
+import tempfile
+from collections.abc import Mapping
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
+
+# Arquivo padrão com a demanda sazonal (Mes, Servico, Media, Desvio_padrao)
+DATA_PATH = 'dados_sazonais.csv'
+
+# Estado padrão da ingestão incremental (contagens mensais por serviço, o histórico das previsões)
+STATE_PATH = 'ingestao_estado.json'
+
+# Tipos compactos das colunas (serviço categórico, mês em 1 byte, estatísticas em float32)
+COMPACT_DTYPES = {'Mes': 'int8', 'Servico': 'category', 'Media': 'float32', 'Desvio_padrao': 'float32'}
+
+# Duração de um atendimento cujo nome não informa os minutos (ex.: "Massagem Relaxante (50 min)")
+DEFAULT_SESSION_MINUTES = 60
+
+# Permissões de um arquivo novo neste processo (0666 menos a umask), lidas uma vez na importação
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+NEW_FILE_MODE = 0o666 & ~_UMASK
+
+# Meses para referência
+MONTHS = {
+    1: "Janeiro", 2: "Fevereiro", 3: "Março", 4: "Abril",
+    5: "Maio", 6: "Junho", 7: "Julho", 8: "Agosto",
+    9: "Setembro", 10: "Outubro", 11: "Novembro", 12: "Dezembro"
+}
+
+
+class ServicePartitions(Mapping):
+    """{serviço: linhas do serviço ordenadas por mês}, recortadas sob demanda do DataFrame ordenado
+
+    O DataFrame já vem ordenado por serviço e mês, então cada partição é uma fatia contígua
+    entre `bounds[i]` e `bounds[i + 1]`; nada é copiado até um serviço ser pedido.
+    """
+
+    def __init__(self, frame, services, bounds):
+        self.frame = frame
+        self.positions = {service: position for position, service in enumerate(services)}
+        self.bounds = bounds
+
+    def __getitem__(self, service):
+        position = self.positions[service]
+        return self.frame.iloc[self.bounds[position]:self.bounds[position + 1]].reset_index(drop=True)
+
+    def __iter__(self):
+        return iter(self.positions)
+
+    def __len__(self):
+        return len(self.positions)
+
+
+@dataclass(frozen=True)
+class SeasonalIndex:
+    """Dados sazonais já carregados e indexados para consulta rápida"""
+    frame: 'pd.DataFrame'
+    by_service: ServicePartitions
+    # (serviço, mês 0-12, [media, desvio]) em float32; NaN onde o serviço não tem o mês
+    monthly: 'np.ndarray'
+
+    @property
+    def services(self):
+        """Serviços presentes nos dados, na ordem do arquivo"""
+        return list(self.by_service)
+
+    def get(self, service, month):
+        """Retorna (media, desvio_padrao) do serviço no mês, ou None se não existir"""
+        position = self.by_service.positions.get(service)
+        if position is None or not 1 <= month <= 12:
+            return None
+        media, std_dev = self.monthly[position, month].tolist()
+        if media != media:
+            return None
+        # Mesmo arredondamento de stat_values: 8.4 em vez de 8.3999996
+        return round(media, 6), round(std_dev, 6)
+
+
+def service_nouns(service):
+    """Nome do atendimento no singular e no plural, para os textos da interface e do relatório"""
+    if "Drenagem" in service:
+        return "drenagem", "drenagens"
+    if "Massagem" in service:
+        return "massagem", "massagens"
+    return "atendimento", "atendimentos"
+
+
+def session_minutes(service):
+    """Duração do atendimento em minutos, lida do nome do serviço ("... (50 min)")"""
+    match = re.search(r'\((\d+)\s*min\)', service)
+    return int(match.group(1)) if match else DEFAULT_SESSION_MINUTES
+
+
+def temporary_file(path):
+    """Cria um arquivo temporário de nome único ao lado de `path`, retornando (descritor, caminho)
+
+    mkstemp cria o arquivo com modo 0600; ele recebe as permissões de um arquivo novo comum,
+    para que o arquivo final, trocado por os.replace, continue legível pelos processos de outros
+    usuários que compartilham o diretório (dashboard, API).
+    """
+    descriptor, temporary_path = tempfile.mkstemp(dir=os.path.dirname(path) or os.curdir,
+                                                  prefix=os.path.basename(path) + '.', suffix='.tmp')
+    os.chmod(temporary_path, NEW_FILE_MODE)
+    return descriptor, temporary_path
+
+
+def file_signature(path=DATA_PATH):
+    """Assinatura barata do arquivo (mtime + tamanho) usada para invalidar o cache"""
+    stat = os.stat(path)
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def stat_values(column):
+    """Converte uma coluna de estatísticas float32 em float64 arredondado (8.4 em vez de 8.3999996)"""
+    return column.to_numpy('float64').round(6)
+
+
+def build_seasonal_index(df):
+    """Indexa um DataFrame sazonal por (serviço, mês) e por serviço
+
+    Uma única ordenação por (serviço na ordem do arquivo, mês) deixa as linhas de cada serviço
+    contíguas; a consulta por (serviço, mês) é uma tabela densa serviços × meses.
+    """
+    import numpy as np
+    import pandas as pd
+
+    codes, services = pd.factorize(df['Servico'], sort=False)
+    months = df['Mes'].to_numpy('int64')
+    order = np.lexsort((months, codes))
+    if (order[1:] < order[:-1]).any():
+        df = df.take(order).reset_index(drop=True)
+        codes, months = codes[order], months[order]
+    bounds = np.searchsorted(codes, np.arange(len(services) + 1))
+
+    # Linhas sem serviço ou com mês fora de 1-12 não entram na consulta (como no groupby por serviço)
+    monthly = np.full((len(services), 13, 2), np.nan, dtype=np.float32)
+    valid = (codes >= 0) & (months >= 1) & (months <= 12)
+    monthly[codes[valid], months[valid], 0] = df['Media'].to_numpy('float32')[valid]
+    monthly[codes[valid], months[valid], 1] = df['Desvio_padrao'].to_numpy('float32')[valid]
+
+    return SeasonalIndex(frame=df, by_service=ServicePartitions(df, list(services), bounds), monthly=monthly)
+
+
+def columnar_cache_path(path):
+    """Caminho do cache Parquet gerado ao lado do CSV de origem"""
+    return os.path.splitext(path)[0] + '.cache.parquet'
+
+
+def read_seasonal_frame(path=DATA_PATH, columnar=True):
+    """Lê os dados sazonais com tipos compactos
+
+    Arquivos .parquet são lidos diretamente. Para CSV, com `columnar=True` e pyarrow
+    disponível, um cache Parquet é gerado na primeira leitura e reutilizado (memory-mapped)
+    até a assinatura do CSV mudar; sem pyarrow, o CSV é lido com os mesmos tipos compactos.
+    """
+    # pandas só é importado quando há dados para ler (mantém `import dataset` leve)
+    import pandas as pd
+
+    if path.endswith('.parquet'):
+        return pd.read_parquet(path, memory_map=True).astype(COMPACT_DTYPES)
+
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        columnar = False
+    if not columnar:
+        return pd.read_csv(path, dtype=COMPACT_DTYPES)
+
+    cache_path = columnar_cache_path(path)
+    signature = json.dumps(file_signature(path)).encode()
+    try:
+        if pq.read_schema(cache_path).metadata.get(b'source_signature') == signature:
+            return pd.read_parquet(cache_path, memory_map=True)
+    except (OSError, pa.ArrowException):
+        pass
+
+    frame = pd.read_csv(path, dtype=COMPACT_DTYPES, engine='pyarrow')
+    table = pa.Table.from_pandas(frame, preserve_index=False)
+    table = table.replace_schema_metadata({**table.schema.metadata, b'source_signature': signature})
+    try:
+        # Grava em arquivo temporário único (várias threads do mesmo processo podem gravar ao mesmo
+        # tempo) e troca de forma atômica: leitores concorrentes nunca veem meio arquivo
+        descriptor, temporary_path = temporary_file(cache_path)
+        os.close(descriptor)
+        try:
+            pq.write_table(table, temporary_path)
+            os.replace(temporary_path, cache_path)
+        except BaseException:
+            os.unlink(temporary_path)
+            raise
+    except OSError:
+        pass
+    return frame
+
+
+def read_seasonal_index(path=DATA_PATH, columnar=True):
+    """Lê os dados sazonais e devolve o índice pronto para uso"""
+    return build_seasonal_index(read_seasonal_frame(path, columnar))
@@ -0,0 +1,183 @@
+"""Medição de tempo por etapa (spans) com agregados por sessão e por processo
+
+Uso:
+    with span('pricing'):
+        result = calculate_promotion(...)
+
+Desligado (padrão), `span` devolve um contexto nulo compartilhado: o custo é uma checagem de
+flag e a leitura de uma ContextVar. Ligado pela variável de ambiente LIVING_SPA_TIMING=1 (todo o
+processo) ou por sessão (`activate_session`), cada span soma sua duração ao agregado do processo
+e ao da sessão ativa e emite uma linha JSON no logger 'living_spa.timing'.
+"""
+import contextvars
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+
+# Variável de ambiente que liga a medição para todo o processo
+ENV_VAR = 'LIVING_SPA_TIMING'
+
+# Amostras mais recentes guardadas por etapa para os percentis
+SAMPLE_SIZE = 1024
+
+logger = logging.getLogger('living_spa.timing')
+
+
+class StageTimings:
+    """Agregado de durações por etapa: contagem e máximo exatos, p50/p95 sobre as últimas amostras"""
+
+    def __init__(self, label=None, sample_size=SAMPLE_SIZE):
+        self.label = label
+        self.sample_size = sample_size
+        self._stages = {}
+        self._lock = threading.Lock()
+
+    def record(self, stage, seconds):
+        with self._lock:
+            entry = self._stages.get(stage)
+            if entry is None:
+                entry = self._stages[stage] = [0, 0.0, deque(maxlen=self.sample_size)]
+            entry[0] += 1
+            entry[1] = max(entry[1], seconds)
+            entry[2].append(seconds)
+
+    def summary(self):
+        """Retorna {etapa: {'count', 'p50_ms', 'p95_ms', 'max_ms'}} na ordem da primeira medição"""
+        with self._lock:
+            entries = {stage: (count, maximum, sorted(samples))
+                       for stage, (count, maximum, samples) in self._stages.items()}
+        return {
+            stage: {
+                'count': count,
+                'p50_ms': _percentile(samples, 50) * 1e3,
+                'p95_ms': _percentile(samples, 95) * 1e3,
+                'max_ms': maximum * 1e3,
+            }
+            for stage, (count, maximum, samples) in entries.items()
+        }
+
+    def clear(self):
+        with self._lock:
+            self._stages.clear()
+
+
+def _percentile(sorted_samples, p):
+    # Percentil pelo posto mais próximo (sem numpy: este módulo é importado pelo núcleo)
+    rank = max(-(-p * len(sorted_samples) // 100), 1)
+    return sorted_samples[rank - 1]
+
+
+# Agregado do processo (compartilhado por todas as sessões e threads)
+PROCESS_TIMINGS = StageTimings(label='process')
+
+_enabled = os.environ.get(ENV_VAR, '') not in ('', '0')
+_session = contextvars.ContextVar('stage_timings_session', default=None)
+
+
+class _NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ('stage', 'session', 'started')
+
+    def __init__(self, stage, session):
+        self.stage = stage
+        self.session = session
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        _record(self.stage, time.perf_counter() - self.started, self.session,
+                exc_info[0].__name__ if exc_info[0] is not None else None)
+        return False
+
+
+def _record(stage, seconds, session, error=None):
+    PROCESS_TIMINGS.record(stage, seconds)
+    if session is not None:
+        session.record(stage, seconds)
+    if logger.isEnabledFor(logging.INFO):
+        logger.info(json.dumps({
+            'event': 'stage_timing',
+            'stage': stage,
+            'duration_ms': round(seconds * 1e3, 3),
+            'session': session.label if session is not None else None,
+            'pid': os.getpid(),
+            'error': error,
+        }))
+
+
+def span(stage):
+    """Contexto que mede a etapa `stage` (nulo quando a medição está desligada)"""
+    session = _session.get()
+    if not _enabled and session is None:
+        return _NULL_SPAN
+    return _Span(stage, session)
+
+
+def record(stage, seconds, error=None):
+    """Registra uma duração medida fora de um span (ex.: em outro processo), se a medição está ligada"""
+    session = _session.get()
+    if _enabled or session is not None:
+        _record(stage, seconds, session, error)
+
+
+def enable(enabled=True):
+    """Liga ou desliga a medição para todo o processo"""
+    global _enabled
+    _enabled = enabled
+    if enabled:
+        configure_json_logging()
+
+
+def is_enabled():
+    return _enabled
+
+
+def configure_json_logging(stream=None):
+    """Emite as linhas JSON dos spans em stderr, se ninguém configurou o logger antes"""
+    if not logger.handlers:
+        handler = logging.StreamHandler(stream)
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+
+
+def activate_session(timings):
+    """Define o agregado da sessão que recebe os spans desta thread (None desativa)"""
+    if timings is not None:
+        configure_json_logging()
+    _session.set(timings)
+
+
+def bind_session(function, timings):
+    """Envolve `function` para que os spans dela contem na sessão, mesmo rodando em outra thread"""
+    if timings is None:
+        return function
+
+    def bound(*args, **kwargs):
+        token = _session.set(timings)
+        try:
+            return function(*args, **kwargs)
+        finally:
+            _session.reset(token)
+
+    return bound
+
+
+if _enabled:
+    configure_json_logging()
@@ -0,0 +1,189 @@
+"""Previsão de demanda mensal por Holt-Winters aditivo, vetorizada sobre todos os serviços
+
+O histórico são as contagens mensais por serviço do estado da ingestão (ingestion.py). Cada
+série tem nível, tendência e sazonalidade de 12 meses; os parâmetros de suavização (alfa, beta,
+gama) são escolhidos por serviço em uma grade, pelo menor erro quadrático de um passo. A grade
+inteira e todos os serviços avançam juntos em arrays (grade × serviços): o laço em Python é só
+sobre os meses do histórico.
+
+A previsão dos próximos 12 meses sai no mesmo esquema de dados_sazonais.csv (Media = demanda
+prevista, Desvio_padrao = desvio do erro de previsão naquele horizonte), pronta para o motor de
+precificação e para a simulação.
+"""
+from typing import NamedTuple
+
+import numpy as np
+
+from dataset import build_seasonal_index
+
+SEASON_LENGTH = 12
+
+# Grade de parâmetros de suavização avaliada para cada serviço
+ALPHAS = (0.05, 0.1, 0.2, 0.3, 0.5, 0.7)
+BETAS = (0.0, 0.01, 0.05, 0.1, 0.2)
+GAMMAS = (0.05, 0.1, 0.2, 0.3, 0.5)
+
+# Serviços ajustados por vez (limita a memória dos estados grade × serviços × 12)
+CHUNK_SIZE = 1024
+
+# Nível do intervalo de previsão exibido e o quantil correspondente da normal
+INTERVAL_LEVEL = 0.8
+INTERVAL_Z = 1.2816
+
+
+class MonthlyHistory(NamedTuple):
+    """Contagens mensais (serviços × meses consecutivos) a partir de `start` = (ano, mês)"""
+    services: list
+    start: tuple
+    counts: np.ndarray
+
+    @property
+    def end(self):
+        """(ano, mês) do último mês do histórico"""
+        return _period(_ordinal(*self.start) + self.counts.shape[1] - 1)
+
+
+class DemandForecast(NamedTuple):
+    """Previsão dos próximos 12 meses por serviço (arrays serviços × horizonte)"""
+    services: list
+    last_period: tuple
+    demand: np.ndarray
+    std_dev: np.ndarray
+    params: np.ndarray
+    residual_std: np.ndarray
+    index: object
+
+    def period(self, month):
+        """(ano, mês) da próxima ocorrência de `month` depois do histórico"""
+        return _period(_ordinal(*self.last_period) + self.horizon(month))
+
+    def horizon(self, month):
+        """Meses à frente do fim do histórico até a próxima ocorrência de `month` (1 a 12)"""
+        return (month - self.last_period[1] - 1) % SEASON_LENGTH + 1
+
+    def interval(self, service, month, z=INTERVAL_Z):
+        """Intervalo de previsão (inferior, superior) da demanda do serviço no mês, sem valores negativos"""
+        demand, std_dev = self.index.get(service, month)
+        return max(demand - z * std_dev, 0.0), demand + z * std_dev
+
+
+def _ordinal(year, month):
+    return year * 12 + month - 1
+
+
+def _period(ordinal):
+    return ordinal // 12, ordinal % 12 + 1
+
+
+def history_from_counts(counts):
+    """Monta o histórico a partir de {(serviço, ano, mês): contagem} (como SeasonalStats.counts)
+
+    Meses sem registro entre o primeiro e o último do histórico contam como zero atendimentos.
+    """
+    if not counts:
+        return None
+    services = sorted({service for service, _, _ in counts})
+    rows = {service: row for row, service in enumerate(services)}
+    keys = list(counts)
+    ordinals = np.array([_ordinal(year, month) for _, year, month in keys])
+    first = int(ordinals.min())
+    matrix = np.zeros((len(services), int(ordinals.max()) - first + 1))
+    matrix[[rows[service] for service, _, _ in keys], ordinals - first] = list(counts.values())
+    return MonthlyHistory(services, _period(first), matrix)
+
+
+def load_history(paths):
+    """Lê e soma os históricos de um ou mais estados da ingestão (ex.: todas as filiais)"""
+    from ingestion import SeasonalStats
+    counts = {}
+    for path in paths:
+        for key, count in SeasonalStats.load(path).counts.items():
+            counts[key] = counts.get(key, 0) + count
+    return history_from_counts(counts)
+
+
+def _initial_state(counts, m):
+    # Nível = média da primeira temporada; tendência = variação média entre as duas primeiras
+    # temporadas (zero se só há uma); sazonalidade = primeira temporada em torno do nível
+    level = counts[:, :m].mean(axis=1)
+    if counts.shape[1] >= 2 * m:
+        trend = (counts[:, m:2 * m].mean(axis=1) - level) / m
+    else:
+        trend = np.zeros_like(level)
+    season = counts[:, :m] - level[:, None]
+    return level, trend, season
+
+
+def _fit_chunk(counts, alphas, betas, gammas, m, horizon):
+    services, periods = counts.shape
+    level0, trend0, season0 = _initial_state(counts, m)
+    level = np.broadcast_to(level0, (alphas.size, services)).copy()
+    trend = np.broadcast_to(trend0, (alphas.size, services)).copy()
+    season = np.broadcast_to(season0, (alphas.size, services, m)).copy()
+    alpha, beta, gamma = alphas[:, None], betas[:, None], gammas[:, None]
+    sse = np.zeros((alphas.size, services))
+
+    for t in range(periods):
+        phase = t % m
+        observed = counts[:, t]
+        seasonal = season[:, :, phase]
+        error = observed - (level + trend + seasonal)
+        if t >= m:
+            # A primeira temporada serve de inicialização e não entra no erro
+            sse += error ** 2
+        new_level = alpha * (observed - seasonal) + (1 - alpha) * (level + trend)
+        trend = beta * (new_level - level) + (1 - beta) * trend
+        season[:, :, phase] = gamma * (observed - new_level) + (1 - gamma) * seasonal
+        level = new_level
+
+    best = sse.argmin(axis=0)
+    columns = np.arange(services)
+    level, trend, season = level[best, columns], trend[best, columns], season[best, columns]
+    alpha, beta, gamma = alphas[best], betas[best], gammas[best]
+    residual_std = np.sqrt(sse[best, columns] / (periods - m))
+
+    steps = np.arange(1, horizon + 1)
+    phases = (periods + steps - 1) % m
+    demand = level[:, None] + steps * trend[:, None] + season[:, phases]
+
+    # Variância do erro h passos à frente: σ²·(1 + Σ_{j<h} c_j²), c_j = α(1 + jβ) + γ·[j múltiplo de m]
+    j = steps[:-1]
+    c = alpha[:, None] * (1 + j * beta[:, None]) + gamma[:, None] * (j % m == 0)
+    spread = np.concatenate([np.zeros((services, 1)), np.cumsum(c ** 2, axis=1)], axis=1)
+    std_dev = residual_std[:, None] * np.sqrt(1 + spread)
+
+    return np.maximum(demand, 0.0), std_dev, np.stack([alpha, beta, gamma], axis=1), residual_std
+
+
+def forecast_demand(history, season_length=SEASON_LENGTH, alphas=ALPHAS, betas=BETAS, gammas=GAMMAS,
+                    chunk_size=CHUNK_SIZE):
+    """Ajusta Holt-Winters aditivo a todos os serviços do histórico e prevê os próximos 12 meses
+
+    Retorna None se o histórico tem menos de uma temporada e dois meses (sem erro para avaliar
+    a grade). `index` é um SeasonalIndex com a previsão no esquema de dados_sazonais.csv, com
+    cada mês na sua próxima ocorrência após o fim do histórico.
+    """
+    if history is None or history.counts.shape[1] < season_length + 2:
+        return None
+    grid = np.array([(a, b, g) for a in alphas for b in betas for g in gammas], dtype=np.float64).T
+    counts = history.counts.astype(np.float64)
+
+    parts = [_fit_chunk(counts[start:start + chunk_size], *grid, season_length, season_length)
+             for start in range(0, counts.shape[0], chunk_size)]
+    demand, std_dev, params, residual_std = (np.concatenate(arrays) for arrays in zip(*parts))
+
+    last_period = history.end
+    months = [(last_period[1] + step - 1) % 12 + 1 for step in range(1, season_length + 1)]
+    index = build_seasonal_index(_forecast_frame(history.services, months, demand, std_dev))
+    return DemandForecast(history.services, last_period, demand, std_dev, params, residual_std, index)
+
+
+def _forecast_frame(services, months, demand, std_dev):
+    import pandas as pd
+    service_count, horizon = demand.shape
+    return pd.DataFrame({
+        'Mes': np.tile(np.array(months, dtype=np.int8), service_count),
+        'Servico': pd.Categorical(np.repeat(np.array(services, dtype=object), horizon), categories=services),
+        'Media': demand.ravel().astype(np.float32),
+        'Desvio_padrao': std_dev.ravel().astype(np.float32),
+    })
@@ -0,0 +1,204 @@
+"""Ingestão incremental de atendimentos brutos nas estatísticas sazonais (Media / Desvio_padrao)
+
+Cada atendimento (data, serviço) incrementa a contagem do seu (serviço, ano, mês). A média e o
+desvio padrão por (serviço, mês) são mantidos por Welford sobre essas contagens mensais: quando
+uma contagem muda, a observação antiga é trocada pela nova em O(1). Assim, novos dias custam
+O(linhas novas) e estados parciais de workers diferentes se combinam sem reler os dados.
+Cada arquivo deve ser incorporado uma única vez (o estado não guarda quais linhas já viu).
+
+Exemplo:
+    python ingestion.py atendimentos_2024.csv atendimentos_2025.csv --state ingestao.json --output dados_sazonais.csv
+"""
+import argparse
+import json
+import math
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from dataset import DATA_PATH, STATE_PATH, temporary_file
+
+# Colunas padrão dos registros brutos
+DATE_COLUMN = 'Data'
+SERVICE_COLUMN = 'Servico'
+
+
+class SeasonalStats:
+    """Estado incremental: contagens por (serviço, ano, mês) e momentos por (serviço, mês)
+
+    Meses sem nenhum atendimento de um serviço, dentro do período já observado, entram como
+    contagem zero (senão a média ficaria inflada).
+    """
+
+    def __init__(self):
+        self.counts = {}
+        self.moments = {}
+        self.services = set()
+        self.periods = set()
+
+    # ----- Welford: inclusão e troca de uma observação -----
+
+    def _add_observation(self, key, value):
+        n, mean, m2 = self.moments.get(key, (0, 0.0, 0.0))
+        n += 1
+        delta = value - mean
+        mean += delta / n
+        m2 += delta * (value - mean)
+        self.moments[key] = (n, mean, m2)
+
+    def _replace_observation(self, key, old, new):
+        n, mean, m2 = self.moments[key]
+        new_mean = mean + (new - old) / n
+        m2 += (new - old) * (new - new_mean + old - mean)
+        self.moments[key] = (n, new_mean, max(m2, 0.0))
+
+    # ----- contagens -----
+
+    def _register(self, service, year, month):
+        if (year, month) not in self.periods:
+            self.periods.add((year, month))
+            for known in self.services:
+                self.counts[(known, year, month)] = 0
+                self._add_observation((known, month), 0)
+        if service not in self.services:
+            self.services.add(service)
+            for period_year, period_month in self.periods:
+                self.counts[(service, period_year, period_month)] = 0
+                self._add_observation((service, period_month), 0)
+
+    def add_count(self, service, year, month, count):
+        """Soma `count` atendimentos ao (serviço, ano, mês)"""
+        self._register(service, year, month)
+        key = (service, year, month)
+        old = self.counts[key]
+        self.counts[key] = old + count
+        if count:
+            self._replace_observation((service, month), old, old + count)
+
+    def update(self, chunk, date_column=DATE_COLUMN, service_column=SERVICE_COLUMN, dayfirst=True):
+        """Incorpora um bloco de registros brutos (DataFrame com data e serviço)"""
+        import pandas as pd
+        dates = pd.to_datetime(chunk[date_column], dayfirst=dayfirst)
+        buckets = pd.DataFrame({
+            'service': chunk[service_column].to_numpy(),
+            'year': dates.dt.year.to_numpy(),
+            'month': dates.dt.month.to_numpy(),
+        }).value_counts(sort=False)
+        for (service, year, month), count in buckets.items():
+            self.add_count(service, int(year), int(month), int(count))
+        return self
+
+    def merge(self, other):
+        """Combina o estado parcial de outro worker (custo proporcional ao número de meses, não de linhas)"""
+        for (service, year, month), count in other.counts.items():
+            self.add_count(service, year, month, count)
+        return self
+
+    # ----- resultado -----
+
+    def to_frame(self):
+        """Estatísticas no esquema de dados_sazonais.csv (desvio padrão amostral)"""
+        import pandas as pd
+        rows = []
+        for (service, month), (n, mean, m2) in self.moments.items():
+            std_dev = math.sqrt(m2 / (n - 1)) if n > 1 else 0.0
+            rows.append((month, service, round(mean, 2), round(std_dev, 2)))
+        # Mesma ordem do arquivo original: serviço e depois mês
+        rows.sort(key=lambda row: (row[1], row[0]))
+        return pd.DataFrame(rows, columns=['Mes', 'Servico', 'Media', 'Desvio_padrao'])
+
+    def write_csv(self, path=DATA_PATH):
+        """Grava as estatísticas de forma atômica (o cache do dashboard detecta a mudança do arquivo)"""
+        frame = self.to_frame()
+        descriptor, temporary_path = temporary_file(path)
+        try:
+            with os.fdopen(descriptor, 'w', encoding='utf-8', newline='') as file:
+                frame.to_csv(file, index=False)
+            os.replace(temporary_path, path)
+        except BaseException:
+            os.unlink(temporary_path)
+            raise
+
+    # ----- persistência do estado -----
+
+    def to_json(self):
+        return {
+            'counts': [[service, year, month, count] for (service, year, month), count in self.counts.items()],
+            'moments': [[service, month, n, mean, m2] for (service, month), (n, mean, m2) in self.moments.items()],
+        }
+
+    @classmethod
+    def from_json(cls, data):
+        stats = cls()
+        for service, year, month, count in data['counts']:
+            stats.counts[(service, year, month)] = count
+            stats.services.add(service)
+            stats.periods.add((year, month))
+        for service, month, n, mean, m2 in data['moments']:
+            stats.moments[(service, month)] = (n, mean, m2)
+        return stats
+
+    @classmethod
+    def load(cls, path):
+        if not os.path.exists(path):
+            return cls()
+        with open(path, encoding='utf-8') as file:
+            return cls.from_json(json.load(file))
+
+    def save(self, path):
+        # Arquivo temporário único: sessões do dashboard no mesmo processo podem gravar juntas
+        descriptor, temporary_path = temporary_file(path)
+        try:
+            with os.fdopen(descriptor, 'w', encoding='utf-8') as file:
+                json.dump(self.to_json(), file, ensure_ascii=False)
+            os.replace(temporary_path, path)
+        except BaseException:
+            os.unlink(temporary_path)
+            raise
+
+
+def ingest_file(path, date_column=DATE_COLUMN, service_column=SERVICE_COLUMN, chunk_size=500_000, dayfirst=True):
+    """Lê um arquivo de atendimentos em blocos (memória limitada) e retorna o estado parcial"""
+    import pandas as pd
+    stats = SeasonalStats()
+    for chunk in pd.read_csv(path, usecols=[date_column, service_column], chunksize=chunk_size):
+        stats.update(chunk, date_column, service_column, dayfirst)
+    return stats
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Atualiza Media/Desvio_padrao a partir de atendimentos brutos.")
+    parser.add_argument('files', nargs='+', help="arquivos CSV de atendimentos (uma linha por atendimento)")
+    parser.add_argument('--state', default=STATE_PATH, help="estado incremental (lido e regravado)")
+    parser.add_argument('--output', '-o', default=DATA_PATH, help="CSV sazonal gerado")
+    parser.add_argument('--date-column', default=DATE_COLUMN, help="coluna com a data do atendimento")
+    parser.add_argument('--service-column', default=SERVICE_COLUMN, help="coluna com o nome do serviço")
+    parser.add_argument('--month-first', action='store_true', help="datas no formato mês/dia (padrão: dia/mês)")
+    parser.add_argument('--chunk-size', type=int, default=500_000, help="linhas lidas por bloco")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help="processos (um arquivo por vez)")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    started = time.perf_counter()
+
+    stats = SeasonalStats.load(args.state)
+    options = (args.date_column, args.service_column, args.chunk_size, not args.month_first)
+    if args.workers <= 1 or len(args.files) <= 1:
+        for path in args.files:
+            stats.merge(ingest_file(path, *options))
+    else:
+        with ProcessPoolExecutor(max_workers=min(args.workers, len(args.files))) as pool:
+            for partial in pool.map(ingest_file, args.files, *[[option] * len(args.files) for option in options]):
+                stats.merge(partial)
+
+    stats.save(args.state)
+    stats.write_csv(args.output)
+    print(f"{len(args.files)} arquivo(s) incorporados; {len(stats.moments)} pares serviço × mês gravados em "
+          f"{args.output} em {time.perf_counter() - started:.2f}s", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
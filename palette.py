@@ -0,0 +1,12 @@
+# Cores da Paleta Living Spa
+VERDE_SALVIA = "#98A869"
+VERDE_MUSGO = "#6D7649"
+BEGE_NEUTRO = "#E6D6CC"
+CREME_SUAVE = "#FAFFE7"
+MARROM_TERRA = "#A39384"
+BRANCO_PURO = "#FFFFFF"
+VERDE_OLIVA_ESCURO = "#3B3418"
+
+# Cores para o gráfico (vibrantes e destacadas)
+COR_SEM_PROMO = "#E74C3C"  # Vermelho vibrante
+COR_COM_PROMO = "#27AE60"  # Verde vibrante
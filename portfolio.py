@@ -0,0 +1,227 @@
+"""Portfólio de promoções: quais serviços × meses promover, e a que preço, dentro da capacidade
+
+Cada serviço × mês pode ficar no preço original (demanda média) ou entrar em promoção a um dos
+preços candidatos, com a demanda esperada dada pelo modelo de elasticidade de pricing.py. Uma
+promoção rende o lucro esperado acima do preço original e consome as horas de terapeuta dos
+atendimentos a mais que ela traz, somadas às horas da demanda de base de todos os serviços.
+
+A capacidade é em horas de terapeuta por mês, então os meses são independentes: cada um é uma
+mochila de múltipla escolha (no máximo um preço por serviço) resolvida de forma exata por
+programação dinâmica sobre as horas livres. Todos os meses e preços avançam juntos em arrays; o
+laço em Python é só sobre os serviços.
+
+O consumo de cada promoção é arredondado para cima em passos de `step_minutes`: o plano escolhido
+sempre cabe nas horas reais e é ótimo para os consumos arredondados. O número de passos é limitado
+por MAX_STEPS e pela memória da tabela de escolhas (MAX_CHOICE_BYTES); acima disso o passo cresce.
+"""
+from typing import NamedTuple
+
+import numpy as np
+
+from dataset import session_minutes, stat_values
+from pricing import calculate_promotion, expected_demand, optimal_promotional_price
+
+# Preços promocionais candidatos avaliados por serviço × mês (além do preço ótimo sem capacidade)
+CANDIDATE_COUNT = 10
+
+# Resolução da capacidade na programação dinâmica, em minutos de terapeuta
+STEP_MINUTES = 10
+
+# Passos de capacidade por mês; com mais horas livres que isso, o passo aumenta
+MAX_STEPS = 4096
+
+# Teto da tabela de escolhas da DP (serviços × meses × passos, guardada para reconstruir o plano);
+# catálogos grandes usam menos passos, e portanto passos maiores
+MAX_CHOICE_BYTES = 64 * 1024 * 1024
+
+
+class PromotionPortfolio(NamedTuple):
+    """Promoções escolhidas (por serviço × mês), uso da capacidade por mês e o ganho total"""
+    plan: object
+    months: object
+    total_gain: float
+
+    @property
+    def promotions(self):
+        """Linhas do plano que entram em promoção"""
+        return self.plan[self.plan['promoted']]
+
+
+def candidate_prices(original_price, service_cost, commission_percentage, count=CANDIDATE_COUNT):
+    """`count` preços igualmente espaçados entre o ponto de margem zero e o preço original (exclusive)"""
+    margin_rate = 1 - commission_percentage / 100
+    low = min(max(service_cost / margin_rate, 0.0), original_price) if margin_rate > 0 else original_price
+    return np.linspace(low, original_price, count + 2)[1:-1]
+
+
+def _capacity_minutes(capacity_hours):
+    # Escalar (todo mês) ou {mês: horas} -> minutos por mês, Janeiro a Dezembro
+    if isinstance(capacity_hours, dict):
+        hours = [capacity_hours.get(month, 0.0) for month in range(1, 13)]
+    else:
+        hours = np.broadcast_to(np.asarray(capacity_hours, dtype=np.float64), (12,))
+    return np.asarray(hours, dtype=np.float64) * 60
+
+
+def _efficient_options(weights, gains):
+    """Descarta as opções dominadas (outra consome no máximo o mesmo e ganha pelo menos o mesmo)
+
+    Retorna (pesos, ganhos, índice original) com as opções restantes de cada serviço × mês no
+    início do último eixo, que fica do tamanho da maior lista restante (sobras com ganho -inf).
+    """
+    # Por consumo crescente (e ganho decrescente no empate), uma opção só vale se ganha mais que
+    # todas as mais leves; "sem promoção" é a mais leve de todas, com ganho zero
+    order = np.lexsort((-gains, weights), axis=-1)
+    weights = np.take_along_axis(weights, order, axis=-1)
+    gains = np.take_along_axis(gains, order, axis=-1)
+    lighter = np.maximum.accumulate(np.concatenate([np.zeros(gains.shape[:-1] + (1,)), gains[..., :-1]], axis=-1),
+                                    axis=-1)
+    efficient = gains > lighter
+
+    # Opções eficientes primeiro, na ordem de consumo
+    front = np.argsort(~efficient, axis=-1, kind='stable')[..., :max(int(efficient.sum(axis=-1).max()), 1)]
+    efficient = np.take_along_axis(efficient, front, axis=-1)
+    return (np.where(efficient, np.take_along_axis(weights, front, axis=-1), 0),
+            np.where(efficient, np.take_along_axis(gains, front, axis=-1), -np.inf),
+            np.take_along_axis(order, front, axis=-1))
+
+
+def _solve(weights, gains, capacity):
+    """Mochila de múltipla escolha por mês: weights/gains (serviços × meses × opções), capacity por mês
+
+    Opções com ganho -inf não podem ser escolhidas. Retorna a opção escolhida por serviço × mês
+    (-1 = sem promoção).
+    """
+    # Meses em que a melhor opção de cada serviço cabe toda junto dispensam a DP
+    best_option = gains.argmax(axis=-1)
+    best_gain = np.take_along_axis(gains, best_option[..., None], axis=-1)[..., 0]
+    chosen = np.where(best_gain > 0, best_option, -1)
+    best_weight = np.where(chosen >= 0, np.take_along_axis(weights, best_option[..., None], axis=-1)[..., 0], 0)
+    tight = best_weight.sum(axis=0) > capacity
+    if tight.any():
+        chosen[:, tight] = _knapsack(weights[:, tight], gains[:, tight], capacity[tight])
+    return chosen
+
+
+def _knapsack(weights, gains, capacity):
+    # Programação dinâmica sobre a capacidade, com todos os meses e opções de um serviço por vez
+    weights, gains, original = _efficient_options(weights, gains)
+    services, months, options = weights.shape
+    size = int(capacity.max()) + 1
+    best = np.zeros((months, size))
+    choice = np.zeros((services, months, size), dtype=np.min_scalar_type(options))
+    columns = np.arange(size)
+    rows = np.arange(months)[:, None, None]
+
+    for service in range(services):
+        # Lucro com esta promoção = melhor lucro dos serviços anteriores na capacidade que sobra
+        remaining = columns - weights[service][:, :, None]
+        values = np.where(remaining >= 0, best[rows, np.maximum(remaining, 0)] + gains[service][:, :, None],
+                          -np.inf)
+        option = values.argmax(axis=1)
+        top = np.take_along_axis(values, option[:, None, :], axis=1)[:, 0]
+        improved = top > best
+        choice[service] = np.where(improved, option + 1, 0)
+        best = np.where(improved, top, best)
+
+    chosen = np.full((services, months), -1)
+    for month in range(months):
+        used = int(capacity[month])
+        for service in reversed(range(services)):
+            option = int(choice[service, month, used]) - 1
+            if option >= 0:
+                chosen[service, month] = original[service, month, option]
+                used -= weights[service, month, option]
+    return chosen
+
+
+def optimize_portfolio(frame, original_price, service_cost, commission_percentage, desired_profit_increase,
+                       elasticity, capacity_hours, model='constant', prices=None, minutes=None,
+                       step_minutes=STEP_MINUTES):
+    """Escolhe as promoções (serviço × mês × preço) de maior lucro total dentro das horas de terapeuta
+
+    `frame` é o DataFrame sazonal (Mes, Servico, Media, Desvio_padrao), como em annual_plan.
+    `capacity_hours` são as horas de terapeuta disponíveis por mês: um escalar ou {mês: horas}.
+    `prices` são os preços promocionais candidatos (padrão: candidate_prices mais o preço ótimo de
+    optimal_promotional_price) e `minutes` mapeia serviço -> duração do atendimento (padrão: lida
+    do nome do serviço).
+
+    `plan` traz uma linha por (Servico, Mes) com o preço escolhido (o original se não há promoção),
+    demanda esperada, horas, lucro esperado, ganho sobre o preço original e, nas promoções, a
+    quantidade necessária para a meta de lucro; `months` traz a capacidade e o uso de cada mês.
+    Meses cuja demanda de base já passa da capacidade ficam sem promoções.
+    """
+    import pandas as pd
+
+    margin_rate = 1 - commission_percentage / 100
+    if prices is None:
+        optimum = optimal_promotional_price(1.0, original_price, service_cost, commission_percentage,
+                                            elasticity, model, size=2)
+        prices = np.append(candidate_prices(original_price, service_cost, commission_percentage), optimum.price)
+    prices = np.unique(np.asarray(prices, dtype=np.float64))
+    prices = prices[(prices > 0) & (prices < original_price)]
+    if not prices.size:
+        # Sem candidatos abaixo do preço original: a única opção (ganho zero) nunca é escolhida
+        prices = np.array([float(original_price)])
+
+    # Demanda média em uma matriz serviços × meses (zero onde o serviço não tem o mês)
+    codes, services = pd.factorize(frame['Servico'].astype(str))
+    month_index = frame['Mes'].to_numpy('int64') - 1
+    demand = np.zeros((len(services), 12))
+    demand[codes, month_index] = stat_values(frame['Media'])
+    minutes = minutes or {}
+    durations = np.array([minutes.get(service, session_minutes(service)) for service in services], dtype=np.float64)
+
+    # Cada opção: demanda, lucro e minutos a mais que o preço original (serviços × meses × preços)
+    baseline_profit = demand * (original_price * margin_rate - service_cost)
+    option_demand = expected_demand(demand[:, :, None], original_price, prices, elasticity, model)
+    gains = option_demand * (prices * margin_rate - service_cost) - baseline_profit[:, :, None]
+    extra_minutes = (option_demand - demand[:, :, None]) * durations[:, None, None]
+    valid = (gains > 0) & np.isfinite(extra_minutes) & (demand[:, :, None] > 0)
+
+    baseline_minutes = (demand * durations[:, None]).sum(axis=0)
+    capacity_minutes = _capacity_minutes(capacity_hours)
+    free_minutes = np.maximum(capacity_minutes - baseline_minutes, 0)
+
+    # A DP só precisa ir até o menor entre as horas livres e o consumo de todas as promoções juntas
+    largest = np.where(valid, extra_minutes, 0).max(axis=2).sum(axis=0)
+    choice_bytes = max(len(services), 1) * 12 * np.min_scalar_type(prices.size).itemsize
+    max_steps = max(min(MAX_STEPS, MAX_CHOICE_BYTES // choice_bytes - 1), 1)
+    step = max(step_minutes, float(np.minimum(free_minutes, largest).max()) / max_steps)
+    weights = np.ceil(np.where(valid, extra_minutes, 0) / step - 1e-9).astype(np.int64)
+    capacity = np.floor(free_minutes / step + 1e-9).astype(np.int64)
+    capacity = np.minimum(capacity, weights.max(axis=2).sum(axis=0))
+    chosen = _solve(weights, np.where(valid & (weights <= capacity[None, :, None]), gains, -np.inf), capacity)
+
+    promoted = chosen >= 0
+    option = np.maximum(chosen, 0)[:, :, None]
+    pick = lambda values: np.where(promoted, np.take_along_axis(values, option, axis=2)[:, :, 0], 0.0)
+    price = np.where(promoted, prices[np.maximum(chosen, 0)], original_price)
+    final_demand = np.where(promoted, pick(option_demand), demand)
+    gain = pick(gains)
+    goal = calculate_promotion(demand, original_price, price, service_cost, commission_percentage,
+                               desired_profit_increase)
+    required = np.where(promoted & goal.feasible, goal.required_quantity, np.nan)
+
+    rows = codes, month_index
+    plan = frame[['Servico', 'Mes']].assign(
+        Media=demand[rows],
+        promoted=promoted[rows],
+        price=price[rows],
+        expected_demand=final_demand[rows],
+        hours=(final_demand * durations[:, None] / 60)[rows],
+        profit=(baseline_profit + gain)[rows],
+        gain=gain[rows],
+        required_quantity=required[rows],
+        meets_goal=(promoted & (final_demand >= required))[rows],
+    ).set_index(['Servico', 'Mes']).sort_index()
+
+    months = pd.DataFrame({
+        'capacity_hours': capacity_minutes / 60,
+        'baseline_hours': baseline_minutes / 60,
+        'promo_hours': pick(extra_minutes).sum(axis=0) / 60,
+        'promotions': promoted.sum(axis=0),
+        'gain': gain.sum(axis=0),
+    }, index=pd.Index(range(1, 13), name='Mes'))
+    months['used_hours'] = months['baseline_hours'] + months['promo_hours']
+    return PromotionPortfolio(plan, months, float(gain.sum()))
@@ -0,0 +1,255 @@
+from typing import NamedTuple
+
+import numpy as np
+
+from dataset import stat_values
+
+# Quantidade usada quando a promoção não tem margem positiva por atendimento
+INFEASIBLE_QUANTITY = -1
+
+
+class PromotionResult(NamedTuple):
+    """Grandezas derivadas de um ou mais cenários de promoção (arrays com o shape do broadcast)"""
+    revenue_without_promo: np.ndarray
+    commission_without_promo: np.ndarray
+    total_service_cost_without_promo: np.ndarray
+    spa_revenue_without_promo: np.ndarray
+    desired_spa_revenue: np.ndarray
+    profit_per_promo_service: np.ndarray
+    required_quantity: np.ndarray
+    total_promo_revenue: np.ndarray
+    final_commission: np.ndarray
+    total_service_cost_with_promo: np.ndarray
+    spa_revenue_with_promo: np.ndarray
+    feasible: np.ndarray
+
+    def scalar(self):
+        """Converte um resultado de cenário único em escalares Python"""
+        return PromotionResult(*(np.asarray(value).item() for value in self))
+
+
+def calculate_promotion(demand, original_price, promotional_price, service_cost,
+                        commission_percentage, desired_profit_increase):
+    """Calcula a estratégia de promoção para todos os cenários de uma vez
+
+    Todos os parâmetros aceitam escalares ou arrays NumPy e seguem as regras de broadcast.
+    Quando o lucro por atendimento promocional é <= 0 a meta é inatingível: `feasible` fica
+    False, `required_quantity` recebe INFEASIBLE_QUANTITY e os totais com promoção viram NaN.
+    """
+    demand = np.asarray(demand, dtype=np.float64)
+    original_price = np.asarray(original_price, dtype=np.float64)
+    promotional_price = np.asarray(promotional_price, dtype=np.float64)
+    service_cost = np.asarray(service_cost, dtype=np.float64)
+    commission_decimal = np.asarray(commission_percentage, dtype=np.float64) / 100
+    profit_increase_decimal = np.asarray(desired_profit_increase, dtype=np.float64) / 100
+
+    # ===== CENÁRIO SEM PROMOÇÃO =====
+    revenue_without_promo = original_price * demand
+    commission_without_promo = commission_decimal * revenue_without_promo
+    total_service_cost_without_promo = service_cost * demand
+    spa_revenue_without_promo = revenue_without_promo - commission_without_promo - total_service_cost_without_promo
+
+    # ===== META DE LUCRO =====
+    desired_spa_revenue = spa_revenue_without_promo * (1 + profit_increase_decimal)
+
+    # ===== CENÁRIO COM PROMOÇÃO =====
+    profit_per_promo_service = promotional_price * (1 - commission_decimal) - service_cost
+    feasible = profit_per_promo_service > 0
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        # Equivale a int(meta / lucro_unitario) + 1, sem quantidades negativas
+        quantity = np.maximum(np.trunc(desired_spa_revenue / profit_per_promo_service) + 1, 0)
+        quantity = np.where(feasible, quantity, np.nan)
+        required_quantity = np.where(feasible, quantity, INFEASIBLE_QUANTITY).astype(np.int64)
+
+    total_promo_revenue = promotional_price * quantity
+    final_commission = total_promo_revenue * commission_decimal
+    total_service_cost_with_promo = service_cost * quantity
+    spa_revenue_with_promo = total_promo_revenue - final_commission - total_service_cost_with_promo
+
+    return PromotionResult(
+        revenue_without_promo=revenue_without_promo,
+        commission_without_promo=commission_without_promo,
+        total_service_cost_without_promo=total_service_cost_without_promo,
+        spa_revenue_without_promo=spa_revenue_without_promo,
+        desired_spa_revenue=desired_spa_revenue,
+        profit_per_promo_service=profit_per_promo_service,
+        required_quantity=required_quantity,
+        total_promo_revenue=total_promo_revenue,
+        final_commission=final_commission,
+        total_service_cost_with_promo=total_service_cost_with_promo,
+        spa_revenue_with_promo=spa_revenue_with_promo,
+        feasible=feasible,
+    )
+
+
+def promotion_grid(demand, original_price, service_cost, desired_profit_increase,
+                   price_range, commission_range, size=500):
+    """Avalia a promoção sobre uma grade preço promocional × comissão
+
+    Retorna (precos, comissoes, resultado), com o resultado no shape (len(comissoes), len(precos)):
+    cada linha é uma comissão e cada coluna um preço promocional.
+    """
+    promotional_prices = np.linspace(price_range[0], price_range[1], size)
+    commission_percentages = np.linspace(commission_range[0], commission_range[1], size)
+    result = calculate_promotion(demand, original_price, promotional_prices[np.newaxis, :], service_cost,
+                                 commission_percentages[:, np.newaxis], desired_profit_increase)
+    return promotional_prices, commission_percentages, result
+
+
+def annual_plan(frame, original_price, promotional_price, service_cost, commission_percentage,
+                desired_profit_increase):
+    """Plano anual: a promoção avaliada para todo serviço × mês dos dados sazonais de uma vez
+
+    `frame` é o DataFrame sazonal (Mes, Servico, Media, Desvio_padrao). Retorna o mesmo conteúdo
+    indexado por (Servico, Mes), com uma coluna para cada campo do PromotionResult.
+    """
+    demand = stat_values(frame['Media'])
+    result = calculate_promotion(demand, original_price, promotional_price, service_cost,
+                                 commission_percentage, desired_profit_increase)
+    plan = frame.assign(Media=demand, Desvio_padrao=stat_values(frame['Desvio_padrao']), **result._asdict())
+    return plan.set_index(['Servico', 'Mes']).sort_index()
+
+
+def plan_result(plan, service, month):
+    """PromotionResult escalar de um serviço × mês do plano anual (consulta, sem recálculo)"""
+    row = plan.loc[(service, month)]
+    return PromotionResult(*(np.asarray(row[name]).item() for name in PromotionResult._fields))
+
+
+def comparison_values(result):
+    """Organiza receita, comissão, custo e lucro sem e com promoção (gráficos da tela e do PDF)"""
+    categories = ['Receita', 'Comissão', 'Custo', 'Lucro']
+    sem_promo = [result.revenue_without_promo, result.commission_without_promo,
+                 result.total_service_cost_without_promo, result.spa_revenue_without_promo]
+    com_promo = [result.total_promo_revenue, result.final_commission,
+                 result.total_service_cost_with_promo, result.spa_revenue_with_promo]
+    return categories, sem_promo, com_promo
+
+
+# Modelos de resposta da demanda ao preço (elasticidade medida no preço original)
+DEMAND_MODELS = {
+    'constant': "Elasticidade constante",
+    'linear': "Linear",
+}
+
+
+class OptimalPrice(NamedTuple):
+    """Preço promocional que maximiza o lucro esperado e a curva lucro × preço avaliada"""
+    price: np.ndarray
+    demand: np.ndarray
+    profit: np.ndarray
+    profit_per_service: np.ndarray
+    baseline_profit: np.ndarray
+    feasible: np.ndarray
+    prices: np.ndarray
+    profits: np.ndarray
+
+    def scalar(self):
+        """Converte um resultado de cenário único em escalares Python (a curva continua em arrays)"""
+        *values, prices, profits = self
+        return OptimalPrice(*(np.asarray(value).item() for value in values), prices, profits)
+
+
+def expected_demand(reference_demand, original_price, price, elasticity, model='constant'):
+    """Demanda esperada ao `price`, partindo da demanda média ao preço original
+
+    `elasticity` é o módulo da elasticidade-preço no preço original (1.5 = -1,5% de demanda por
+    +1% de preço). No modelo 'constant' q = q0·(p/p0)^-e; no 'linear' a reta passa por (p0, q0)
+    com a mesma inclinação relativa e a demanda não fica negativa.
+    """
+    reference_demand = np.asarray(reference_demand, dtype=np.float64)
+    relative_price = np.asarray(price, dtype=np.float64) / np.asarray(original_price, dtype=np.float64)
+    elasticity = np.asarray(elasticity, dtype=np.float64)
+    if model == 'constant':
+        with np.errstate(divide='ignore'):
+            return reference_demand * relative_price ** -elasticity
+    if model == 'linear':
+        return reference_demand * np.maximum(1 - elasticity * (relative_price - 1), 0)
+    raise ValueError(f"modelo de demanda desconhecido: {model}")
+
+
+def _expected_profit(reference_demand, original_price, price, service_cost, margin_rate, elasticity, model):
+    """Lucro esperado e lucro por atendimento ao `price` (após comissão e custo do serviço)"""
+    per_service = price * margin_rate - service_cost
+    return expected_demand(reference_demand, original_price, price, elasticity, model) * per_service, per_service
+
+
+def optimal_promotional_price(reference_demand, original_price, service_cost, commission_percentage,
+                              elasticity, model='constant', price_range=None, size=200):
+    """Encontra o preço promocional que maximiza o lucro esperado do spa
+
+    Lucro(p) = demanda(p) × (p × (1 - comissão) - custo). Nos dois modelos o lucro é unimodal em p,
+    então o ótimo sai em forma fechada e é limitado à faixa de busca (padrão: do ponto de margem
+    zero até o preço original). A curva tem `size` preços igualmente espaçados na faixa.
+
+    Todos os parâmetros aceitam escalares ou arrays (ex.: a coluna Media de todos os serviços ×
+    meses) e seguem as regras de broadcast; a curva ganha um último eixo de tamanho `size`.
+    """
+    reference_demand = np.asarray(reference_demand, dtype=np.float64)
+    original_price = np.asarray(original_price, dtype=np.float64)
+    service_cost = np.asarray(service_cost, dtype=np.float64)
+    elasticity = np.asarray(elasticity, dtype=np.float64)
+    margin_rate = 1 - np.asarray(commission_percentage, dtype=np.float64) / 100
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        if price_range is None:
+            low = np.where(margin_rate > 0, np.clip(service_cost / margin_rate, 0, original_price), original_price)
+            high = original_price
+        else:
+            low, high = (np.asarray(bound, dtype=np.float64) for bound in price_range)
+
+        # Ponto onde a derivada do lucro zera (infinito quando o lucro só cresce com o preço)
+        if model == 'constant':
+            # p* = custo / ((1 - comissão) × (1 - 1/e)), definido para e > 1
+            unbounded = np.where(elasticity > 1, service_cost / (margin_rate * (1 - 1 / elasticity)), np.inf)
+        elif model == 'linear':
+            # q = a - b·p, com a = q0·(1 + e) e b = q0·e/p0  =>  p* = a/(2b) + custo/(2·(1 - comissão))
+            unbounded = np.where(elasticity > 0, original_price * (1 + elasticity) / (2 * elasticity) +
+                                 service_cost / (2 * margin_rate), np.inf)
+        else:
+            raise ValueError(f"modelo de demanda desconhecido: {model}")
+        # O ótimo não depende da demanda média, mas o resultado segue o shape do lote
+        shape = np.broadcast(reference_demand, original_price, service_cost, margin_rate, elasticity, low, high).shape
+        price = np.broadcast_to(np.clip(np.nan_to_num(unbounded, nan=np.inf), low, high), shape)
+
+    profit, profit_per_service = _expected_profit(reference_demand, original_price, price, service_cost,
+                                                  margin_rate, elasticity, model)
+    baseline_profit, _ = _expected_profit(reference_demand, original_price, original_price, service_cost,
+                                          margin_rate, elasticity, model)
+
+    # Curva lucro × preço: o último eixo percorre a faixa de busca
+    low, high, *params = (np.asarray(value)[..., np.newaxis] for value in
+                          (low, high, reference_demand, original_price, service_cost, margin_rate, elasticity))
+    prices = low + (high - low) * np.linspace(0, 1, size)
+    curve_demand, curve_original_price, curve_cost, curve_margin_rate, curve_elasticity = params
+    profits, _ = _expected_profit(curve_demand, curve_original_price, prices, curve_cost,
+                                  curve_margin_rate, curve_elasticity, model)
+
+    return OptimalPrice(
+        price=price,
+        demand=expected_demand(reference_demand, original_price, price, elasticity, model),
+        profit=profit,
+        profit_per_service=profit_per_service,
+        baseline_profit=baseline_profit,
+        feasible=profit_per_service > 0,
+        prices=prices,
+        profits=profits,
+    )
+
+
+def fit_elasticity(prices, quantities, original_price, model='constant'):
+    """Estima o módulo da elasticidade no preço original a partir de pares (preço, quantidade) observados
+
+    No modelo 'constant' é a inclinação da regressão log-log; no 'linear' é a inclinação da reta
+    ajustada, convertida em elasticidade no ponto (p0, q(p0)).
+    """
+    prices = np.asarray(prices, dtype=np.float64)
+    quantities = np.asarray(quantities, dtype=np.float64)
+    if model == 'constant':
+        valid = (prices > 0) & (quantities > 0)
+        slope, _ = np.polyfit(np.log(prices[valid]), np.log(quantities[valid]), 1)
+        return float(-slope)
+    if model == 'linear':
+        slope, intercept = np.polyfit(prices, quantities, 1)
+        return float(-slope * original_price / (intercept + slope * original_price))
+    raise ValueError(f"modelo de demanda desconhecido: {model}")
@@ -0,0 +1,321 @@
+import io
+import functools
+from datetime import datetime
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.units import inch
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Image
+from reportlab.lib import colors
+from reportlab.lib.enums import TA_CENTER
+from reportlab.graphics.shapes import Drawing, Group, String
+from reportlab.graphics.charts.barcharts import VerticalBarChart
+from reportlab.graphics.charts.legends import Legend
+from assets import print_logo
+from dataset import service_nouns
+from diagnostics import span
+from palette import VERDE_SALVIA, VERDE_MUSGO, BEGE_NEUTRO, MARROM_TERRA, VERDE_OLIVA_ESCURO, COR_SEM_PROMO, COR_COM_PROMO
+from pricing import comparison_values
+
+# Margens das páginas do relatório
+PAGE_MARGINS = dict(rightMargin=0.5*inch, leftMargin=0.5*inch, topMargin=0.5*inch, bottomMargin=0.5*inch)
+
+# Estilos do relatório (criados uma vez por processo e reaproveitados)
+@functools.lru_cache(maxsize=1)
+def report_styles():
+    """Retorna os estilos de parágrafo usados no relatório"""
+    styles = getSampleStyleSheet()
+    title_style = ParagraphStyle(
+        'CustomTitle',
+        parent=styles['Heading1'],
+        fontSize=24,
+        textColor=colors.HexColor(VERDE_SALVIA),
+        spaceAfter=6,
+        alignment=TA_CENTER,
+        fontName='Helvetica-Bold'
+    )
+    
+    heading_style = ParagraphStyle(
+        'CustomHeading',
+        parent=styles['Heading2'],
+        fontSize=14,
+        textColor=colors.HexColor(VERDE_MUSGO),
+        spaceAfter=12,
+        spaceBefore=12,
+        fontName='Helvetica-Bold'
+    )
+    
+    normal_style = ParagraphStyle(
+        'CustomNormal',
+        parent=styles['Normal'],
+        fontSize=10,
+        textColor=colors.HexColor(VERDE_OLIVA_ESCURO),
+        spaceAfter=6,
+        leading=14
+    )
+    
+    subtitle_style = ParagraphStyle('subtitle', parent=styles['Normal'], fontSize=10, 
+                                    textColor=colors.HexColor(MARROM_TERRA), alignment=TA_CENTER)
+    
+    footer_style = ParagraphStyle('footer', parent=styles['Normal'], 
+                                  fontSize=8, textColor=colors.HexColor(MARROM_TERRA), 
+                                  alignment=TA_CENTER)
+    
+    return {
+        'title': title_style,
+        'subtitle': subtitle_style,
+        'heading': heading_style,
+        'normal': normal_style,
+        'footer': footer_style,
+    }
+
+# Função para gerar o gráfico do PDF com primitivas vetoriais do ReportLab (sem kaleido)
+def create_comparison_drawing(result, width=6*inch, height=4*inch):
+    """Cria o gráfico comparativo do PDF como desenho vetorial do ReportLab"""
+    
+    categories, sem_promo, com_promo = comparison_values(result)
+    
+    drawing = Drawing(width, height)
+    drawing.add(String(width / 2, height - 16, "Comparação: Sem Promoção vs Com Promoção",
+                       fontName='Helvetica-Bold', fontSize=12, fillColor=colors.black, textAnchor='middle'))
+    
+    chart = VerticalBarChart()
+    chart.x = 60
+    chart.y = 50
+    chart.width = width - 80
+    chart.height = height - 100
+    chart.data = [sem_promo, com_promo]
+    chart.groupSpacing = 12
+    chart.barSpacing = 2
+    chart.bars[0].fillColor = colors.HexColor(COR_SEM_PROMO)
+    chart.bars[1].fillColor = colors.HexColor(COR_COM_PROMO)
+    chart.bars.strokeColor = None
+    chart.categoryAxis.categoryNames = categories
+    chart.categoryAxis.labels.fontName = 'Helvetica'
+    chart.categoryAxis.labels.fontSize = 9
+    chart.categoryAxis.labels.dy = -4
+    chart.valueAxis.labels.fontName = 'Helvetica'
+    chart.valueAxis.labels.fontSize = 8
+    chart.valueAxis.labelTextFormat = lambda value: f"{value:,.0f}"
+    chart.valueAxis.visibleGrid = True
+    chart.valueAxis.gridStrokeColor = colors.HexColor(BEGE_NEUTRO)
+    if min(sem_promo + com_promo) >= 0:
+        chart.valueAxis.valueMin = 0
+    drawing.add(chart)
+    
+    # Título do eixo Y rotacionado 90°
+    y_title = String(0, 0, "Valor (R$)", fontName='Helvetica', fontSize=9, fillColor=colors.black, textAnchor='middle')
+    drawing.add(Group(y_title, transform=(0, 1, -1, 0, 14, chart.y + chart.height / 2)))
+    
+    legend = Legend()
+    legend.x = width / 2 - 90
+    legend.y = 14
+    legend.alignment = 'right'
+    legend.columnMaximum = 1
+    legend.deltax = 110
+    legend.fontName = 'Helvetica'
+    legend.fontSize = 9
+    legend.colorNamePairs = [(colors.HexColor(COR_SEM_PROMO), 'Sem Promoção'),
+                             (colors.HexColor(COR_COM_PROMO), 'Com Promoção')]
+    drawing.add(legend)
+    
+    return drawing
+
+# Elementos (flowables) de um relatório
+def build_report_elements(service, month, demand, std_dev, original_price, service_cost,
+                          commission_percentage, desired_profit_increase, promotional_price,
+                          result, comparison_chart=None, is_custom=False, generated_at=None):
+    """Monta a lista de flowables do relatório de estratégia de promoção
+
+    `result` é o PromotionResult (escalar) do cenário. Por padrão o gráfico é desenhado em vetor
+    pelo próprio ReportLab; se `comparison_chart` for uma figura Plotly, ela é rasterizada via
+    kaleido (com fallback para o desenho vetorial). `generated_at` é o instante impresso no
+    título, na data e no rodapé (padrão: agora), o mesmo nos três lugares.
+    """
+    generated_at = generated_at or datetime.now()
+    
+    (revenue_without_promo, commission_without_promo, total_service_cost_without_promo,
+     spa_revenue_without_promo, desired_spa_revenue, _, required_quantity,
+     total_promo_revenue, final_commission, total_service_cost_with_promo,
+     spa_revenue_with_promo, _) = result
+    
+    # Define o nome do serviço em singular
+    if is_custom:
+        service_singular = "do serviço"
+        service_name_display = "Outros"
+    else:
+        service_singular = service_nouns(service)[0]
+        service_name_display = service
+    
+    # Lista de elementos do PDF
+    elements = []
+    
+    styles = report_styles()
+    title_style = styles['title']
+    heading_style = styles['heading']
+    normal_style = styles['normal']
+    
+    # Logo (variante de impressão já redimensionada e cacheada no processo)
+    try:
+        elements.append(Image(io.BytesIO(print_logo()), width=0.8*inch, height=0.8*inch, kind='proportional'))
+    except OSError:
+        pass
+    
+    # Título
+    elements.append(Paragraph("🌿 RELATÓRIO DE ESTRATÉGIA DE PROMOÇÃO", title_style))
+    elements.append(Paragraph(f"Living Spa - {generated_at.strftime('%d/%m/%Y às %H:%M')}", styles['subtitle']))
+    elements.append(Spacer(1, 0.3*inch))
+    
+    # Seção 1: Informações Gerais
+    elements.append(Paragraph("1. INFORMAÇÕES GERAIS", heading_style))
+    
+    if is_custom:
+        info_text = f"""
+        <b>Serviço:</b> {service_name_display}<br/>
+        <b>Demanda Esperada:</b> {int(demand)} atendimentos<br/>
+        <b>Data do Relatório:</b> {generated_at.strftime('%d/%m/%Y')}
+        """
+    else:
+        info_text = f"""
+        <b>Serviço:</b> {service_name_display}<br/>
+        <b>Mês da Promoção:</b> {month}<br/>
+        <b>Data do Relatório:</b> {generated_at.strftime('%d/%m/%Y')}
+        """
+    elements.append(Paragraph(info_text, normal_style))
+    elements.append(Spacer(1, 0.2*inch))
+    
+    # Seção 2: Análise de Demanda (apenas se não for custom)
+    if not is_custom:
+        elements.append(Paragraph("2. ANÁLISE DE DEMANDA", heading_style))
+        
+        demand_text = f"""
+        <b>Demanda Esperada:</b> {int(demand)} atendimentos<br/>
+        <b>Desvio Padrão:</b> ±{std_dev:.2f}
+        """
+        elements.append(Paragraph(demand_text, normal_style))
+        elements.append(Spacer(1, 0.2*inch))
+        
+        section_number = 3
+    else:
+        section_number = 2
+    
+    # Seção de Parâmetros de Precificação
+    elements.append(Paragraph(f"{section_number}. PARÂMETROS DE PRECIFICAÇÃO", heading_style))
+    
+    pricing_text = f"""
+    <b>Preço Original:</b> R$ {original_price:.2f}<br/>
+    <b>Preço Promocional:</b> R$ {promotional_price:.2f}<br/>
+    <b>Desconto:</b> {((1 - promotional_price/original_price) * 100):.1f}%<br/>
+    <b>Custo por Serviço:</b> R$ {service_cost:.2f}<br/>
+    <b>Comissão Massagista:</b> {commission_percentage:.1f}%<br/>
+    <b>Lucro Adicional Desejado:</b> {desired_profit_increase:.1f}%
+    """
+    elements.append(Paragraph(pricing_text, normal_style))
+    elements.append(Spacer(1, 0.2*inch))
+    
+    # Seção de Cenário Sem Promoção
+    section_number += 1
+    elements.append(Paragraph(f"{section_number}. CENÁRIO SEM PROMOÇÃO (BASELINE)", heading_style))
+    
+    without_text = f"""
+    <b>Receita Total:</b> R$ {revenue_without_promo:,.2f}<br/>
+    <b>Comissão Massagista:</b> R$ {commission_without_promo:,.2f}<br/>
+    <b>Custo Total:</b> R$ {total_service_cost_without_promo:,.2f}<br/>
+    <b>Lucro Real sem Estratégia:</b> R$ {spa_revenue_without_promo:,.2f}
+    """
+    elements.append(Paragraph(without_text, normal_style))
+    elements.append(Spacer(1, 0.2*inch))
+    
+    # Seção de Cenário Com Promoção
+    section_number += 1
+    elements.append(Paragraph(f"{section_number}. CENÁRIO COM PROMOÇÃO (META)", heading_style))
+    
+    if is_custom:
+        service_text = "do serviço"
+    else:
+        service_text = service_nouns(service)[1]
+    
+    with_text = f"""
+    <b>Quantidade Necessária:</b> {required_quantity} {service_text}<br/>
+    <b>Receita Total:</b> R$ {total_promo_revenue:,.2f}<br/>
+    <b>Comissão Massagista:</b> R$ {final_commission:,.2f}<br/>
+    <b>Custo Total:</b> R$ {total_service_cost_with_promo:,.2f}<br/>
+    <b>Lucro Real da Estratégia:</b> R$ {spa_revenue_with_promo:,.2f}
+    """
+    elements.append(Paragraph(with_text, normal_style))
+    elements.append(Spacer(1, 0.2*inch))
+    
+    # Seção de Resumo Executivo
+    section_number += 1
+    elements.append(Paragraph(f"{section_number}. RESUMO EXECUTIVO", heading_style))
+    
+    lucro_diff = spa_revenue_with_promo - spa_revenue_without_promo
+    lucro_diff_pct = ((spa_revenue_with_promo / spa_revenue_without_promo - 1) * 100) if spa_revenue_without_promo > 0 else 0
+    
+    summary_text = f"""
+    <b>Estratégia:</b> Reduzir o preço de R$ {original_price:.2f} para R$ {promotional_price:.2f} (desconto de {((1 - promotional_price/original_price) * 100):.1f}%)<br/><br/>
+    
+    <b>Objetivo:</b> Aumentar o lucro em {desired_profit_increase:.1f}% em relação ao cenário atual<br/><br/>
+    
+    <b>Meta de Vendas:</b> {required_quantity} {service_text} ao preço promocional<br/><br/>
+    
+    <b>Impacto no Lucro:</b> Aumento de R$ {lucro_diff:,.2f} ({lucro_diff_pct:+.1f}%)<br/><br/>
+    
+    <b>Lucro Esperado:</b> R$ {spa_revenue_with_promo:,.2f} (vs R$ {spa_revenue_without_promo:,.2f} sem promoção)
+    """
+    
+    elements.append(Paragraph(summary_text, normal_style))
+    elements.append(Spacer(1, 0.3*inch))
+    
+    # Seção de Gráfico Comparativo
+    section_number += 1
+    elements.append(Paragraph(f"{section_number}. GRÁFICO COMPARATIVO", heading_style))
+    
+    chart_flowable = None
+    if comparison_chart is not None:
+        # Figura Plotly: salva como imagem com fundo branco e texto preto
+        try:
+            import plotly.io as pio
+            img_buffer = io.BytesIO()
+            with span('kaleido'):
+                pio.write_image(comparison_chart, img_buffer, format='png', width=600, height=400)
+            img_buffer.seek(0)
+            chart_flowable = Image(img_buffer, width=6*inch, height=4*inch)
+        except Exception:
+            chart_flowable = None
+    if chart_flowable is None:
+        chart_flowable = create_comparison_drawing(result)
+    elements.append(chart_flowable)
+    
+    elements.append(Spacer(1, 0.2*inch))
+    
+    # Rodapé
+    elements.append(Spacer(1, 0.1*inch))
+    footer_text = f"<i>Relatório gerado automaticamente pelo Living Spa Dashboard em {generated_at.strftime('%d/%m/%Y às %H:%M:%S')}</i>"
+    elements.append(Paragraph(footer_text, styles['footer']))
+    
+    return elements
+
+# Função para gerar PDF
+def generate_pdf_report(service, month, demand, std_dev, original_price, service_cost, 
+                        commission_percentage, desired_profit_increase, promotional_price,
+                        result, comparison_chart=None, is_custom=False, generated_at=None):
+    """Gera um relatório em PDF com todas as informações da estratégia de promoção"""
+    
+    # Cria buffer para o PDF
+    pdf_buffer = io.BytesIO()
+    
+    # Cria o documento PDF
+    doc = SimpleDocTemplate(pdf_buffer, pagesize=A4, **PAGE_MARGINS)
+    
+    elements = build_report_elements(
+        service, month, demand, std_dev, original_price, service_cost,
+        commission_percentage, desired_profit_increase, promotional_price,
+        result, comparison_chart, is_custom, generated_at
+    )
+    
+    # Constrói o PDF
+    with span('pdf_build'):
+        doc.build(elements)
+    pdf_buffer.seek(0)
+    
+    return pdf_buffer
@@ -0,0 +1,176 @@
+"""Cache em disco dos relatórios PDF, endereçado pelo conteúdo e limitado em bytes (LRU)
+
+Cada relatório é guardado em <diretório>/<ab>/<hash>.pdf, onde o hash (SHA-256) cobre os
+argumentos do relatório em forma canônica, a versão do template e a data do relatório. A data
+entra na chave porque o PDF traz a "Data do Relatório": um cenário pedido amanhã é renderizado
+de novo, e o horário de geração impresso no título e no rodapé é o da renderização guardada.
+
+O acesso renova a data de modificação do arquivo; ao passar do orçamento, os arquivos com a
+modificação mais antiga são removidos primeiro. Vários processos (dashboard, API, pool de
+relatórios) podem compartilhar o mesmo diretório.
+
+Diretório e orçamento padrão vêm de LIVING_SPA_REPORT_CACHE e LIVING_SPA_REPORT_CACHE_BYTES.
+"""
+import datetime
+import hashlib
+import json
+import os
+import threading
+
+from dataset import temporary_file
+
+# Versão do layout de report.py: incremente ao mudar o conteúdo ou a aparência do relatório
+TEMPLATE_VERSION = 1
+
+# Variáveis de ambiente com o diretório e o orçamento do cache
+DIR_ENV_VAR = 'LIVING_SPA_REPORT_CACHE'
+BYTES_ENV_VAR = 'LIVING_SPA_REPORT_CACHE_BYTES'
+
+DEFAULT_DIR = 'relatorios.cache'
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+# Tamanho dos blocos lidos ao servir um relatório do cache
+CHUNK_SIZE = 64 * 1024
+
+
+def _canonical(value):
+    # Números sempre como float (100 e 100.0 geram a mesma chave); bool fica como bool
+    if isinstance(value, bool) or value is None or isinstance(value, str):
+        return value
+    if isinstance(value, (list, tuple)):
+        return [_canonical(item) for item in value]
+    return float(value)
+
+
+def report_key(args, report_date=None):
+    """Hash canônico dos argumentos de render_pdf_report, da versão do template e da data
+
+    Sem `report_date`, vale a data de hoje: a virada do dia muda a chave de propósito, porque o
+    PDF impresso traz a data. Um trabalho enfileirado antes da meia-noite e concluído depois
+    fica guardado sob a chave do dia em que foi pedido, que ninguém mais consulta; o espaço
+    volta pela remoção LRU.
+    """
+    report_date = report_date or datetime.date.today()
+    payload = json.dumps({'template': TEMPLATE_VERSION, 'date': report_date.isoformat(),
+                          'args': _canonical(args)}, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def iter_file(file, chunk_size=CHUNK_SIZE):
+    """Lê o arquivo aberto em blocos e o fecha ao final (corpo de respostas em streaming)"""
+    with file:
+        while chunk := file.read(chunk_size):
+            yield chunk
+
+
+class ReportCache:
+    """Relatórios PDF em disco por chave de conteúdo, com orçamento em bytes e remoção LRU"""
+
+    def __init__(self, directory=None, max_bytes=None):
+        self.directory = directory or os.environ.get(DIR_ENV_VAR) or DEFAULT_DIR
+        self.max_bytes = int(max_bytes or os.environ.get(BYTES_ENV_VAR) or DEFAULT_MAX_BYTES)
+        self._size = None
+        self._lock = threading.Lock()
+
+    def path(self, key):
+        return os.path.join(self.directory, key[:2], f"{key}.pdf")
+
+    def open(self, key):
+        """Abre o relatório em modo binário (renovando seu uso), ou retorna None se não está no cache
+
+        O arquivo aberto continua legível mesmo que outro processo o remova em seguida.
+        """
+        path = self.path(key)
+        try:
+            file = open(path, 'rb')
+        except FileNotFoundError:
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return file
+
+    def get(self, key):
+        """Bytes do relatório, ou None se não está no cache"""
+        file = self.open(key)
+        if file is None:
+            return None
+        with file:
+            return file.read()
+
+    def put(self, key, pdf_bytes):
+        """Grava o relatório (escrita atômica) e remove os mais antigos se passar do orçamento"""
+        if len(pdf_bytes) > self.max_bytes:
+            return
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        descriptor, temporary = temporary_file(path)
+        try:
+            with os.fdopen(descriptor, 'wb') as file:
+                file.write(pdf_bytes)
+            # Ao sobrescrever a mesma chave, o arquivo antigo sai da conta
+            try:
+                replaced = os.stat(path).st_size
+            except FileNotFoundError:
+                replaced = 0
+            os.replace(temporary, path)
+        except BaseException:
+            os.unlink(temporary)
+            raise
+        with self._lock:
+            if self._size is None:
+                self._size = sum(size for _, size, _ in self._entries())
+            else:
+                self._size += len(pdf_bytes) - replaced
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def size(self):
+        """Bytes ocupados pelos relatórios no diretório"""
+        return sum(size for _, size, _ in self._entries())
+
+    def clear(self):
+        with self._lock:
+            for path, _, _ in self._entries():
+                _remove(path)
+            self._size = 0
+
+    def _entries(self):
+        # (caminho, bytes, último uso) de cada relatório no diretório
+        entries = []
+        try:
+            shards = list(os.scandir(self.directory))
+        except FileNotFoundError:
+            return entries
+        for shard in shards:
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                if not entry.name.endswith('.pdf'):
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((entry.path, stat.st_size, stat.st_mtime_ns))
+        return entries
+
+    def _evict(self):
+        # Chamado com a trava: relê o diretório (outros processos também gravam) e remove do uso
+        # mais antigo ao mais recente até ficar dentro do orçamento
+        entries = sorted(self._entries(), key=lambda entry: entry[2])
+        self._size = sum(size for _, size, _ in entries)
+        for path, size, _ in entries:
+            if self._size <= self.max_bytes:
+                break
+            if _remove(path):
+                self._size -= size
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+        return True
+    except FileNotFoundError:
+        return False
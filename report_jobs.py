@@ -0,0 +1,258 @@
+"""Fila de relatórios PDF renderizados em segundo plano por um pool de processos limitado
+
+Uso:
+    queue = ReportQueue(workers=2, max_pending=8, cache=ReportCache())
+    job = queue.submit((service, month, demand, ...))        # retorna na hora
+    job.status, job.position, job.progress()                 # acompanhamento
+    job.result()                                             # bytes do PDF quando pronto
+
+No máximo `workers` relatórios renderizam ao mesmo tempo (um processo cada, com o mesmo
+ReportLab/kaleido carregado uma única vez por processo); os demais esperam na fila, que aceita
+até `max_pending` trabalhos antes de recusar novos com QueueFull. Pedidos com os mesmos
+argumentos compartilham o trabalho em andamento, e os relatórios prontos mais recentes ficam
+guardados; com um ReportCache, relatórios já gravados em disco nem entram na fila.
+
+Os limites padrão vêm das variáveis de ambiente LIVING_SPA_PDF_WORKERS e LIVING_SPA_PDF_QUEUE.
+"""
+import itertools
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import BrokenExecutor
+
+from report_cache import report_key
+
+# Variáveis de ambiente com o número de processos e o tamanho máximo da fila
+WORKERS_ENV_VAR = 'LIVING_SPA_PDF_WORKERS'
+QUEUE_ENV_VAR = 'LIVING_SPA_PDF_QUEUE'
+
+# Trabalhos aguardando ou em renderização por processo antes de recusar novos pedidos
+QUEUE_PER_WORKER = 4
+
+# Relatórios prontos guardados em memória para pedidos repetidos (mesmos argumentos)
+KEEP_FINISHED = 64
+
+# Estimativa inicial da duração de um relatório, em segundos, antes da primeira medição
+INITIAL_ESTIMATE = 2.0
+
+QUEUED, RUNNING, DONE, FAILED = 'queued', 'running', 'done', 'failed'
+
+
+class QueueFull(Exception):
+    """A fila de relatórios atingiu o limite de trabalhos pendentes"""
+
+
+def default_workers():
+    return int(os.environ.get(WORKERS_ENV_VAR) or max((os.cpu_count() or 1) - 1, 1))
+
+
+def default_max_pending(workers):
+    return int(os.environ.get(QUEUE_ENV_VAR) or workers * QUEUE_PER_WORKER)
+
+
+def render_pdf_report(service, month, demand, std_dev, original_price, service_cost,
+                      commission_percentage, desired_profit_increase, promotional_price, is_custom=False):
+    """Calcula o cenário, monta o relatório completo (gráfico vetorial) e retorna os bytes do arquivo"""
+    # ReportLab só é carregado no processo que de fato renderiza
+    from pricing import calculate_promotion
+    from report import generate_pdf_report
+    result = calculate_promotion(demand, original_price, promotional_price, service_cost,
+                                 commission_percentage, desired_profit_increase).scalar()
+    pdf_buffer = generate_pdf_report(
+        service, month, demand, std_dev, original_price, service_cost,
+        commission_percentage, desired_profit_increase, promotional_price,
+        result, is_custom=is_custom
+    )
+    return pdf_buffer.getvalue()
+
+
+def _render(args):
+    return render_pdf_report(*args)
+
+
+def _init_worker():
+    from bulk_reports import init_worker as prepare_report_assets
+    prepare_report_assets()
+
+
+class ReportJob:
+    """Identificador de um relatório na fila: estado, posição, progresso estimado e resultado"""
+
+    def __init__(self, queue, job_id, key, args):
+        # `key` é o hash de conteúdo dos argumentos (o mesmo do cache em disco)
+        self.id = job_id
+        self.key = key
+        self.args = args
+        self.status = QUEUED
+        self.submitted_at = time.monotonic()
+        self.started_at = None
+        self.finished_at = None
+        self.error = None
+        self._queue = queue
+        self._pdf_bytes = None
+        self._done = threading.Event()
+
+    @property
+    def position(self):
+        """Posição na fila (1 = o próximo a renderizar), ou 0 se já saiu dela"""
+        return self._queue.position(self)
+
+    def done(self):
+        return self._done.is_set()
+
+    def wait(self, timeout=None):
+        return self._done.wait(timeout)
+
+    def elapsed(self):
+        return (self.finished_at or time.monotonic()) - self.submitted_at
+
+    def progress(self):
+        """Fração estimada de 0 a 1 pela duração média dos últimos relatórios (nunca 1 antes de terminar)"""
+        if self.done():
+            return 1.0
+        if self.started_at is None:
+            return 0.0
+        return min((time.monotonic() - self.started_at) / self._queue.estimate, 0.95)
+
+    def result(self):
+        """Bytes do PDF; relança o erro da renderização se ela falhou"""
+        self._done.wait()
+        if self.error is not None:
+            raise self.error
+        return self._pdf_bytes
+
+
+class ReportQueue:
+    """Despacha relatórios para um pool de processos com concorrência e fila limitadas"""
+
+    def __init__(self, workers=None, max_pending=None, keep_finished=KEEP_FINISHED, cache=None, render=_render):
+        self.workers = workers or default_workers()
+        self.max_pending = max_pending or default_max_pending(self.workers)
+        self.keep_finished = keep_finished
+        self.cache = cache
+        self.estimate = INITIAL_ESTIMATE
+        self._render = render
+        self._pool = None
+        self._jobs = OrderedDict()
+        self._waiting = deque()
+        self._running = 0
+        self._ids = itertools.count(1)
+        # Reentrante: o callback de um trabalho que termina durante o submit roda nesta mesma thread
+        self._lock = threading.RLock()
+
+    def _executor(self):
+        # Criado no primeiro pedido. Usa o método padrão da plataforma (fork no Linux): com 'spawn' os
+        # filhos reexecutariam o script do Streamlit, que ele instala como __main__
+        if self._pool is None:
+            # concurrent.futures.process só é carregado quando o primeiro relatório é pedido
+            from concurrent.futures import ProcessPoolExecutor
+            self._pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker)
+        return self._pool
+
+    def submit(self, args):
+        """Enfileira o relatório `args` (argumentos de render_pdf_report) e retorna seu ReportJob
+
+        Pedidos iguais a um já em andamento ou pronto recebem o mesmo trabalho; um relatório
+        encontrado no cache em disco volta como trabalho já concluído.
+        """
+        key = report_key(args)
+        with self._lock:
+            job = self._existing(key)
+            if job is not None:
+                return job
+        
+        # Leitura do disco fora da trava; outro pedido igual pode ter chegado nesse meio tempo
+        pdf_bytes = self.cache.get(key) if self.cache is not None else None
+        with self._lock:
+            job = self._existing(key)
+            if job is not None:
+                return job
+            if pdf_bytes is not None:
+                job = self._jobs[key] = ReportJob(self, next(self._ids), key, args)
+                self._finish(job, pdf_bytes, None)
+                self._trim()
+                return job
+            if self._running + len(self._waiting) >= self.max_pending:
+                raise QueueFull(f"{self.max_pending} relatórios já estão na fila")
+            job = self._jobs[key] = ReportJob(self, next(self._ids), key, args)
+            self._waiting.append(job)
+            self._dispatch()
+            self._trim()
+            return job
+
+    def _existing(self, key):
+        # Chamado com a trava: trabalho em andamento ou pronto com a mesma chave
+        job = self._jobs.get(key)
+        if job is None or job.status == FAILED:
+            return None
+        self._jobs.move_to_end(key)
+        return job
+
+    def position(self, job):
+        with self._lock:
+            try:
+                return self._waiting.index(job) + 1
+            except ValueError:
+                return 0
+
+    def stats(self):
+        with self._lock:
+            return {'workers': self.workers, 'running': self._running, 'waiting': len(self._waiting),
+                    'max_pending': self.max_pending, 'estimate_s': self.estimate}
+
+    def shutdown(self, wait=True):
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=wait, cancel_futures=True)
+
+    def _dispatch(self):
+        # Chamado com a trava: inicia trabalhos da fila enquanto houver processo livre
+        while self._waiting and self._running < self.workers:
+            job = self._waiting.popleft()
+            job.status, job.started_at = RUNNING, time.monotonic()
+            self._running += 1
+            try:
+                future = self._executor().submit(self._render, job.args)
+            except Exception as exc:
+                self._running -= 1
+                self._finish(job, None, exc)
+                continue
+            future.add_done_callback(lambda future, job=job: self._complete(job, future))
+
+    def _complete(self, job, future):
+        try:
+            pdf_bytes, error = future.result(), None
+        except BaseException as exc:
+            pdf_bytes, error = None, exc
+        if error is None and self.cache is not None:
+            try:
+                self.cache.put(job.key, pdf_bytes)
+            except OSError:
+                # Disco cheio ou sem permissão: o relatório segue válido, só não fica no cache
+                pass
+        with self._lock:
+            self._running -= 1
+            self._finish(job, pdf_bytes, error)
+            if error is None:
+                # Média móvel da duração de renderização, usada na barra de progresso
+                self.estimate = 0.8 * self.estimate + 0.2 * (job.finished_at - job.started_at)
+            self._dispatch()
+
+    def _finish(self, job, pdf_bytes, error):
+        if isinstance(error, BrokenExecutor):
+            # Um processo morreu (ex.: falta de memória): o próximo trabalho cria um pool novo
+            self._pool = None
+        job.finished_at = time.monotonic()
+        job._pdf_bytes, job.error = pdf_bytes, error
+        job.status = DONE if error is None else FAILED
+        if error is not None and self._jobs.get(job.key) is job:
+            del self._jobs[job.key]
+        job._done.set()
+
+    def _trim(self):
+        # Descarta os relatórios prontos mais antigos além do limite (pendentes nunca saem)
+        finished = [key for key, job in self._jobs.items() if job.done()]
+        for key in finished[:max(len(finished) - self.keep_finished, 0)]:
+            del self._jobs[key]
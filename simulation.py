@@ -0,0 +1,100 @@
+from typing import NamedTuple
+
+import numpy as np
+
+# Distribuições de demanda suportadas
+DISTRIBUTIONS = {
+    'normal': "Normal (negativos viram zero)",
+    'truncated': "Normal truncada em zero",
+    'poisson': "Poisson (apenas a média)",
+}
+
+# Percentis de lucro reportados por padrão
+DEFAULT_PERCENTILES = (5, 25, 50, 75, 95)
+
+# Maior quantidade vendida contada no histograma (8 MB de contagens); acima disso a memória
+# dependeria da demanda, e os percentis passam a ser estimados bloco a bloco
+MAX_HISTOGRAM_SALES = 1_000_000
+
+# Desvios-padrão acima da média usados para estimar a maior quantidade sorteada
+TAIL_STD_DEVS = 10
+
+
+class SimulationResult(NamedTuple):
+    """Resumo da simulação de Monte Carlo de um cenário de promoção"""
+    probability: float
+    expected_sales: float
+    expected_profit: float
+    profit_percentiles: dict
+    draws: int
+
+
+def _draw_sales(rng, mean, std_dev, size, distribution):
+    """Sorteia `size` quantidades vendidas (inteiros >= 0) da distribuição do mês"""
+    if distribution == 'poisson':
+        return rng.poisson(mean, size)
+    if distribution == 'normal' or std_dev <= 0:
+        return np.maximum(np.rint(rng.normal(mean, std_dev, size)), 0).astype(np.int64)
+    if distribution != 'truncated':
+        raise ValueError(f"distribuição desconhecida: {distribution}")
+
+    # Normal truncada em zero por rejeição: só reamostra as posições negativas
+    values = rng.normal(mean, std_dev, size)
+    rejected = np.flatnonzero(values < 0)
+    while rejected.size:
+        values[rejected] = rng.normal(mean, std_dev, rejected.size)
+        rejected = rejected[values[rejected] < 0]
+    return np.rint(values).astype(np.int64)
+
+
+def simulate_promotion(demand, std_dev, required_quantity, profit_per_promo_service, draws=1_000_000,
+                       distribution='normal', seed=42, chunk_size=250_000, percentiles=DEFAULT_PERCENTILES):
+    """Estima a chance de a demanda atingir `required_quantity` e a distribuição do lucro da promoção
+
+    Os sorteios são processados em blocos de `chunk_size`, então a memória não depende de
+    `draws`. Enquanto a demanda cabe em MAX_HISTOGRAM_SALES acumula-se só um histograma das
+    quantidades vendidas e os percentis são exatos; com demandas maiores, a chance e a média
+    continuam exatas e os percentis são a média dos percentis de cada bloco.
+    O lucro de cada sorteio é quantidade vendida × lucro por atendimento promocional.
+    """
+    rng = np.random.default_rng(seed)
+    spread = np.sqrt(max(demand, 0.0)) if distribution == 'poisson' else std_dev
+    histogram = demand + TAIL_STD_DEVS * spread < MAX_HISTOGRAM_SALES
+    counts = np.zeros(1, dtype=np.int64)
+    reached, total_sales = 0, 0.0
+    chunk_percentiles = np.zeros(len(percentiles))
+    remaining = draws
+    while remaining > 0:
+        size = min(chunk_size, remaining)
+        sales = _draw_sales(rng, demand, std_dev, size, distribution)
+        if histogram:
+            chunk_counts = np.bincount(sales)
+            if chunk_counts.size > counts.size:
+                counts = np.pad(counts, (0, chunk_counts.size - counts.size))
+            counts[:chunk_counts.size] += chunk_counts
+        else:
+            reached += int(np.count_nonzero(sales >= required_quantity))
+            total_sales += float(sales.sum(dtype=np.float64))
+            chunk_percentiles += np.percentile(sales, percentiles, method='inverted_cdf') * size
+        remaining -= size
+
+    if histogram:
+        expected_sales = float(counts @ np.arange(counts.size)) / draws
+        probability = float(counts[max(int(required_quantity), 0):].sum()) / draws
+        # Percentis da quantidade (distribuição discreta) convertidos em lucro
+        cumulative = np.cumsum(counts)
+        sales_percentiles = [np.searchsorted(cumulative, p / 100 * draws) for p in percentiles]
+    else:
+        expected_sales = total_sales / draws
+        probability = reached / draws
+        sales_percentiles = chunk_percentiles / draws
+    profit_percentiles = {p: float(sales * profit_per_promo_service)
+                          for p, sales in zip(percentiles, sales_percentiles)}
+
+    return SimulationResult(
+        probability=probability,
+        expected_sales=expected_sales,
+        expected_profit=expected_sales * profit_per_promo_service,
+        profit_percentiles=profit_percentiles,
+        draws=draws,
+    )
@@ -0,0 +1,100 @@
+import asyncio
+import json
+import os
+
+import pytest
+from starlette.requests import Request
+
+from api import build_app, quote, report, seasonal
+from report_cache import ReportCache
+
+DATA_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'dados_sazonais.csv')
+SERVICE = "Massagem Relaxante (50 min)"
+
+
+@pytest.fixture
+def app(tmp_path):
+    return build_app(DATA_PATH, pdf_workers=1, report_cache=ReportCache(str(tmp_path)))
+
+
+def call(app, endpoint, body=None, query=''):
+    """Chama o endpoint direto, sem servidor: (status, corpo JSON)"""
+    payload = json.dumps(body).encode() if body is not None else b''
+    scope = {'type': 'http', 'method': 'POST' if body is not None else 'GET', 'path': '/', 'headers': [],
+             'query_string': query.encode(), 'app': app}
+
+    async def receive():
+        return {'type': 'http.request', 'body': payload, 'more_body': False}
+
+    response = asyncio.run(endpoint(Request(scope, receive)))
+    return response.status_code, json.loads(response.body)
+
+
+def test_quote_accepts_valid_scenario(app):
+    status, body = call(app, quote, {'service': SERVICE, 'month': 7, 'promotional_price': 85})
+    assert status == 200
+    assert body['results'][0]['demand'] == 49.0
+
+
+@pytest.mark.parametrize('fields, field', [
+    ({'demand': float('nan')}, 'demand'),
+    ({'demand': 20, 'std_dev': -5}, 'std_dev'),
+    ({'demand': 20, 'service_cost': float('inf')}, 'service_cost'),
+    ({'demand': 20, 'original_price': 0}, 'original_price'),
+    ({'demand': 20, 'commission_percentage': 'muito'}, 'commission_percentage'),
+    ({'service': SERVICE, 'month': 3, 'promotional_price': -1}, 'promotional_price'),
+])
+def test_quote_rejects_invalid_numbers(app, fields, field):
+    status, body = call(app, quote, {'promotional_price': 85, **fields, 'simulate': True})
+    assert status == 400
+    assert f"'{field}'" in body['error']
+
+
+def test_report_rejects_zero_original_price(app):
+    status, body = call(app, report, {'service': SERVICE, 'month': 3, 'promotional_price': 85,
+                                      'original_price': 0})
+    assert status == 400
+    assert "'original_price'" in body['error']
+
+
+def test_seasonal_requires_month_with_service(app):
+    status, body = call(app, seasonal, query=f"service={SERVICE}")
+    assert status == 400
+    assert "'month'" in body['error']
+
+    status, body = call(app, seasonal, query=f"service={SERVICE}&month=7")
+    assert status == 200
+    assert body['demand'] == 49.0
+
+
+@pytest.mark.parametrize('options, field', [
+    ({'simulate': 'false'}, 'simulate'),
+    ({'simulate': 1}, 'simulate'),
+    ({'simulate': True, 'draws': float('inf')}, 'draws'),
+    ({'simulate': True, 'draws': 1000.5}, 'draws'),
+    ({'month': 7.9}, 'month'),
+    ({'month': float('inf')}, 'month'),
+    ({'month': 10 ** 400}, 'month'),
+    ({'month': True}, 'month'),
+])
+def test_quote_rejects_invalid_options(app, options, field):
+    status, body = call(app, quote, {'service': SERVICE, 'month': 7, 'promotional_price': 85, **options})
+    assert status == 400
+    assert f"'{field}'" in body['error']
+
+
+def test_quote_rejects_simulating_huge_demand(app):
+    status, body = call(app, quote, {'demand': 1e12, 'promotional_price': 85, 'simulate': True})
+    assert status == 400
+    assert "'demand'" in body['error']
+
+    # Sem simulação a cotação continua aceita
+    status, _ = call(app, quote, {'demand': 1e12, 'promotional_price': 85})
+    assert status == 200
+
+
+def test_quote_simulates_with_whole_float_draws(app):
+    status, body = call(app, quote, {'service': SERVICE, 'month': 7.0, 'promotional_price': 85,
+                                     'simulate': True, 'draws': 1000.0})
+    assert status == 200
+    assert body['results'][0]['simulation']['draws'] == 1000
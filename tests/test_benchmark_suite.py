@@ -0,0 +1,12 @@
+from suite import is_regression
+
+
+def test_micro_benchmark_noise_is_not_a_regression():
+    # 1,73× de um caso de 28 ms: a proporção passa do limiar, mas a diferença é ruído
+    assert not is_regression(0.0284 * 1.73, 0.0284, threshold=0.5)
+    assert not is_regression(32e-6 * 3, 32e-6, threshold=0.5)
+
+
+def test_slower_case_is_a_regression():
+    assert is_regression(0.6, 0.3, threshold=0.5)
+    assert not is_regression(0.4, 0.3, threshold=0.5)
@@ -0,0 +1,70 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+from branches import CONSOLIDATED, BranchData, index_nbytes, load_registry
+from dataset import build_seasonal_index
+from forecast import forecast_demand, load_history
+from ingestion import SeasonalStats
+
+SERVICE = "Massagem Relaxante (50 min)"
+
+
+def write_branch(directory, name, mean, history_months=0):
+    pd.DataFrame({'Mes': range(1, 13), 'Servico': SERVICE, 'Media': float(mean),
+                  'Desvio_padrao': 2.0}).to_csv(directory / f"{name}.csv", index=False)
+    entry = {'dados': f"{name}.csv"}
+    if history_months:
+        stats = SeasonalStats()
+        for offset in range(history_months):
+            stats.add_count(SERVICE, 2022 + offset // 12, offset % 12 + 1, int(mean) + offset % 12)
+        stats.save(str(directory / f"{name}_estado.json"))
+        entry['historico'] = f"{name}_estado.json"
+    return entry
+
+
+def test_consolidated_forecast_requires_history_of_every_branch(tmp_path):
+    registry_path = tmp_path / "filiais.json"
+    registry_path.write_text(json.dumps({
+        'Centro': write_branch(tmp_path, 'centro', 200, history_months=36),
+        'Sul': write_branch(tmp_path, 'sul', 228),
+    }))
+    data = BranchData(load_registry(str(registry_path)))
+
+    assert len(data.history_paths('Centro')) == 1
+    assert forecast_demand(load_history(data.history_paths('Centro'))) is not None
+
+    # Sem o histórico do Sul, o consolidado usa as médias somadas em vez da previsão só do Centro
+    assert data.history_paths(CONSOLIDATED) == []
+    assert data.history_version(CONSOLIDATED) == ()
+    assert np.allclose(data.get(CONSOLIDATED).frame['Media'], 428.0)
+
+
+def test_consolidated_forecast_sums_all_histories(tmp_path):
+    registry_path = tmp_path / "filiais.json"
+    registry_path.write_text(json.dumps({
+        'Centro': write_branch(tmp_path, 'centro', 200, history_months=36),
+        'Sul': write_branch(tmp_path, 'sul', 228, history_months=36),
+    }))
+    data = BranchData(load_registry(str(registry_path)))
+
+    assert len(data.history_paths(CONSOLIDATED)) == 2
+    history = load_history(data.history_paths(CONSOLIDATED))
+    assert history.counts[0, 0] == 428
+
+
+def test_index_nbytes_counts_shared_categories_once():
+    services = 5000
+    frame = pd.DataFrame({
+        'Mes': np.tile(np.arange(1, 13, dtype=np.int8), services),
+        'Servico': pd.Categorical(np.repeat([f"Serviço {number:05d}" for number in range(services)], 12)),
+        'Media': np.ones(services * 12, dtype=np.float32),
+        'Desvio_padrao': np.ones(services * 12, dtype=np.float32),
+    })
+    index = build_seasonal_index(frame)
+    frame_bytes = int(frame.memory_usage(deep=True).sum())
+
+    # Antes, cada partição somava a lista inteira de categorias (centenas de MB para ~1 MB de dados)
+    estimate = index_nbytes(index)
+    assert frame_bytes <= estimate <= 2 * frame_bytes
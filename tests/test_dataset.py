@@ -0,0 +1,68 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from dataset import NEW_FILE_MODE, build_seasonal_index, columnar_cache_path, read_seasonal_frame
+
+
+def test_index_partitions_and_lookup_from_unsorted_frame():
+    frame = pd.DataFrame({
+        'Mes': np.array([2, 1, 1, 3, 2], dtype=np.int8),
+        'Servico': pd.Categorical(["Massagem", "Massagem", "Drenagem", "Massagem", "Drenagem"]),
+        'Media': np.array([20.0, 10.0, 5.0, 30.0, 8.4], dtype=np.float32),
+        'Desvio_padrao': np.array([2.0, 1.0, 0.5, 3.0, 0.8], dtype=np.float32),
+    })
+    index = build_seasonal_index(frame)
+
+    # Serviços na ordem do arquivo (não na ordem das categorias), linhas de cada um por mês
+    assert index.services == ["Massagem", "Drenagem"]
+    assert index.by_service["Massagem"]['Mes'].tolist() == [1, 2, 3]
+    assert index.by_service["Drenagem"]['Media'].tolist() == [5.0, np.float32(8.4)]
+
+    assert index.get("Drenagem", 2) == (8.4, 0.8)
+    assert index.get("Drenagem", 3) is None
+    assert index.get("Outros", 1) is None
+
+
+def write_csv(path):
+    pd.DataFrame({'Mes': [1, 2], 'Servico': ["Massagem", "Massagem"], 'Media': [10.0, 20.0],
+                  'Desvio_padrao': [1.0, 2.0]}).to_csv(path, index=False)
+
+
+def test_columnar_cache_written_by_concurrent_threads(tmp_path):
+    path = tmp_path / "sazonal.csv"
+    write_csv(path)
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        frames = list(pool.map(lambda _: read_seasonal_frame(str(path)), range(16)))
+
+    assert all(frame['Media'].tolist() == [10.0, 20.0] for frame in frames)
+    assert os.path.exists(columnar_cache_path(str(path)))
+    assert not list(tmp_path.glob("*.tmp"))
+
+
+def test_failed_cache_write_leaves_no_temporary_file(tmp_path, monkeypatch):
+    import pyarrow.parquet as pq
+
+    def fail(table, where):
+        with open(where, 'wb') as file:
+            file.write(b'meio arquivo')
+        raise OSError("disco cheio")
+
+    path = tmp_path / "sazonal.csv"
+    write_csv(path)
+    monkeypatch.setattr(pq, 'write_table', fail)
+
+    assert read_seasonal_frame(str(path))['Media'].tolist() == [10.0, 20.0]
+    assert sorted(item.name for item in tmp_path.iterdir()) == ["sazonal.csv"]
+
+
+def test_columnar_cache_has_new_file_permissions(tmp_path):
+    path = tmp_path / "sazonal.csv"
+    write_csv(path)
+    read_seasonal_frame(str(path))
+
+    # Não 0600 como o mkstemp: outro usuário (a API) precisa ler o cache gravado pelo dashboard
+    cache_mode = os.stat(columnar_cache_path(str(path))).st_mode & 0o777
+    assert cache_mode == os.stat(path).st_mode & 0o777 == NEW_FILE_MODE
@@ -0,0 +1,13 @@
+import pytest
+
+from import_budget import BUDGETS, import_times, leaked_modules
+
+
+def test_core_does_not_import_heavy_dependencies():
+    assert leaked_modules() == []
+
+
+@pytest.mark.parametrize('name', list(BUDGETS))
+def test_import_time_within_budget(name):
+    elapsed, budget = import_times([name], runs=3)[name]
+    assert elapsed <= budget, f"{name} levou {elapsed * 1000:.1f} ms (orçamento {budget * 1000:.0f} ms)"
@@ -0,0 +1,80 @@
+import math
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from ingestion import SeasonalStats, ingest_file
+
+SERVICES = ["Massagem Relaxante (50 min)", "Drenagem Linfática (60 min)", "Reflexologia (30 min)"]
+
+
+def raw_appointments(rows=4000, seed=0):
+    rng = np.random.default_rng(seed)
+    days = pd.Timestamp('2022-01-01') + pd.to_timedelta(rng.integers(0, 3 * 365, rows), unit='D')
+    # Reflexologia só aparece em parte dos meses: os demais entram como contagem zero
+    services = rng.choice(SERVICES, rows, p=[0.6, 0.39, 0.01])
+    return pd.DataFrame({'Data': days.strftime('%d/%m/%Y'), 'Servico': services})
+
+
+def split(frame, parts):
+    return [frame.iloc[rows] for rows in np.array_split(np.arange(len(frame)), parts)]
+
+
+def full_recompute(raw):
+    """Média e desvio amostral por (serviço, mês) das contagens mensais, recalculados do zero"""
+    dates = pd.to_datetime(raw['Data'], dayfirst=True)
+    counts = pd.crosstab(raw['Servico'], [dates.dt.year, dates.dt.month]).stack([0, 1], future_stack=True)
+    counts.index.names = ['Servico', 'Ano', 'Mes']
+    stats = counts.groupby(level=['Servico', 'Mes']).agg(['mean', 'std'])
+    return stats.fillna(0.0)
+
+
+def assert_matches(stats, expected):
+    assert len(stats.moments) == len(expected)
+    for (service, month), (n, mean, m2) in stats.moments.items():
+        row = expected.loc[(service, month)]
+        assert mean == pytest.approx(row['mean'])
+        assert (math.sqrt(m2 / (n - 1)) if n > 1 else 0.0) == pytest.approx(row['std'], abs=1e-6)
+
+
+def test_sequential_chunks_match_full_recompute():
+    raw = raw_appointments()
+    stats = SeasonalStats()
+    # Blocos em ordem aleatória: o mesmo (serviço, ano, mês) é atualizado várias vezes (troca de Welford)
+    for chunk in split(raw.sample(frac=1, random_state=1), 7):
+        stats.update(chunk)
+    assert_matches(stats, full_recompute(raw))
+
+
+def test_merged_partial_states_match_full_recompute(tmp_path):
+    raw = raw_appointments(seed=3)
+    paths = []
+    for number, part in enumerate(split(raw, 3)):
+        paths.append(tmp_path / f"atendimentos_{number}.csv")
+        part.to_csv(paths[-1], index=False)
+
+    # Estado salvo com o primeiro arquivo, recarregado e combinado com os demais processados à parte
+    state_path = str(tmp_path / "estado.json")
+    ingest_file(paths[0], chunk_size=500).save(state_path)
+    stats = SeasonalStats.load(state_path)
+    for path in paths[1:]:
+        stats.merge(ingest_file(path, chunk_size=500))
+    assert_matches(stats, full_recompute(raw))
+
+
+def test_written_files_are_replaced_atomically(tmp_path):
+    first = SeasonalStats().update(raw_appointments(rows=200, seed=5))
+    second = SeasonalStats().update(raw_appointments(rows=2000, seed=6))
+    output, state_path = tmp_path / "dados_sazonais.csv", tmp_path / "estado.json"
+    first.write_csv(str(output))
+
+    # Várias threads regravam os mesmos arquivos; o resultado é sempre um arquivo inteiro
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(lambda _: (second.write_csv(str(output)), second.save(str(state_path))), range(16)))
+
+    expected = second.to_frame()
+    assert pd.read_csv(output).equals(expected)
+    assert SeasonalStats.load(str(state_path)).to_frame().equals(expected)
+    assert sorted(item.name for item in tmp_path.iterdir()) == ["dados_sazonais.csv", "estado.json"]
@@ -0,0 +1,122 @@
+import itertools
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import portfolio
+from dataset import session_minutes
+from portfolio import _solve, optimize_portfolio
+from pricing import expected_demand
+
+SCENARIO = dict(original_price=100.0, service_cost=20.0, commission_percentage=30.0, desired_profit_increase=5.0)
+
+
+def brute_force_gain(weights, gains, capacity):
+    """Melhor ganho de cada mês testando todas as combinações (no máximo uma opção por serviço)"""
+    services, months, options = weights.shape
+    best = np.zeros(months)
+    for month in range(months):
+        for picks in itertools.product(range(-1, options), repeat=services):
+            chosen = [(service, option) for service, option in enumerate(picks) if option >= 0]
+            weight = sum(weights[service, month, option] for service, option in chosen)
+            gain = sum(gains[service, month, option] for service, option in chosen)
+            if weight <= capacity[month]:
+                best[month] = max(best[month], gain)
+    return best
+
+
+def chosen_gain(weights, gains, capacity, chosen):
+    services, months = chosen.shape
+    total = np.zeros(months)
+    for month in range(months):
+        used = 0
+        for service in range(services):
+            if chosen[service, month] >= 0:
+                used += weights[service, month, chosen[service, month]]
+                total[month] += gains[service, month, chosen[service, month]]
+        assert used <= capacity[month]
+    return total
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_solve_matches_brute_force(seed):
+    rng = np.random.default_rng(seed)
+    weights = rng.integers(0, 8, (5, 4, 3))
+    gains = rng.uniform(-2, 10, (5, 4, 3))
+    gains[rng.random(gains.shape) < 0.2] = -np.inf
+    capacity = rng.integers(0, 20, 4)
+
+    chosen = _solve(weights, gains, capacity)
+    assert np.allclose(chosen_gain(weights, gains, capacity, chosen), brute_force_gain(weights, gains, capacity))
+
+
+def catalog(services, seed=0):
+    rng = np.random.default_rng(seed)
+    names = [f"Serviço {number} ({minutes} min)" for number, minutes in
+             zip(range(services), rng.choice([30, 50, 60, 90], services))]
+    return pd.DataFrame({'Mes': np.tile(np.arange(1, 13), services), 'Servico': np.repeat(names, 12),
+                         'Media': rng.uniform(5, 40, services * 12).round(1), 'Desvio_padrao': 1.0})
+
+
+def exhaustive_gain(frame, prices, elasticity, capacity_hours):
+    """Melhor ganho anual com os minutos reais (sem arredondamento), testando todas as combinações"""
+    margin_rate = 1 - SCENARIO['commission_percentage'] / 100
+    total = 0.0
+    for _, month in frame.groupby('Mes'):
+        demand = month['Media'].to_numpy()
+        minutes = np.array([session_minutes(service) for service in month['Servico']])
+        base_minutes = (demand * minutes).sum()
+        best = 0.0
+        for picks in itertools.product([None, *prices], repeat=len(demand)):
+            gain, extra = 0.0, 0.0
+            for service, price in enumerate(picks):
+                if price is None:
+                    continue
+                promoted = expected_demand(demand[service], SCENARIO['original_price'], price, elasticity)
+                gain += (promoted * (price * margin_rate - SCENARIO['service_cost'])
+                         - demand[service] * (SCENARIO['original_price'] * margin_rate - SCENARIO['service_cost']))
+                extra += (promoted - demand[service]) * minutes[service]
+            if base_minutes + extra <= capacity_hours * 60 + 1e-9:
+                best = max(best, gain)
+        total += best
+    return total
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_optimize_portfolio_matches_exhaustive_search(seed):
+    frame = catalog(4, seed)
+    prices = [70.0, 80.0, 90.0]
+    baseline_hours = (frame['Media'] * frame['Servico'].map(session_minutes) / 60).groupby(frame['Mes']).sum()
+    capacity_hours = float(baseline_hours.max()) + 12
+
+    result = optimize_portfolio(frame, SCENARIO['original_price'], SCENARIO['service_cost'],
+                                SCENARIO['commission_percentage'], SCENARIO['desired_profit_increase'],
+                                1.5, capacity_hours, prices=prices, step_minutes=1)
+
+    # O plano cabe nas horas reais e perde no máximo o arredondamento de um passo por serviço
+    assert (result.months['used_hours'] <= capacity_hours + 1e-9).all()
+    assert result.total_gain <= exhaustive_gain(frame, prices, 1.5, capacity_hours) + 1e-6
+    assert result.total_gain >= exhaustive_gain(frame, prices, 1.5, capacity_hours - 4 / 60) - 1e-6
+
+
+def test_large_catalog_uses_coarser_steps_within_the_choice_budget(monkeypatch):
+    frame = catalog(300)
+    capacity_hours = float((frame['Media'] * frame['Servico'].map(session_minutes) / 60)
+                           .groupby(frame['Mes']).sum().max()) + 50
+    shapes = []
+    original_zeros = np.zeros
+
+    def recording_zeros(shape, *args, **kwargs):
+        array = original_zeros(shape, *args, **kwargs)
+        if isinstance(shape, tuple) and len(shape) == 3:
+            shapes.append(array.nbytes)
+        return array
+
+    monkeypatch.setattr(portfolio, 'MAX_CHOICE_BYTES', 256 * 1024)
+    monkeypatch.setattr(portfolio.np, 'zeros', recording_zeros)
+    result = optimize_portfolio(frame, *SCENARIO.values(), 1.5, capacity_hours)
+
+    assert shapes and max(shapes) <= 256 * 1024
+    assert (result.months['used_hours'] <= capacity_hours + 1e-9).all()
+    assert result.total_gain > 0
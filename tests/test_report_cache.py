@@ -0,0 +1,34 @@
+import datetime
+import os
+
+from dataset import NEW_FILE_MODE
+from report_cache import ReportCache, report_key
+
+ARGS = ("Massagem Relaxante (50 min)", "Janeiro", 30.0, 5.0, 100.0, 20.0, 30.0, 5.0, 85.0, False)
+
+
+def test_overwriting_a_key_keeps_the_size_and_the_other_reports(tmp_path):
+    cache = ReportCache(str(tmp_path), max_bytes=3000)
+    cache.put('aa' + '0' * 62, b'x' * 1000)
+    cache.put('bb' + '0' * 62, b'x' * 1000)
+
+    # Regravar a mesma chave várias vezes não pode inflar o total e remover o outro relatório
+    for _ in range(5):
+        cache.put('bb' + '0' * 62, b'y' * 1000)
+
+    assert cache._size == cache.size() == 2000
+    assert cache.get('aa' + '0' * 62) == b'x' * 1000
+    assert cache.get('bb' + '0' * 62) == b'y' * 1000
+
+
+def test_report_key_depends_on_the_report_date():
+    day = datetime.date(2024, 3, 31)
+    assert report_key(ARGS, day) == report_key(list(ARGS), day)
+    assert report_key(ARGS, day) != report_key(ARGS, day + datetime.timedelta(days=1))
+    assert report_key(ARGS) == report_key(ARGS, datetime.date.today())
+
+
+def test_cached_reports_have_new_file_permissions(tmp_path):
+    cache = ReportCache(str(tmp_path))
+    cache.put('cc' + '0' * 62, b'%PDF')
+    assert os.stat(cache.path('cc' + '0' * 62)).st_mode & 0o777 == NEW_FILE_MODE
@@ -0,0 +1,28 @@
+import numpy as np
+import pytest
+
+import simulation
+from simulation import simulate_promotion
+
+
+@pytest.mark.parametrize('distribution', ['normal', 'truncated', 'poisson'])
+def test_large_demand_does_not_depend_on_a_histogram(distribution):
+    # Um histograma até 1e12 vendas pediria terabytes; o resultado deve sair em memória constante
+    result = simulate_promotion(1e12, 1e9, 1e12, 10.0, draws=100_000, distribution=distribution)
+    assert result.draws == 100_000
+    assert result.expected_sales == pytest.approx(1e12, rel=1e-3)
+    assert 0.45 < result.probability < 0.55
+    assert result.profit_percentiles[5] < result.profit_percentiles[50] < result.profit_percentiles[95]
+    assert result.profit_percentiles[50] == pytest.approx(1e13, rel=1e-3)
+
+
+def test_chunked_percentiles_match_the_histogram(monkeypatch):
+    exact = simulate_promotion(500, 40, 520, 10.0, draws=400_000)
+    monkeypatch.setattr(simulation, 'MAX_HISTOGRAM_SALES', 0)
+    estimated = simulate_promotion(500, 40, 520, 10.0, draws=400_000)
+
+    # Mesmos sorteios: chance e média são idênticas, os percentis diferem por menos de uma venda
+    assert estimated.probability == exact.probability
+    assert estimated.expected_sales == pytest.approx(exact.expected_sales)
+    assert np.allclose(list(estimated.profit_percentiles.values()), list(exact.profit_percentiles.values()),
+                       atol=10.0)